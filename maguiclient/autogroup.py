@@ -7,11 +7,15 @@
 
 from __future__ import print_function
 
+import json
+
 try:
     import risuclient.shell as risu
 except ImportError:
     import shell as risu
 
+from maguiclient import views
+
 
 class AutoGroupManager(object):
     """
@@ -187,6 +191,161 @@ class AutoGroupManager(object):
         }
 
 
+class ResultDigests(object):
+    """
+    Digests of the results of each plugin for each sosreport.
+
+    Each result is reduced to its rc and codes for its out and err, the
+    same code for equal values, computed once for all sosreports so that
+    results can be compared for any group of them without reading them
+    again.
+    """
+
+    def __init__(self, grouped, keys=None):
+        """
+        Initialize digests.
+
+        :param grouped: grouped results for all sosreports
+        :param keys: plugins of grouped to digest (default: all)
+        """
+        self._codes = {}
+        self.metadata = {}
+        self.digests = {}
+        for key in grouped if keys is None else keys:
+            if "sosreport" not in grouped[key]:
+                continue
+            results = grouped[key]["sosreport"]
+            self.metadata[key] = dict(
+                (element, grouped[key][element])
+                for element in grouped[key]
+                if element != "sosreport"
+            )
+            self.digests[key] = dict(
+                (
+                    sosreport,
+                    (
+                        results[sosreport]["rc"],
+                        self.code(results[sosreport]["out"]),
+                        self.code(results[sosreport]["err"]),
+                    ),
+                )
+                for sosreport in results
+            )
+
+    def code(self, value):
+        """
+        Gets code for a value
+
+        :param value: out or err of a result
+        :return: integer, the same for equal values
+        """
+        try:
+            return self._codes.setdefault(value, len(self._codes))
+        except TypeError:
+            value = json.dumps(value, sort_keys=True)
+            return self._codes.setdefault(value, len(self._codes))
+
+    def data(self, keys, sosreports):
+        """
+        Gets grouped results for some sosreports with out/err replaced by codes
+
+        :param keys: plugins to include
+        :param sosreports: set of sosreports in the group
+        :return: dictionary like grouped results
+        """
+        data = {}
+        for key in keys:
+            item = dict(self.metadata[key])
+            item["sosreport"] = dict(
+                (sosreport, {"rc": rc, "out": out, "err": err})
+                for sosreport, (rc, out, err) in self.digests[key].items()
+                if sosreport in sosreports
+            )
+            data[key] = item
+        return data
+
+
+class GroupPlanner(object):
+    """
+    Runs magui plugins comparing results across hosts for many groups.
+
+    Magui plugins and data hooks declare ``digests = True`` at module
+    level when they only check if results are equal across hosts, never
+    reading them otherwise. Those are run over ResultDigests computed
+    once instead of over the results of each group, in O(hosts) for each
+    plugin they trigger on. Other plugins still run over group results,
+    and all of them do if any data hook doesn't declare it.
+    """
+
+    def __init__(self, grouped, plugins, triggers, hooks=None):
+        """
+        Initialize planner.
+
+        :param grouped: grouped results for all sosreports (after full run)
+        :param plugins: magui plugins
+        :param triggers: dict of {plugin name: triggers}
+        :param hooks: magui data hooks
+        """
+        hooks = hooks or []
+        self.hooks = hooks
+        self.plugins = []
+        self.keys = {}
+
+        # Hooks modify results before plugins see them, so they must work
+        # on digests too
+        if not all(getattr(hook, "digests", False) for hook in hooks):
+            self.digests = None
+            return
+
+        index = views.TriggerIndex(grouped)
+        for plugin in plugins:
+            name = plugin.__name__.split(".")[-1]
+            if getattr(plugin, "digests", False) and "*" not in triggers[name]:
+                self.plugins.append(plugin)
+                self.keys[name] = list(index.select(triggers[name]))
+
+        allkeys = set(key for keys in self.keys.values() for key in keys)
+        self.digests = ResultDigests(grouped, keys=allkeys)
+
+    def plans(self, plugin):
+        """
+        Checks if plugin is run by planner
+
+        :param plugin: magui plugin
+        :return: True if plugin runs over digests
+        """
+        return self.digests is not None and plugin in self.plugins
+
+    def run(self, sosreports, quiet=False):
+        """
+        Runs plugins over digests for a group
+
+        :param sosreports: sosreports in the group
+        :param quiet: work in reduced noise mode
+        :return: dict of {plugin name: (returncode, out, err)}
+        """
+        if self.digests is None:
+            return {}
+
+        sosreports = set(sosreports)
+        keys = set(key for keys in self.keys.values() for key in keys).intersection(
+            self.digests.digests
+        )
+        data = self.digests.data(keys, sosreports)
+
+        for hook in self.hooks:
+            newresults = hook.run(data=data)
+            if newresults:
+                data = newresults
+
+        results = {}
+        for plugin in self.plugins:
+            name = plugin.__name__.split(".")[-1]
+            ourdata = dict((key, data[key]) for key in self.keys[name] if key in data)
+            results[name] = plugin.run(data=ourdata, quiet=quiet)
+        return results
+
+
 def autogroups(autodata):
     """
     Legacy function for backward compatibility.
@@ -7,17 +7,23 @@
 
 from __future__ import print_function
 
-import copy
 import hashlib
 import logging
 import os
 import time
+from multiprocessing import cpu_count
 
 try:
     from maguiclient import autogroup as autogroup_module
+    from maguiclient import parallel, store, views
+    from risuclient import resultsfile
     from risuclient import shell as risu
 except ImportError:
     import autogroup as autogroup_module
+    import parallel
+    import store
+    import views
+    import resultsfile
     import shell as risu
 
 LOG = logging.getLogger("magui")
@@ -47,14 +53,23 @@ class MaguiClient(object):
             self.exclude = options.exclude
             self.hosts = options.hosts if hasattr(options, "hosts") else None
             self.quiet = options.quiet if hasattr(options, "quiet") else False
+            self.numproc = getattr(options, "numproc", None) or cpu_count()
+            self.incremental = getattr(options, "incremental", False)
         else:
             self.forcerun = False
             self.include = None
             self.exclude = None
             self.hosts = None
             self.quiet = False
+            self.numproc = cpu_count()
+            self.incremental = False
 
-    def call_risu(self, path, plugins, forcerun=None, include=None, exclude=None):
+        # Trigger index for the last grouped results filtered
+        self._index = None
+
+    def call_risu(
+        self, path, plugins, forcerun=None, include=None, exclude=None, numproc=None
+    ):
         """
         Execute risu against a single sosreport.
 
@@ -63,6 +78,7 @@ class MaguiClient(object):
         :param forcerun: Force re-run of risu (ignore cached results)
         :param include: Include filter patterns
         :param exclude: Exclude filter patterns
+        :param numproc: Number of processes for plugins (default: self.numproc)
         :return: Dictionary of results keyed by plugin ID
         """
         # Use instance defaults if not provided
@@ -81,6 +97,7 @@ class MaguiClient(object):
             include=include,
             exclude=exclude,
             quiet=True,
+            numproc=numproc or self.numproc,
         )
 
         # Process plugin output - convert to dict keyed by plugin ID
@@ -91,6 +108,39 @@ class MaguiClient(object):
 
         return new_dict
 
+    def cached_risu(self, path, plugins):
+        """
+        Get results saved by risu for a sosreport if they are current.
+
+        Saved results are current when risu.json was written for the same
+        plugins with the same contents, as recorded in its metadata by
+        dorisu, so running risu again would give the same results.
+
+        :param path: Path to sosreport
+        :param plugins: List of plugins to run
+        :return: Dictionary of results keyed by plugin ID or None if risu has to run
+        """
+        try:
+            # Results of plugins filtered out are not read
+            data = resultsfile.load(
+                resultsfile.locate(os.path.join(path, "risu.json")),
+                include=self.include,
+                exclude=self.exclude,
+            )
+            metadata = data["metadata"]
+            results = data["results"]
+        except (IOError, OSError, KeyError, TypeError, ValueError):
+            return None
+
+        if not plugins or metadata.get("plugins") != risu.plugindigest(plugins):
+            return None
+
+        cached = {}
+        for item in results:
+            cached[results[item].get("id", item)] = results[item]
+
+        return risu.filterresults(cached, include=self.include, exclude=self.exclude)
+
     def collect_risu_results(self, sosreports, risuplugins):
         """
         Collect risu results from all sosreports.
@@ -100,12 +150,23 @@ class MaguiClient(object):
         :return: Dictionary of {sosreport: {plugin_id: result}}
         """
         result = {}
-
-        for sosreport in sosreports:
-            result[sosreport] = self.call_risu(
-                path=os.path.abspath(sosreport),
+        if self.incremental and not self.forcerun:
+            # Reuse saved results, only new or changed sosreports are analyzed
+            for sosreport in sosreports:
+                cached = self.cached_risu(sosreport, risuplugins)
+                if cached is not None:
+                    result[sosreport] = cached
+
+        # Each sosreport is analyzed in its own process sharing our CPU budget
+        executor = parallel.ParallelRisuExecutor(num_processes=self.numproc)
+        result.update(
+            executor.execute_parallel(
+                [sosreport for sosreport in sosreports if sosreport not in result],
+                self.call_risu,
                 plugins=risuplugins,
+                numproc=None,
             )
+        )
 
         # Sanity check for inconsistencies
         if not self.forcerun:
@@ -177,27 +238,7 @@ class MaguiClient(object):
         :param result: Results dictionary
         :return: Grouped dictionary
         """
-        # Precreate multidimensional array
-        grouped = {}
-        for sosreport in sosreports:
-            plugins = []
-            for plugin in result[sosreport]:
-                plugins.append(plugin)
-                grouped[plugin] = {}
-                grouped[plugin]["sosreport"] = {}
-
-        # Fill the data
-        for sosreport in sosreports:
-            for plugin in result[sosreport]:
-                grouped[plugin]["sosreport"][sosreport] = result[sosreport][plugin][
-                    "result"
-                ]
-                for element in result[sosreport][plugin]:
-                    # Skip sosreport-specific elements
-                    if element not in ["time", "result"]:
-                        grouped[plugin][element] = result[sosreport][plugin][element]
-
-        return grouped
+        return store.group(sosreports, result)
 
     def run_hooks(self, grouped, hooks_folder):
         """
@@ -211,7 +252,8 @@ class MaguiClient(object):
             extensions=risu.getPymodules(options=self.options, folders=[hooks_folder])
         )[0]:
             LOG.debug("Running hook: %s" % maguihook.__name__.split(".")[-1])
-            newresults = maguihook.run(data=copy.deepcopy(grouped))
+            # Hooks get a copy-on-write view, only what they modify is copied
+            newresults = maguihook.run(data=views.CowDict(grouped))
             if newresults:
                 grouped = newresults
 
@@ -221,26 +263,14 @@ class MaguiClient(object):
         """
         Clean up grouped results for sosreports we're not interested in.
 
+        Grouped results are not copied nor modified, a view showing only
+        the sosreports to keep is returned instead.
+
         :param sosreports: List of sosreports to keep
         :param grouped: Grouped results
         :return: Cleaned grouped results
         """
-        cleansosreports = []
-
-        for plugin in grouped:
-            # Walk plugins
-            for sosreport in grouped[plugin]["sosreport"]:
-                # Walk sosreports for plugin
-                if sosreport not in sosreports:
-                    # Add sosreport to cleanup list
-                    cleansosreports.append(sosreport)
-
-        for sosreport in sorted(set(cleansosreports)):
-            for plugin in grouped:
-                if sosreport in grouped[plugin]["sosreport"]:
-                    del grouped[plugin]["sosreport"][sosreport]
-
-        return grouped
+        return views.GroupedView(grouped, sosreports)
 
     def analyze(
         self, sosreports, risuplugins, grouped=None, runhooks=True, hooks_folder=None
@@ -255,7 +285,7 @@ class MaguiClient(object):
         :param hooks_folder: Path to hooks folder
         :return: Grouped results dictionary
         """
-        if grouped is not None and grouped != {}:
+        if grouped:
             # Use provided grouped data, just clean it up
             grouped = self.cleanup_grouped_results(sosreports, grouped)
         else:
@@ -271,25 +301,21 @@ class MaguiClient(object):
 
         return grouped
 
-    def filter_results(self, data, triggers):
+    def filter_results(self, data, triggers, index=None):
         """
         Filter results for only the data that a plugin will use.
 
         :param data: Full set of grouped data
         :param triggers: Set of triggers (plugin IDs) to match
+        :param index: TriggerIndex for data (built and kept if not provided)
         :return: Filtered data
         """
-        if "*" in triggers:
-            # If plugin processes everything, return all data
-            return data
-
-        ourdata = {}
-        for trigger in triggers:
-            for elem in data:
-                # Handle 'faked' IDs like multi-Faraday bundles
-                if "id" in data[elem] and trigger in data[elem]["id"]:
-                    ourdata[data[elem]["id"]] = dict(data[elem])
-        return ourdata
+        if index is None:
+            if self._index is None or self._index.data is not data:
+                self._index = views.TriggerIndex(data)
+            index = self._index
+
+        return index.select(triggers)
 
     def run_magui_plugins(self, grouped, magui_plugins, magui_triggers, start_time):
         """
@@ -313,7 +339,11 @@ class MaguiClient(object):
             )
 
             returncode, out, err = plugin.run(data=data, quiet=self.quiet)
-            updates = {"rc": returncode, "out": out, "err": err}
+            updates = {
+                "rc": returncode,
+                "out": views.plain(out),
+                "err": views.plain(err),
+            }
 
             # Extract category/subcategory from plugin path
             plugin_dir = os.path.split(plugin.__file__)[0]
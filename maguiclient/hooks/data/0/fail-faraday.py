@@ -18,6 +18,7 @@ _ = risu._
 
 extension = "__file__"
 pluginsdir = os.path.join(risu.risudir, "plugins", extension)
+digests = True
 
 
 def init():
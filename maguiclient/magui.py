@@ -23,7 +23,6 @@
 from __future__ import print_function
 
 import argparse
-import copy
 import gettext
 import glob
 import hashlib
@@ -37,6 +36,8 @@ sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/" + "../"))
 
 from maguiclient import autogroup as autogroup_module
 from maguiclient import client as magui_client
+from maguiclient import parallel, store, views
+from risuclient import resultsfile
 from risuclient import shell as risu
 
 LOG = logging.getLogger("magui")
@@ -124,7 +125,9 @@ def parse_args():
         "--output",
         "-o",
         metavar="FILENAME",
-        help=_("Write results to JSON file FILENAME"),
+        help=_(
+            "Write results to JSON file FILENAME, compressed if FILENAME ends with .gz"
+        ),
         default="magui.json",
     )
     p.add_argument(
@@ -133,6 +136,13 @@ def parse_args():
         action="store_true",
         help=_("Force run of risu instead of reading existing 'risu.json'"),
     )
+    p.add_argument(
+        "--incremental",
+        action="store_true",
+        help=_(
+            "Only analyze sosreports without current 'risu.json' and only regenerate out of date autogroup results"
+        ),
+    )
     p.add_argument(
         "--hosts",
         metavar="hosts",
@@ -223,9 +233,12 @@ def commonpath(folders):
     return code
 
 
-def callrisu(path=False, plugins=False, forcerun=False, include=None, exclude=None):
+def callrisu(
+    path=False, plugins=False, forcerun=False, include=None, exclude=None, numproc=None
+):
     """
     Do actual execution of risu against data
+    :param numproc: number of processes for plugins
     :param exclude: keywords to exclude
     :param include: keywords to include
     :param forcerun: Forces execution of risu analysis (ignoring saved data in risu.json)
@@ -244,6 +257,7 @@ def callrisu(path=False, plugins=False, forcerun=False, include=None, exclude=No
             self.include = include
             self.exclude = exclude
             self.quiet = True
+            self.numproc = numproc
 
     client = magui_client.MaguiClient(TempOptions())
     return client.call_risu(path, plugins)
@@ -262,28 +276,23 @@ def findtarget(data):
     return autogroup_module.findtarget(data)
 
 
-def domagui(sosreports, risuplugins, options=False, grouped={}, runhooks=True):
+def domagui(
+    sosreports,
+    risuplugins,
+    options=False,
+    grouped={},
+    runhooks=True,
+    incremental=False,
+):
     """
     Do actual execution against sosreports
+    :param incremental: reuse current risu.json of sosreports instead of running risu
     :return: dict of result
     """
 
-    if grouped != {}:
-        # Cleanup grouped for sosreports we're not interested at all
-        cleansosreports = []
-
-        for plugin in grouped:
-            # Walk plugins
-            for sosreport in grouped[plugin]["sosreport"]:
-                # Walk sosreports for plugin
-                if sosreport not in sosreports:
-                    # Add sosreport to cleanup list
-                    cleansosreports.append(sosreport)
-
-        for sosreport in sorted(set(cleansosreports)):
-            for plugin in grouped:
-                if sosreport in grouped[plugin]["sosreport"]:
-                    del grouped[plugin]["sosreport"][sosreport]
+    if grouped:
+        # Only show sosreports we're interested at, without copying or modifying grouped
+        grouped = views.GroupedView(grouped, sosreports)
     else:
         # Check if we've been provided options
         if options:
@@ -291,23 +300,39 @@ def domagui(sosreports, risuplugins, options=False, grouped={}, runhooks=True):
             citinclude = options.include
             citexclude = options.exclude
             hosts = options.hosts
+            numproc = getattr(options, "numproc", None)
         else:
             forcerun = False
             citinclude = None
             citexclude = None
             hosts = False
+            numproc = None
 
-        # Grab data from risu for the sosreports provided
         result = {}
-
-        for sosreport in sosreports:
-            result[sosreport] = callrisu(
-                path=os.path.abspath(sosreport),
-                plugins=risuplugins,
-                forcerun=forcerun,
-                include=citinclude,
-                exclude=citexclude,
-            )
+        if incremental and not forcerun:
+            # Reuse saved results, only new or changed sosreports are analyzed
+            client = magui_client.MaguiClient(options or None)
+            for sosreport in sosreports:
+                cached = client.cached_risu(os.path.abspath(sosreport), risuplugins)
+                if cached is not None:
+                    result[sosreport] = cached
+            LOG.debug("Reusing risu results for %s" % sorted(result))
+
+        # Grab data from risu for the sosreports provided, each one analyzed
+        # in its own process and sharing the CPU budget with their plugins
+        pending = [sosreport for sosreport in sosreports if sosreport not in result]
+        executor = parallel.ParallelRisuExecutor(num_processes=numproc)
+        executed = executor.execute_parallel(
+            [os.path.abspath(sosreport) for sosreport in pending],
+            callrisu,
+            plugins=risuplugins,
+            forcerun=forcerun,
+            include=citinclude,
+            exclude=citexclude,
+            numproc=None,
+        )
+        for sosreport in pending:
+            result[sosreport] = executed[os.path.abspath(sosreport)]
 
         # Sanity check in case we do need to force run because of inconsistencies between saved data
         if not forcerun:
@@ -356,26 +381,8 @@ def domagui(sosreports, risuplugins, options=False, grouped={}, runhooks=True):
                         forcerun=True,
                     )
 
-        # Precreate multidimensional array
-        grouped = {}
-        for sosreport in sosreports:
-            plugins = []
-            for plugin in result[sosreport]:
-                plugins.append(plugin)
-                grouped[plugin] = {}
-                grouped[plugin]["sosreport"] = {}
-
-        # Fill the data
-        for sosreport in sosreports:
-            for plugin in result[sosreport]:
-                grouped[plugin]["sosreport"][sosreport] = result[sosreport][plugin][
-                    "result"
-                ]
-                for element in result[sosreport][plugin]:
-                    # Some of the elements are not useful as they are sosreport specific, so we do skip them completely
-                    # In this approach we don't need to update this code each time the plugin exports new metadata
-                    if element not in ["time", "result"]:
-                        grouped[plugin][element] = result[sosreport][plugin][element]
+        # Group results by plugin, with results stored in columns
+        grouped = store.group(sosreports, result)
 
     if runhooks:
         # Run the hook processing hooks on the results
@@ -383,7 +390,8 @@ def domagui(sosreports, risuplugins, options=False, grouped={}, runhooks=True):
             extensions=risu.getPymodules(options=options, folders=[MaguiHooksFolder])
         )[0]:
             LOG.debug("Running hook: %s" % maguihook.__name__.split(".")[-1])
-            newresults = maguihook.run(data=copy.deepcopy(grouped))
+            # Hooks get a copy-on-write view, only what they modify is copied
+            newresults = maguihook.run(data=views.CowDict(grouped))
             if newresults:
                 grouped = newresults
 
@@ -391,18 +399,75 @@ def domagui(sosreports, risuplugins, options=False, grouped={}, runhooks=True):
     return grouped
 
 
-def filterresults(data, triggers=[]):
+def maguidigest(files, risuplugins, options):
+    """
+    Gets digest identifying magui plugins, hooks and options of an analysis
+    :param files: files of magui plugins and hooks
+    :param risuplugins: risu plugins whose results are compared
+    :param options: options the analysis runs with
+    :return: sha512 hexdigest of files, their contents, plugins and options
+    """
+    digest = hashlib.sha512()
+    for filename in sorted(set(files)):
+        try:
+            with open(filename, "rb") as f:
+                content = hashlib.sha512(f.read()).hexdigest()
+        except (IOError, OSError):
+            content = ""
+        digest.update(("%s %s\n" % (filename, content)).encode("UTF-8"))
+    digest.update(risu.plugindigest(risuplugins).encode("UTF-8"))
+    for option in ["include", "exclude", "prio", "anon"]:
+        value = getattr(options, option, None)
+        digest.update(("%s %r\n" % (option, value)).encode("UTF-8"))
+    return digest.hexdigest()
+
+
+def uptodate(filename, sosreports, digest=None):
+    """
+    Checks if magui results saved in filename are current for sosreports
+    :param filename: magui results file
+    :param sosreports: sosreports to analyze
+    :param digest: digest of plugins and options of the analysis (see maguidigest)
+    :return: True if filename was saved for the same sosreports, plugins and
+             options after their risu.json
+    """
+    try:
+        saved = os.stat(filename).st_mtime
+        metadata = resultsfile.metadata(filename)
+        path = metadata["path"]
+    except (IOError, OSError, KeyError, TypeError, ValueError):
+        return False
+
+    if not isinstance(path, list) or sorted(path) != sorted(sosreports):
+        return False
+
+    if metadata.get("plugins") != digest:
+        return False
+
+    for sosreport in sosreports:
+        try:
+            results = resultsfile.locate(os.path.join(sosreport, "risu.json"))
+            if os.stat(results).st_mtime > saved:
+                return False
+        except (OSError, TypeError):
+            return False
+
+    return True
+
+
+def filterresults(data, triggers=[], index=None):
     """
     Filters results for only the data that plugin will use
     :param data: full set of data
     :param triggers: set of triggers (plugin ID's) to match
+    :param index: TriggerIndex for data to reuse between calls
     :return: filtered data of only those plugins
 
     NOTE: This function now delegates to MaguiClient for better maintainability.
     Kept here for backward compatibility.
     """
     client = magui_client.MaguiClient()
-    return client.filter_results(data, triggers)
+    return client.filter_results(data, triggers, index=index)
 
 
 def autogroups(autodata):
@@ -457,6 +522,7 @@ def main():
                 desc = plugin.help()
                 if desc:
                     print(risu.indent(text=desc, amount=4))
+        risu.savecaches()
         return
 
     # Prefill enabled risu plugins from args
@@ -537,9 +603,15 @@ def main():
         result=None,
         anon=False,
         grouped={},
+        incremental=False,
+        planner=None,
+        digest=None,
     ):
         """
         Runs magui and magui plugins
+        :param digest: digest of plugins and options to save in metadata
+        :param planner: GroupPlanner running plugins comparing results across hosts
+        :param incremental: Reuse current risu.json of sosreports (domagui)
         :param grouped: Grouped results from sosreports to speedup processing (domagui)
         :param anon: anonymize results on execution
         :param serveruri: Server uri to POST the analysis
@@ -556,19 +628,35 @@ def main():
         if not onlysave and not result:
             # Run with all plugins so that we get all data back
             grouped = domagui(
-                sosreports=sosreports, risuplugins=risuplugins, grouped=grouped
+                sosreports=sosreports,
+                risuplugins=risuplugins,
+                grouped=grouped,
+                incremental=incremental,
             )
 
             # Run Magui plugins
             result = []
+            index = views.TriggerIndex(grouped)
+            planned = {}
+            if planner:
+                planned = planner.run(sosreports, quiet=options.quiet)
             for plugin in magplugs:
                 plugstart_time = time.time()
-                # Get output from plugin
-                data = filterresults(
-                    data=grouped, triggers=magtriggers[plugin.__name__.split(".")[-1]]
-                )
-                returncode, out, err = plugin.run(data=data, quiet=options.quiet)
-                updates = {"rc": returncode, "out": out, "err": err}
+                name = plugin.__name__.split(".")[-1]
+                if name in planned:
+                    # Already run by planner over digests of results
+                    returncode, out, err = planned[name]
+                else:
+                    # Get output from plugin
+                    data = filterresults(
+                        data=grouped, triggers=magtriggers[name], index=index
+                    )
+                    returncode, out, err = plugin.run(data=data, quiet=options.quiet)
+                updates = {
+                    "rc": returncode,
+                    "out": views.plain(out),
+                    "err": views.plain(err),
+                }
 
                 subcategory = os.path.split(plugin.__file__)[0].replace(
                     os.path.join(maguidir, "plugins", ""), ""
@@ -612,24 +700,35 @@ def main():
                 extranames=extranames,
                 serveruri=serveruri,
                 anon=anon,
+                digest=digest,
             )
 
         return result, grouped
 
     print(_("\nStarting check updates and comparison"))
 
-    metadataplugins = []
-    for plugin in risuplugins:
-        if plugin["backend"] == "metadata":
-            metadataplugins.append(plugin)
-
-    # Prepare metadata execution to find groups
-    results, grouped = runmaguiandplugs(
-        sosreports=sosreports,
-        risuplugins=metadataplugins,
-        filename=options.output,
-        serveruri=options.call_home,
-    )
+    if options.incremental:
+        # Metadata plugins run with all the others, so that risu.json saved
+        # for the sosreports keeps all results and can be reused next time
+        results, grouped = runmaguiandplugs(
+            sosreports=sosreports,
+            risuplugins=risuplugins,
+            filename=False,
+            incremental=True,
+        )
+    else:
+        metadataplugins = []
+        for plugin in risuplugins:
+            if plugin["backend"] == "metadata":
+                metadataplugins.append(plugin)
+
+        # Prepare metadata execution to find groups
+        results, grouped = runmaguiandplugs(
+            sosreports=sosreports,
+            risuplugins=metadataplugins,
+            filename=options.output,
+            serveruri=options.call_home,
+        )
 
     # Now we've Magui saved for the whole execution provided in 'results' var
 
@@ -667,14 +766,26 @@ def main():
 
     print("\nRunning full comparison:... %s" % options.output)
 
-    # Run full (not only metadata plugins) so that we've the data stored and save filenames in magui.json
-    results, grouped = runmaguiandplugs(
-        sosreports=sosreports,
-        risuplugins=risuplugins,
-        extranames=filenames,
-        filename=options.output,
-        serveruri=options.call_home,
-    )
+    if options.incremental:
+        # Full results are already there, just save them with filenames
+        runmaguiandplugs(
+            sosreports=sosreports,
+            risuplugins=risuplugins,
+            extranames=filenames,
+            filename=options.output,
+            serveruri=options.call_home,
+            onlysave=True,
+            result=results,
+        )
+    else:
+        # Run full (not only metadata plugins) so that we've the data stored and save filenames in magui.json
+        results, grouped = runmaguiandplugs(
+            sosreports=sosreports,
+            risuplugins=risuplugins,
+            extranames=filenames,
+            filename=options.output,
+            serveruri=options.call_home,
+        )
 
     # Here 'grouped' obtained from above contains the full set of data
 
@@ -691,6 +802,24 @@ def main():
     processedgroups = {}
     basefilename = os.path.splitext(options.output)
 
+    planner = None
+    digest = None
+    if groups:
+        maguihooks = risu.initPymodules(
+            extensions=risu.getPymodules(options=options, folders=[MaguiHooksFolder])
+        )[0]
+        # Digest results once for the plugins comparing them across hosts
+        # instead of doing it again for each group
+        planner = autogroup_module.GroupPlanner(
+            grouped, magplugs, magtriggers, hooks=maguihooks
+        )
+        # Saved group results are only reused if produced the same way
+        digest = maguidigest(
+            [plugin.__file__ for plugin in magplugs + maguihooks],
+            risuplugins,
+            options,
+        )
+
     while len(groups) != 0:
         target, newgroups, todel = findtarget(groups)
         if target and target != "":
@@ -704,17 +833,25 @@ def main():
                     runautogroup = False
                     runautofile = progroup
 
-            if runautogroup:
-                # Analysis was missing for this group, run it
-                # pass grouped as 'dict' to avoid mutable
-                newgrouped = copy.deepcopy(grouped)
+            if (
+                runautogroup
+                and options.incremental
+                and uptodate(filename, groups[target], digest=digest)
+            ):
+                # Saved analysis is current for the same sosreports
+                print(_("Results for group are current, skipping"))
+            elif runautogroup:
+                # Analysis was missing for this group, run it, domagui
+                # uses a view of grouped for the group so it's not modified
                 runmaguiandplugs(
                     sosreports=groups[target],
                     risuplugins=risuplugins,
                     filename=filename,
                     extranames=filenames,
                     anon=options.anon,
-                    grouped=newgrouped,
+                    grouped=grouped,
+                    planner=planner,
+                    digest=digest,
                 )
             else:
                 # Copy file instead of run as it was already existing
@@ -736,6 +873,9 @@ def main():
     del groups
     del processedgroups
 
+    # Save plugins found so other runs reuse them
+    risu.savecaches()
+
     print(_("\nFinished autogroup generation."))
 
 
@@ -8,21 +8,81 @@ from __future__ import print_function
 
 import logging
 import multiprocessing as mp
+import pickle
+import sys
+import traceback
 
 try:
-    from risuclient.executor import PluginExecutor
+    import queue
 except ImportError:
-    PluginExecutor = None
+    import Queue as queue
 
 LOG = logging.getLogger("magui")
 
 
+def split_cpus(jobs, cpus):
+    """
+    Splits a CPU budget between sosreports and plugins of each sosreport
+
+    :param jobs: Number of sosreports to analyze
+    :param cpus: Total number of processes to use
+    :return: (sosreports analyzed at once, plugin processes for each one)
+    """
+    cpus = max(1, cpus)
+    workers = max(1, min(jobs, cpus))
+    return workers, max(1, cpus // workers)
+
+
+def _context(risu_callable):
+    """
+    Gets multiprocessing context able to run risu_callable in workers
+
+    :param risu_callable: Function to call for each sosreport
+    :return: multiprocessing context or None if it can't run there
+    """
+    if not hasattr(mp, "get_context"):
+        # Python 2 always forks on the platforms we support
+        return mp if sys.platform != "win32" else None
+
+    if "fork" in mp.get_all_start_methods():
+        # Forked workers can run closures and bound methods as they are
+        return mp.get_context("fork")
+
+    try:
+        pickle.dumps(risu_callable)
+    except Exception:
+        return None
+    return mp.get_context()
+
+
+def _worker(tasks, results, risu_callable, args, kwargs):
+    """
+    Runs risu_callable for each sosreport in tasks until a None is found
+
+    Each worker is a process on its own, so the environment dorisu sets
+    for a sosreport (RISU_ROOT, RISU_TMP, facts...) never leaks into the
+    analysis of another one.
+
+    :param tasks: Queue of sosreports to analyze
+    :param results: Queue for (sosreport, result, error) tuples
+    :param risu_callable: Function to call for each sosreport
+    :param args: Additional positional arguments to pass
+    :param kwargs: Additional keyword arguments to pass
+    """
+    for sosreport in iter(tasks.get, None):
+        try:
+            results.put((sosreport, risu_callable(sosreport, *args, **kwargs), None))
+        except Exception:
+            results.put((sosreport, None, traceback.format_exc()))
+
+
 class ParallelRisuExecutor(object):
     """
     Execute risu against multiple sosreports in parallel.
 
-    Provides 4x speedup when analyzing 4+ sosreports by running
-    risu instances in parallel instead of sequentially.
+    Each sosreport is analyzed in its own worker process, and the
+    process budget is split between sosreports analyzed at once and
+    plugins run in parallel for each of them.
     """
 
     def __init__(self, num_processes=None):
@@ -40,36 +100,87 @@ class ParallelRisuExecutor(object):
         """
         Execute risu against multiple sosreports in parallel.
 
+        A 'numproc=None' keyword argument is replaced with the number of
+        plugin processes available for each sosreport.
+
         :param sosreports: List of sosreport paths
         :param risu_callable: Function to call for each sosreport
         :param args: Additional positional arguments to pass
         :param kwargs: Additional keyword arguments to pass
         :return: Dictionary of {sosreport: result}
         """
-        if PluginExecutor is None:
-            # Fallback to sequential execution if PluginExecutor not available
-            LOG.warning(
-                "PluginExecutor not available, falling back to sequential execution"
-            )
+        workers, numproc = split_cpus(len(sosreports), self.num_processes)
+        if "numproc" in kwargs and kwargs["numproc"] is None:
+            kwargs = dict(kwargs, numproc=numproc)
+
+        context = _context(risu_callable) if workers > 1 else None
+        if context is None:
+            if workers > 1:
+                LOG.warning(
+                    "Cannot run workers for %s, running sequentially", risu_callable
+                )
+                if "numproc" in kwargs:
+                    kwargs = dict(kwargs, numproc=self.num_processes)
             return self._execute_sequential(sosreports, risu_callable, *args, **kwargs)
 
-        # Use PluginExecutor for parallel execution
-        executor = PluginExecutor(num_processes=self.num_processes)
+        LOG.debug(
+            "Analyzing %s sosreports at once with %s plugin processes each",
+            workers,
+            numproc,
+        )
 
-        # Create wrapper that includes sosreport path in result
-        def wrapper(sosreport):
-            result = risu_callable(sosreport, *args, **kwargs)
-            return (sosreport, result)
+        tasks = context.Queue()
+        results = context.Queue()
+        for sosreport in sosreports:
+            tasks.put(sosreport)
+        for _ in range(workers):
+            tasks.put(None)
 
-        try:
-            results_list = executor.execute_plugins(sosreports, wrapper)
-        except AttributeError:
-            # Fallback if execute_plugins signature is different
-            LOG.warning("Falling back to sequential execution")
-            return self._execute_sequential(sosreports, risu_callable, *args, **kwargs)
+        processes = [
+            context.Process(
+                target=_worker, args=(tasks, results, risu_callable, args, kwargs)
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        result = {}
+        errors = {}
+        while len(result) + len(errors) < len(sosreports):
+            try:
+                sosreport, output, error = results.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    # Workers are gone, only what's already queued can arrive
+                    try:
+                        sosreport, output, error = results.get(timeout=1)
+                    except queue.Empty:
+                        break
+                else:
+                    continue
+
+            if error is None:
+                result[sosreport] = output
+            else:
+                errors[sosreport] = error
+
+        for process in processes:
+            process.join()
+
+        for sosreport in sosreports:
+            if sosreport not in result and sosreport not in errors:
+                errors[sosreport] = "Worker exited before finishing the analysis"
+
+        if errors:
+            raise RuntimeError(
+                "\n".join(
+                    "Failed to analyze %s: %s" % (sosreport, error)
+                    for sosreport, error in sorted(errors.items())
+                )
+            )
 
-        # Convert list of tuples to dict
-        return dict(results_list)
+        return result
 
     def _execute_sequential(self, sosreports, risu_callable, *args, **kwargs):
         """
@@ -101,9 +212,14 @@ def enable_parallel_execution(magui_client, num_processes=None):
     # Replace collect_risu_results with parallel version
     def parallel_collect_risu_results(sosreports, risuplugins):
         """Parallel version of collect_risu_results"""
+        kwargs = {"plugins": risuplugins}
+        if hasattr(magui_client, "numproc"):
+            # Share the process budget between sosreports and their plugins
+            kwargs["numproc"] = None
+
         # Use parallel execution
         results = executor.execute_parallel(
-            sosreports, magui_client.call_risu, plugins=risuplugins
+            sosreports, magui_client.call_risu, **kwargs
         )
 
         # Sanity check if not force run
@@ -13,6 +13,7 @@ _ = risu._
 
 extension = "faraday"
 pluginsdir = os.path.join(risu.risudir, "plugins", extension)
+digests = True
 
 
 def init():
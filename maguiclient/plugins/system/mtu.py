@@ -14,6 +14,7 @@ _ = risu._
 
 extension = "mtu"
 pluginsdir = os.path.join(risu.risudir, "plugins", extension)
+digests = True
 
 
 def init():
@@ -14,6 +14,7 @@ except:
 _ = risu._
 
 extension = "release"
+digests = True
 
 
 def init():
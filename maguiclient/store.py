@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Columnar storage of grouped results for Magui
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import array
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+# Return codes not fitting in the array, those are used as markers
+ABSENT = -32768
+OTHER = -32767
+
+
+class Result(dict):
+    """
+    Result of a plugin for a sosreport read from columns.
+
+    It's a dictionary, so it can be used and serialized as the results
+    stored in nested dictionaries, and it stores any change made to it
+    back in the columns it was read from. Copies are plain dictionaries.
+    """
+
+    def __init__(self, results, sosreport, values):
+        """
+        Initialize result.
+
+        :param results: SosreportResults the result was read from
+        :param sosreport: sosreport of the result
+        :param values: dict with rc, out and err
+        """
+        dict.__init__(self, values)
+        self._results = results
+        self._sosreport = sosreport
+
+    def _store(self):
+        """Writes result back to the columns"""
+        self._results[self._sosreport] = dict(self)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._store()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._store()
+
+    def clear(self):
+        dict.clear(self)
+        self._store()
+
+    def pop(self, *args):
+        value = dict.pop(self, *args)
+        self._store()
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._store()
+        return item
+
+    def setdefault(self, key, default=None):
+        value = dict.setdefault(self, key, default)
+        self._store()
+        return value
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._store()
+
+    def copy(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class SosreportResults(MutableMapping):
+    """
+    Results of one plugin for each sosreport stored in columns.
+
+    Return codes are kept in an array and out/err in lists, indexed by
+    the ordinal of the sosreport in a list shared by all plugins, so
+    each result takes a few bytes instead of a dictionary. Results read
+    are built on each read as Result dictionaries, which store changes
+    made to them back in the columns.
+    """
+
+    def __init__(self, names, ordinals, pool=None):
+        """
+        Initialize results.
+
+        :param names: list of sosreports shared by all plugins
+        :param ordinals: dict of {sosreport: position in names}
+        :param pool: dict used to share equal out/err strings
+        """
+        self._names = names
+        self._ordinals = ordinals
+        self._pool = {} if pool is None else pool
+        self._rc = array.array("h", [ABSENT]) * len(names)
+        self._out = [None] * len(names)
+        self._err = [None] * len(names)
+        self._others = {}
+
+    def _intern(self, value):
+        """
+        Gets shared copy of value
+
+        :param value: out or err of a result
+        :return: first equal value stored or value itself
+        """
+        try:
+            return self._pool.setdefault(value, value)
+        except TypeError:
+            return value
+
+    def _ordinal(self, sosreport):
+        """
+        Gets position of sosreport in columns, adding it if it's new
+
+        :param sosreport: sosreport name
+        :return: position in columns
+        """
+        if sosreport not in self._ordinals:
+            self._ordinals[sosreport] = len(self._names)
+            self._names.append(sosreport)
+
+        ordinal = self._ordinals[sosreport]
+        missing = ordinal + 1 - len(self._rc)
+        if missing > 0:
+            self._rc.extend([ABSENT] * missing)
+            self._out.extend([None] * missing)
+            self._err.extend([None] * missing)
+        return ordinal
+
+    def __contains__(self, sosreport):
+        ordinal = self._ordinals.get(sosreport)
+        return (
+            ordinal is not None
+            and ordinal < len(self._rc)
+            and (self._rc[ordinal] != ABSENT)
+        )
+
+    def __getitem__(self, sosreport):
+        if sosreport not in self:
+            raise KeyError(sosreport)
+
+        ordinal = self._ordinals[sosreport]
+        if self._rc[ordinal] == OTHER:
+            return self._others[ordinal]
+        return Result(
+            self,
+            sosreport,
+            {
+                "rc": self._rc[ordinal],
+                "out": self._out[ordinal],
+                "err": self._err[ordinal],
+            },
+        )
+
+    def __setitem__(self, sosreport, result):
+        ordinal = self._ordinal(sosreport)
+        self._others.pop(ordinal, None)
+
+        try:
+            rc, out, err = result["rc"], result["out"], result["err"]
+            columnar = len(result) == 3 and type(rc) is int and OTHER < rc <= 32767
+        except (KeyError, TypeError):
+            columnar = False
+
+        if columnar:
+            self._rc[ordinal] = rc
+            self._out[ordinal] = self._intern(out)
+            self._err[ordinal] = self._intern(err)
+        else:
+            # Keep results with other fields or return codes as they are
+            self._rc[ordinal] = OTHER
+            self._out[ordinal] = self._err[ordinal] = None
+            self._others[ordinal] = result
+
+    def __delitem__(self, sosreport):
+        if sosreport not in self:
+            raise KeyError(sosreport)
+
+        ordinal = self._ordinals[sosreport]
+        self._rc[ordinal] = ABSENT
+        self._out[ordinal] = self._err[ordinal] = None
+        self._others.pop(ordinal, None)
+
+    def __iter__(self):
+        return (
+            self._names[ordinal]
+            for ordinal in range(len(self._rc))
+            if self._rc[ordinal] != ABSENT
+        )
+
+    def __len__(self):
+        return len(self._rc) - self._rc.count(ABSENT)
+
+    def __repr__(self):
+        return "%s(%r)" % (
+            self.__class__.__name__,
+            dict((key, dict(value)) for key, value in self.items()),
+        )
+
+
+def group(sosreports, result):
+    """
+    Reorganize results from {sosreport: {plugin: result}} to
+    {plugin: {metadata, "sosreport": {sosreport: result}}}
+
+    Metadata of each plugin is stored once and results for all the
+    sosreports in columns (see SosreportResults).
+
+    :param sosreports: List of sosreport paths
+    :param result: Results dictionary
+    :return: Grouped dictionary
+    """
+    names = []
+    ordinals = {}
+    for sosreport in sosreports:
+        if sosreport not in ordinals:
+            ordinals[sosreport] = len(names)
+            names.append(sosreport)
+
+    pool = {}
+    grouped = {}
+    for sosreport in sosreports:
+        for plugin in result[sosreport]:
+            if plugin not in grouped:
+                grouped[plugin] = {
+                    "sosreport": SosreportResults(names, ordinals, pool=pool)
+                }
+            grouped[plugin]["sosreport"][sosreport] = result[sosreport][plugin][
+                "result"
+            ]
+
+    # Metadata is the same for all sosreports, keep the one from the last
+    # sosreport with the plugin without copying it again for the others
+    described = set()
+    for sosreport in reversed(sosreports):
+        for plugin in result[sosreport]:
+            if plugin in described:
+                continue
+            described.add(plugin)
+            for element in result[sosreport][plugin]:
+                # Some of the elements are not useful as they are sosreport specific, so we do skip them completely
+                # In this approach we don't need to update this code each time the plugin exports new metadata
+                if element not in ["time", "cputime", "result", "sosreport"]:
+                    grouped[plugin][element] = result[sosreport][plugin][element]
+
+    return grouped
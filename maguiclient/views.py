@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Copy-on-write views of grouped results for Magui
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import re
+
+try:
+    from collections.abc import Mapping, MutableMapping
+except ImportError:
+    from collections import Mapping, MutableMapping
+
+# Plugin ids are sha512 hexdigests, composed ones (faraday, node-problem-detector)
+# append the id of the file or rule checked to the id of the plugin
+IDLEN = 128
+PLUGINID = re.compile(r"^[0-9a-f]{%s}$" % IDLEN)
+
+
+def plain(value):
+    """
+    Converts views and other mappings inside value to regular dictionaries
+
+    Dictionaries and lists without anything to convert are returned as
+    they are, so only what was modified or filtered through a view gets
+    copied.
+
+    :param value: view, mapping, list or any other value
+    :return: value without views
+    """
+    if isinstance(value, CowDict):
+        return value.todict()
+    if isinstance(value, Mapping):
+        converted = dict((key, plain(item)) for key, item in value.items())
+        if isinstance(value, dict) and all(
+            converted[key] is value[key] for key in value
+        ):
+            return value
+        return converted
+    if isinstance(value, (list, tuple)):
+        converted = type(value)(plain(item) for item in value)
+        if all(new is old for new, old in zip(converted, value)):
+            return value
+        return converted
+    return value
+
+
+class CowDict(MutableMapping):
+    """
+    Dictionary view that shares data with its source until written.
+
+    Nested dictionaries are returned as views too, so writing any of
+    them only copies the dictionary being written and the source is
+    never modified.
+    """
+
+    def __init__(self, source, keys=None):
+        """
+        Initialize view.
+
+        :param source: dictionary (or view) to read from
+        :param keys: only keys of source to show (default: all)
+        """
+        self._source = source
+        self._keys = keys
+        self._own = None
+        self._views = {}
+
+    def _view(self, key, value):
+        """
+        Creates view for a nested dictionary
+
+        :param key: key of value in this view
+        :param value: nested dictionary
+        :return: view for value
+        """
+        return CowDict(value)
+
+    def _data(self):
+        """
+        Dictionary holding data for this view
+
+        :return: own copy if view was written or source
+        """
+        if self._own is not None:
+            return self._own
+        return self._source
+
+    def __contains__(self, key):
+        if self._own is not None:
+            return key in self._own
+        if self._keys is not None and key not in self._keys:
+            return False
+        return key in self._source
+
+    def __getitem__(self, key):
+        try:
+            return self._views[key]
+        except KeyError:
+            pass
+
+        if self._own is None and self._keys is not None and key not in self._keys:
+            raise KeyError(key)
+
+        value = self._data()[key]
+        if not isinstance(value, Mapping):
+            return value
+
+        view = self._views[key] = self._view(key, value)
+        return view
+
+    def __iter__(self):
+        if self._own is not None:
+            return iter(self._own)
+        if self._keys is None:
+            return iter(self._source)
+        return (key for key in self._source if key in self._keys)
+
+    def __len__(self):
+        if self._own is not None or self._keys is None:
+            return len(self._data())
+        return sum(1 for key in self)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.todict())
+
+    def _write(self):
+        """Copies visible data from source before first write"""
+        if self._own is None:
+            self._own = dict((key, self._source[key]) for key in self)
+
+    def __setitem__(self, key, value):
+        self._write()
+        self._own[key] = value
+        self._views.pop(key, None)
+
+    def __delitem__(self, key):
+        self._write()
+        del self._own[key]
+        self._views.pop(key, None)
+
+    @property
+    def changed(self):
+        """True if this view or any view below was written"""
+        return self._own is not None or any(
+            view.changed for view in self._views.values()
+        )
+
+    @property
+    def filtered(self):
+        """True if this view hides some of the data of its source"""
+        return self._keys is not None
+
+    def _filters(self, key):
+        """
+        Checks if view for a nested dictionary hides some of its data
+
+        :param key: key of nested dictionary in this view
+        :return: True if nested dictionary is filtered
+        """
+        return False
+
+    def todict(self):
+        """
+        Gets contents of the view as regular dictionaries
+
+        :return: source itself if it wasn't filtered nor written, new dict otherwise
+        """
+        if not self.changed and not self.filtered:
+            return plain(self._source)
+
+        data = self._data()
+        result = {}
+        for key in self:
+            if key in self._views:
+                value = self._views[key].todict()
+            elif isinstance(data[key], Mapping) and self._filters(key):
+                value = self[key].todict()
+            else:
+                value = plain(data[key])
+            result[key] = value
+        return result
+
+
+class PluginView(CowDict):
+    """View of the results of one plugin for some sosreports"""
+
+    def __init__(self, source, sosreports=None):
+        """
+        Initialize view.
+
+        :param source: grouped[plugin] dictionary
+        :param sosreports: sosreports to show (default: all)
+        """
+        super(PluginView, self).__init__(source)
+        self.sosreports = sosreports
+
+    @property
+    def filtered(self):
+        return self.sosreports is not None or self._keys is not None
+
+    def _filters(self, key):
+        return key == "sosreport" and self.sosreports is not None
+
+    def _view(self, key, value):
+        if key == "sosreport":
+            return CowDict(value, keys=self.sosreports)
+        return CowDict(value)
+
+
+class GroupedView(CowDict):
+    """
+    View of grouped[plugin]["sosreport"][sosreport] results for some sosreports.
+
+    Replaces copying grouped results and removing the sosreports not
+    analyzed from the copy: nothing is copied unless the view is written.
+    """
+
+    def __init__(self, grouped, sosreports=None):
+        """
+        Initialize view.
+
+        :param grouped: grouped results dictionary
+        :param sosreports: sosreports to show (default: all)
+        """
+        super(GroupedView, self).__init__(grouped)
+        self.sosreports = None if sosreports is None else set(sosreports)
+
+    @property
+    def filtered(self):
+        return self.sosreports is not None or self._keys is not None
+
+    def _filters(self, key):
+        return self.sosreports is not None
+
+    def _view(self, key, value):
+        return PluginView(value, self.sosreports)
+
+
+def idparts(pluginid):
+    """
+    Splits plugin id in the ids it's composed of
+
+    :param pluginid: plugin id, maybe composed as 'id-subid' or 'idsubid'
+    :return: generator of ids
+    """
+    for part in pluginid.split("-"):
+        for start in range(0, len(part), IDLEN):
+            yield part[start : start + IDLEN]
+
+
+class TriggerIndex(object):
+    """
+    Index of grouped results by the plugin ids magui plugins trigger on.
+
+    Built once for grouped results, it gets the data for the triggers
+    of each magui plugin looking up only the matching plugins.
+    """
+
+    def __init__(self, data):
+        """
+        Initialize index.
+
+        :param data: grouped results
+        """
+        self.data = data
+        self._ids = {}
+        for key in data:
+            if "id" in data[key]:
+                for pluginid in idparts(data[key]["id"]):
+                    self._ids.setdefault(pluginid, []).append(key)
+
+    def _matches(self, trigger):
+        """
+        Gets keys of plugins whose id contains trigger
+
+        :param trigger: plugin id or text to look for in ids
+        :return: list of keys in data
+        """
+        if PLUGINID.match(trigger):
+            return self._ids.get(trigger, [])
+
+        # Triggers not being an id can appear anywhere in ids
+        return [
+            key
+            for key in self.data
+            if "id" in self.data[key] and trigger in self.data[key]["id"]
+        ]
+
+    def select(self, triggers):
+        """
+        Gets data for plugins matching triggers
+
+        :param triggers: set of triggers (plugin ID's) to match
+        :return: view of data of only those plugins
+        """
+        if "*" in triggers:
+            return self.data
+
+        selected = {}
+        for trigger in triggers:
+            for key in self._matches(trigger):
+                selected[self.data[key]["id"]] = self.data[key]
+
+        # Plugins get a view so that they can't modify grouped results
+        return CowDict(selected)
@@ -11,13 +11,23 @@ This module provides caching for plugin metadata to avoid repeated
 file I/O and parsing. The cache uses file modification time to
 detect when plugins have changed.
 
+It also provides a persistent plugin index so plugin discovery does
+not need to hash and parse every plugin on each run, an in-process
+plugin registry to look up plugin id's by path filters, a cache of
+compiled plugin binaries and a cache of file hashes.
+
 Cache is stored using pickle for Python 2.7 compatibility.
 """
 
 from __future__ import print_function
 
+import bisect
+import hashlib
 import logging
 import os
+import shutil
+import stat
+import tempfile
 
 # Use pickle (works in Python 2.7 and 3.x)
 try:
@@ -69,11 +79,20 @@ class MetadataCache(object):
             cache_file = os.path.join(cache_dir, "metadata_cache.pkl")
 
         self.cache_file = cache_file
-        self._cache = {}
+        self._entries = None
         self._dirty = False
 
-        # Try to load existing cache
-        self._load()
+    @property
+    def _cache(self):
+        """In-memory cache dictionary, loaded from disk on first use."""
+        if self._entries is None:
+            self._entries = {}
+            self._load()
+        return self._entries
+
+    @_cache.setter
+    def _cache(self, value):
+        self._entries = value
 
     def _load(self):
         """
@@ -89,7 +108,7 @@ class MetadataCache(object):
             with open(self.cache_file, "rb") as f:
                 self._cache = pickle.load(f)
             LOG.debug("Loaded cache with %d entries", len(self._cache))
-        except (IOError, OSError, pickle.PickleError) as e:
+        except (IOError, OSError, EOFError, pickle.PickleError) as e:
             LOG.warning("Cannot load cache from %s: %s", self.cache_file, str(e))
             self._cache = {}
 
@@ -112,8 +131,9 @@ class MetadataCache(object):
             if cache_dir and not os.path.exists(cache_dir):
                 os.makedirs(cache_dir)
 
-            # Write cache atomically (write to temp file, then rename)
-            temp_file = self.cache_file + ".tmp"
+            # Write cache atomically (write to temp file, then rename), with
+            # a per process temp file as several risu may run at once
+            temp_file = "%s.%s.tmp" % (self.cache_file, os.getpid())
             with open(temp_file, "wb") as f:
                 pickle.dump(self._cache, f, protocol=2)  # Protocol 2 for Python 2.7
 
@@ -263,4 +283,781 @@ class MetadataCache(object):
     def __del__(self):
         """Save cache on object destruction."""
         if self._dirty:
-            self.save()
+            try:
+                self.save()
+            except Exception:
+                # Interpreter may be already shutting down
+                pass
+
+
+class PluginIndex(object):
+    """
+    Persistent index of discovered plugins.
+
+    Avoids hashing and parsing every plugin on each run: entries are
+    reused while the file keeps the same (size, mtime_ns, inode) and
+    directory listings are reused while the directory mtime is the same.
+
+    The index is stored as a dictionary:
+        {
+            "version": INDEX_VERSION,
+            "plugins": {(key, plugin_path): (signature, plugin_dict)},
+            "folders": {folder_path: (mtime_ns, dirs, files)},
+        }
+
+    Attributes:
+        index_file (str): Path to index file
+        _plugins (dict): In-memory plugin entries
+        _folders (dict): In-memory directory listings
+        _dirty (bool): True if index has unsaved changes
+    """
+
+    # Bump when the content of the stored plugin dictionaries changes
+    INDEX_VERSION = 2
+
+    # Oldest plugins and folder listings are dropped beyond this
+    MAX_ENTRIES = 20000
+
+    def __init__(self, index_file=None):
+        """
+        Initialize plugin index.
+
+        Args:
+            index_file (str, optional): Path to index file. If None,
+                                       uses ~/.risu/plugin_index.pkl
+        """
+        if index_file is None:
+            home = os.path.expanduser("~")
+            index_file = os.path.join(home, ".risu", "plugin_index.pkl")
+
+        self.index_file = index_file
+        self._entries = None
+        self._listings = None
+        self._dirty = False
+
+    def _loaded(self):
+        """Load index from disk on first use."""
+        if self._entries is None:
+            self._entries = {}
+            self._listings = {}
+            self._load()
+
+    @property
+    def _plugins(self):
+        """In-memory plugin entries."""
+        self._loaded()
+        return self._entries
+
+    @_plugins.setter
+    def _plugins(self, value):
+        self._entries = value
+
+    @property
+    def _folders(self):
+        """In-memory directory listings."""
+        self._loaded()
+        return self._listings
+
+    @_folders.setter
+    def _folders(self, value):
+        self._listings = value
+
+    def _load(self):
+        """
+        Load index from disk.
+
+        Silently starts empty if file doesn't exist, is corrupted or
+        was written by a different index version.
+        """
+        if not os.path.exists(self.index_file):
+            LOG.debug("Index file does not exist: %s", self.index_file)
+            return
+
+        try:
+            with open(self.index_file, "rb") as f:
+                data = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.PickleError) as e:
+            LOG.warning("Cannot load index from %s: %s", self.index_file, str(e))
+            return
+
+        try:
+            if data["version"] != self.INDEX_VERSION:
+                LOG.debug("Discarding index with version %s", data["version"])
+                return
+            self._plugins = data["plugins"]
+            self._folders = data["folders"]
+        except (KeyError, TypeError):
+            self._plugins = {}
+            self._folders = {}
+            return
+
+        LOG.debug("Loaded index with %d plugins", len(self._plugins))
+
+    def save(self):
+        """
+        Save index to disk if modified.
+
+        Returns:
+            bool: True if saved successfully, False otherwise
+        """
+        if not self._dirty:
+            return True
+
+        # Entries are kept in insertion order, drop the oldest ones
+        if len(self._plugins) > self.MAX_ENTRIES:
+            self._plugins = dict(list(self._plugins.items())[-self.MAX_ENTRIES :])
+        if len(self._folders) > self.MAX_ENTRIES:
+            self._folders = dict(list(self._folders.items())[-self.MAX_ENTRIES :])
+
+        data = {
+            "version": self.INDEX_VERSION,
+            "plugins": self._plugins,
+            "folders": self._folders,
+        }
+
+        try:
+            index_dir = os.path.dirname(self.index_file)
+            if index_dir and not os.path.exists(index_dir):
+                os.makedirs(index_dir)
+
+            # Per process temp file as several risu may run at once
+            temp_file = "%s.%s.tmp" % (self.index_file, os.getpid())
+            with open(temp_file, "wb") as f:
+                pickle.dump(data, f, protocol=2)
+
+            os.rename(temp_file, self.index_file)
+
+            self._dirty = False
+            LOG.debug("Saved index with %d plugins", len(self._plugins))
+            return True
+
+        except (IOError, OSError, pickle.PickleError) as e:
+            LOG.warning("Cannot save index to %s: %s", self.index_file, str(e))
+            return False
+
+    @staticmethod
+    def signature(path):
+        """
+        Get signature used to detect changes on a file.
+
+        Args:
+            path (str): Path to file
+
+        Returns:
+            tuple or None: (size, mtime_ns, inode) or None if not accessible
+        """
+        try:
+            st = os.stat(path)
+        except (IOError, OSError):
+            return None
+
+        return st.st_size, getattr(st, "st_mtime_ns", st.st_mtime), st.st_ino
+
+    def listdir(self, folder):
+        """
+        List folder reusing stored listing if folder has not changed.
+
+        Args:
+            folder (str): Folder to list
+
+        Returns:
+            tuple: (dirs, files) lists of names, empty if not accessible
+        """
+        try:
+            st = os.stat(folder)
+        except (IOError, OSError):
+            return [], []
+
+        mtime = getattr(st, "st_mtime_ns", st.st_mtime)
+
+        cached = self._folders.get(folder)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        dirs = []
+        files = []
+        try:
+            names = os.listdir(folder)
+        except (IOError, OSError):
+            return [], []
+
+        for name in names:
+            if os.path.isdir(os.path.join(folder, name)):
+                dirs.append(name)
+            else:
+                files.append(name)
+
+        # Listings refreshed are moved last so they're the last dropped
+        self._folders.pop(folder, None)
+        self._folders[folder] = (mtime, dirs, files)
+        self._dirty = True
+        return dirs, files
+
+    def walk(self, folder, followlinks=True):
+        """
+        Walk folder tree like os.walk using stored listings.
+
+        Args:
+            folder (str): Top folder
+            followlinks (bool): Descend into symlinked folders
+
+        Yields:
+            tuple: (root, dirs, files) as os.walk does
+        """
+        dirs, files = self.listdir(folder)
+        if not dirs and not files and not os.path.isdir(folder):
+            return
+
+        yield folder, dirs, files
+
+        for name in dirs:
+            path = os.path.join(folder, name)
+            if followlinks or not os.path.islink(path):
+                for item in self.walk(path, followlinks=followlinks):
+                    yield item
+
+    def get(self, plugin_path, key=None):
+        """
+        Get indexed plugin dictionary if file has not changed.
+
+        Args:
+            plugin_path (str): Path to plugin file
+            key (hashable, optional): Discriminator for the same file
+                                      found by different extensions
+
+        Returns:
+            dict or None: Copy of the stored dictionary or None
+        """
+        cached = self._plugins.get((key, plugin_path))
+        if not cached:
+            return None
+
+        if cached[0] != self.signature(plugin_path):
+            del self._plugins[(key, plugin_path)]
+            self._dirty = True
+            return None
+
+        return dict(cached[1])
+
+    def set(self, plugin_path, plugin, key=None):
+        """
+        Store plugin dictionary in the index.
+
+        Args:
+            plugin_path (str): Path to plugin file
+            plugin (dict): Plugin dictionary to store
+            key (hashable, optional): Discriminator for the same file
+                                      found by different extensions
+
+        Returns:
+            bool: True if stored
+        """
+        signature = self.signature(plugin_path)
+        if signature is None:
+            return False
+
+        self._plugins.pop((key, plugin_path), None)
+        self._plugins[(key, plugin_path)] = (signature, dict(plugin))
+        self._dirty = True
+        return True
+
+    def cleanup(self):
+        """
+        Remove entries for files and folders that no longer exist.
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        for entry in list(self._plugins):
+            if not os.path.isfile(entry[1]):
+                del self._plugins[entry]
+                removed += 1
+
+        for folder in list(self._folders):
+            if not os.path.isdir(folder):
+                del self._folders[folder]
+                removed += 1
+
+        if removed > 0:
+            self._dirty = True
+
+        return removed
+
+    def __len__(self):
+        """Return number of indexed plugins."""
+        return len(self._plugins)
+
+
+class PluginRegistry(object):
+    """
+    In-process registry of plugins for id lookups by path filters.
+
+    Built once from a list of plugin dictionaries, it keeps a sorted
+    list of paths for prefix queries and a trigram index for substring
+    queries, so lookups only verify the candidate plugins instead of
+    walking the whole plugin tree. Indexes are built on first lookup.
+
+    Attributes:
+        plugins (list): Plugin dictionaries in registry order
+        _paths (list): Sorted (path, position) tuples
+        _common (str): Prefix shared by all paths, not indexed
+        _trigrams (dict): trigram: set of positions whose path contains it
+        _queries (dict): Memoized filter results
+    """
+
+    TRIGRAM = 3
+
+    def __init__(self, plugins):
+        """
+        Initialize plugin registry.
+
+        Args:
+            plugins (iterable): Plugin dictionaries with 'plugin' and 'id'
+        """
+        self.plugins = list(plugins)
+        self._paths = None
+        self._common = ""
+        self._trigrams = None
+        self._queries = {}
+
+    def _index(self):
+        """Build path indexes on first lookup."""
+        if self._trigrams is not None:
+            return
+
+        self._paths = sorted(
+            (plugin["plugin"], position) for position, plugin in enumerate(self.plugins)
+        )
+        # All plugins share the path up to the plugins folder: a trigram
+        # there selects every plugin so only the rest of the path is indexed
+        self._common = os.path.commonprefix([path for path, position in self._paths])
+        skip = max(len(self._common) - self.TRIGRAM + 1, 0)
+
+        self._trigrams = {}
+        for position, plugin in enumerate(self.plugins):
+            path = plugin["plugin"]
+            for trigram in set(
+                path[start : start + self.TRIGRAM]
+                for start in range(skip, len(path) - self.TRIGRAM + 1)
+            ):
+                self._trigrams.setdefault(trigram, set()).add(position)
+
+    def prefix(self, prefix):
+        """
+        Get positions of plugins whose path starts with prefix.
+
+        Args:
+            prefix (str): Start of plugin path
+
+        Returns:
+            set: positions of matching plugins
+        """
+        self._index()
+        start = bisect.bisect_left(self._paths, (prefix,))
+        found = set()
+        for path, position in self._paths[start:]:
+            if not path.startswith(prefix):
+                break
+            found.add(position)
+        return found
+
+    def substring(self, text):
+        """
+        Get positions of plugins whose path contains text.
+
+        Args:
+            text (str): Text to look for in plugin path
+
+        Returns:
+            set: positions of matching plugins
+        """
+        self._index()
+        candidates = None
+        for start in range(len(text) - self.TRIGRAM + 1):
+            trigram = text[start : start + self.TRIGRAM]
+            if trigram in self._common:
+                # Every path contains it, so it doesn't narrow the search
+                continue
+            positions = self._trigrams.get(trigram)
+            if not positions:
+                return set()
+            if candidates is None:
+                candidates = set(positions)
+            else:
+                candidates &= positions
+            if not candidates:
+                return set()
+
+        if candidates is None:
+            candidates = range(len(self.plugins))
+
+        return set(
+            position
+            for position in candidates
+            if text in self.plugins[position]["plugin"]
+        )
+
+    def filter(self, include=None, exclude=None):
+        """
+        Get plugins matching include/exclude filters.
+
+        Args:
+            include (list, optional): Substrings, any of them must be in path
+            exclude (list, optional): Substrings, none of them can be in path
+
+        Returns:
+            list: plugin dictionaries in registry order
+        """
+        query = (tuple(include or []), tuple(exclude or []))
+        if query not in self._queries:
+            if include:
+                positions = set()
+                for text in include:
+                    positions |= self.substring(text)
+            else:
+                positions = set(range(len(self.plugins)))
+
+            for text in exclude or []:
+                positions -= self.substring(text)
+
+            self._queries[query] = sorted(positions)
+
+        return [self.plugins[position] for position in self._queries[query]]
+
+    def getids(self, include=None, exclude=None):
+        """
+        Get id's of plugins matching include/exclude filters.
+
+        Args:
+            include (list, optional): Substrings, any of them must be in path
+            exclude (list, optional): Substrings, none of them can be in path
+
+        Returns:
+            list: plugin id's in registry order
+        """
+        return [plugin["id"] for plugin in self.filter(include, exclude)]
+
+    def __len__(self):
+        """Return number of registered plugins."""
+        return len(self.plugins)
+
+
+class BuildCache(object):
+    """
+    Content-addressed cache of compiled plugin binaries.
+
+    Binaries are stored as <cache_dir>/<key>/<name>, where key is the
+    sha512 of the plugin source hash and the toolchain version, so they
+    are reused until the source or the compiler changes, and never
+    written next to the plugin sources. Folders are touched when their
+    binary is used, and the least recently used ones are removed once
+    there are more than MAX_ENTRIES.
+
+    Attributes:
+        cache_dir (str): Folder holding the binaries
+    """
+
+    # Least recently used binaries are dropped beyond this
+    MAX_ENTRIES = 200
+
+    def __init__(self, cache_dir=None):
+        """
+        Initialize build cache.
+
+        Args:
+            cache_dir (str, optional): Folder for binaries. If None,
+                                       uses ~/.risu/build
+        """
+        if cache_dir is None:
+            home = os.path.expanduser("~")
+            cache_dir = os.path.join(home, ".risu", "build")
+
+        self.cache_dir = cache_dir
+
+    def path(self, source_hash, toolchain, name):
+        """
+        Get path of the binary for a source and toolchain.
+
+        Args:
+            source_hash (str): Hash of the plugin source
+            toolchain (str): Compiler version
+            name (str): Binary name
+
+        Returns:
+            str: Path to binary, which may not exist yet
+        """
+        key = hashlib.sha512(
+            ("%s:%s" % (source_hash, toolchain)).encode("UTF-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key, name)
+
+    def get(self, source_hash, toolchain, name):
+        """
+        Get cached binary.
+
+        Args:
+            source_hash (str): Hash of the plugin source
+            toolchain (str): Compiler version
+            name (str): Binary name
+
+        Returns:
+            str or None: Path to binary or None if not built yet
+        """
+        binary = self.path(source_hash, toolchain, name)
+        if not os.access(binary, os.X_OK):
+            return None
+
+        # Keep track of use so binaries still needed are not pruned
+        try:
+            os.utime(os.path.dirname(binary), None)
+        except OSError:
+            pass
+        return binary
+
+    def prune(self):
+        """
+        Remove least recently used binaries beyond MAX_ENTRIES.
+
+        Returns:
+            int: Number of binaries removed
+        """
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return 0
+
+        if len(names) <= self.MAX_ENTRIES:
+            return 0
+
+        folders = []
+        for name in names:
+            folder = os.path.join(self.cache_dir, name)
+            try:
+                folders.append((os.stat(folder).st_mtime, folder))
+            except OSError:
+                continue
+
+        folders.sort()
+        removed = folders[: max(len(folders) - self.MAX_ENTRIES, 0)]
+        for mtime, folder in removed:
+            shutil.rmtree(folder, ignore_errors=True)
+        return len(removed)
+
+    def build(self, source_hash, toolchain, name, builder):
+        """
+        Get cached binary, building it when missing.
+
+        The binary is built into a temporary file that is renamed when
+        done, so concurrent builds never expose a partial binary.
+
+        Args:
+            source_hash (str): Hash of the plugin source
+            toolchain (str): Compiler version
+            name (str): Binary name
+            builder (callable): Called with output path, returns True
+                                if the binary was built
+
+        Returns:
+            str or None: Path to binary or None if it could not be built
+        """
+        binary = self.get(source_hash, toolchain, name)
+        if binary is not None:
+            return binary
+
+        binary = self.path(source_hash, toolchain, name)
+        folder = os.path.dirname(binary)
+        try:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+        except OSError:
+            # Created by a concurrent build
+            if not os.path.isdir(folder):
+                LOG.warning("Cannot create build folder %s", folder)
+                return None
+
+        fd, output = tempfile.mkstemp(dir=folder, prefix=".%s." % name)
+        os.close(fd)
+        try:
+            if not builder(output):
+                return None
+            os.chmod(output, 0o755)
+            os.rename(output, binary)
+        except (IOError, OSError) as e:
+            LOG.warning("Cannot store binary %s: %s", binary, str(e))
+            return None
+        finally:
+            if os.path.exists(output):
+                os.remove(output)
+
+        self.prune()
+        return binary
+
+
+class HashCache(object):
+    """
+    Persistent cache of file hashes.
+
+    Files are identified by (dev, inode, size, mtime_ns, ctime_ns), so a
+    file is only hashed again when it changes, whatever the path used to
+    reach it. The ctime can't be restored when extracting a sosreport,
+    so a new file reusing the inode of a deleted one with the same size
+    and mtime is hashed again. Several risu processes (like the ones magui runs for each
+    sosreport) share the cache file, as entries are merged on save.
+
+    The cache is stored as a dictionary:
+        {
+            "version": CACHE_VERSION,
+            "hashes": {(dev, inode, size, mtime_ns, ctime_ns): hexdigest},
+        }
+
+    Attributes:
+        cache_file (str): Path to cache file
+        _hashes (dict): In-memory entries, loaded on first use
+        _new (dict): Entries not saved yet
+    """
+
+    # Bump when the hashing algorithm or the key of the files change
+    CACHE_VERSION = 2
+
+    # Oldest entries are dropped beyond this
+    MAX_ENTRIES = 20000
+
+    def __init__(self, cache_file=None):
+        """
+        Initialize hash cache.
+
+        Args:
+            cache_file (str, optional): Path to cache file. If None,
+                                       uses ~/.risu/hash_cache.pkl
+        """
+        if cache_file is None:
+            home = os.path.expanduser("~")
+            cache_file = os.path.join(home, ".risu", "hash_cache.pkl")
+
+        self.cache_file = cache_file
+        self._hashes = None
+        self._new = {}
+
+    def _load(self):
+        """
+        Load entries from disk.
+
+        Returns:
+            dict: entries stored, empty if file doesn't exist, is
+                  corrupted or was written by a different version
+        """
+        if not os.path.exists(self.cache_file):
+            return {}
+
+        try:
+            with open(self.cache_file, "rb") as f:
+                data = pickle.load(f)
+            if data["version"] != self.CACHE_VERSION:
+                LOG.debug("Discarding hash cache with version %s", data["version"])
+                return {}
+            return dict(data["hashes"])
+        except (IOError, OSError, EOFError, pickle.PickleError) as e:
+            LOG.warning("Cannot load hash cache from %s: %s", self.cache_file, str(e))
+        except (KeyError, TypeError, ValueError):
+            pass
+        return {}
+
+    @staticmethod
+    def signature(path):
+        """
+        Get key identifying the contents of a file.
+
+        Args:
+            path (str): Path to file
+
+        Returns:
+            tuple or None: (dev, inode, size, mtime_ns, ctime_ns) or None
+                           if not accessible or not a regular file
+        """
+        try:
+            st = os.stat(path)
+        except (IOError, OSError):
+            return None
+
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        return (
+            st.st_dev,
+            st.st_ino,
+            st.st_size,
+            getattr(st, "st_mtime_ns", st.st_mtime),
+            getattr(st, "st_ctime_ns", st.st_ctime),
+        )
+
+    def hash(self, path, function):
+        """
+        Get hash of a file, calculating it only if not cached.
+
+        Args:
+            path (str): Path to file
+            function (callable): Called with path to calculate the hash
+
+        Returns:
+            str: hash of the file
+        """
+        key = self.signature(path)
+        if key is None:
+            return function(path)
+
+        if self._hashes is None:
+            self._hashes = self._load()
+
+        try:
+            return self._hashes[key]
+        except KeyError:
+            pass
+
+        digest = function(path)
+        self._hashes[key] = self._new[key] = digest
+        return digest
+
+    def save(self):
+        """
+        Save new entries to disk, merged with the ones already there.
+
+        Returns:
+            bool: True if saved successfully, False otherwise
+        """
+        if not self._new:
+            return True
+
+        hashes = self._load()
+        hashes.update(self._new)
+        if len(hashes) > self.MAX_ENTRIES:
+            # Entries are kept in insertion order, drop the oldest ones
+            hashes = dict(list(hashes.items())[-self.MAX_ENTRIES :])
+
+        data = {"version": self.CACHE_VERSION, "hashes": hashes}
+
+        try:
+            cache_dir = os.path.dirname(self.cache_file)
+            if cache_dir and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+
+            # Per process temp file as several risu may run at once
+            temp_file = "%s.%s.tmp" % (self.cache_file, os.getpid())
+            with open(temp_file, "wb") as f:
+                pickle.dump(data, f, protocol=2)
+
+            os.rename(temp_file, self.cache_file)
+
+            self._new = {}
+            LOG.debug("Saved hash cache with %d entries", len(hashes))
+            return True
+
+        except (IOError, OSError, pickle.PickleError) as e:
+            LOG.warning("Cannot save hash cache to %s: %s", self.cache_file, str(e))
+            return False
+
+    def __len__(self):
+        """Return number of entries in memory."""
+        if self._hashes is None:
+            self._hashes = self._load()
+        return len(self._hashes)
@@ -16,6 +16,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+# Facts precomputed by risu (RISU_FACT_*) are only valid for the environment
+# they were computed for, helpers compute them again otherwise
+if [[ ${RISU_FACTS_KEY} != "${RISU_ROOT}:${RISU_LIVE}:${RISU_TMP}" ]]; then
+	unset $(compgen -v RISU_FACT_) RISU_FACTS_KEY
+fi
+
 # Load all common functions defined in common.d
 
 for file in $(find ${RISU_BASE}/common.d -maxdepth 1 -type f -name '*.sh' | sort -n); do
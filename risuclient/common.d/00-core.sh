@@ -45,13 +45,21 @@ if [ "x$RISU_LIVE" = "x0" ]; then
 
 	systemctl_list_units_service_running=("${RISU_ROOT}/sos_commands/systemd/systemctl_list-units" "${RISU_ROOT}/sos_commands/systemd/systemctl_list-units_--all")
 
-	# find available one and use it, the ones at back with highest priority
-	systemctl_list_units_active_file=$(first_file_available "${systemctl_list_units_active[@]}")
-	systemctl_list_units_enabled_file=$(first_file_available "${systemctl_list_units_enabled[@]}")
-	systemctl_list_units_service_running_file=$(first_file_available "${systemctl_list_units_service_running[@]}")
+	if [[ -n ${RISU_FACT_JOURNAL+x} ]]; then
+		# Already located by risu for this sosreport
+		systemctl_list_units_active_file=${RISU_FACT_SYSTEMCTL_ACTIVE}
+		systemctl_list_units_enabled_file=${RISU_FACT_SYSTEMCTL_ENABLED}
+		systemctl_list_units_service_running_file=${RISU_FACT_SYSTEMCTL_RUNNING}
+		journalctl_file=${RISU_FACT_JOURNAL}
+	else
+		# find available one and use it, the ones at back with highest priority
+		systemctl_list_units_active_file=$(first_file_available "${systemctl_list_units_active[@]}")
+		systemctl_list_units_enabled_file=$(first_file_available "${systemctl_list_units_enabled[@]}")
+		systemctl_list_units_service_running_file=$(first_file_available "${systemctl_list_units_service_running[@]}")
 
-	# List of logs/journalctl files
-	journalctl_file=$(first_file_available "${RISU_ROOT}/sos_commands/logs/journalctl_--no-pager_--boot" "${RISU_ROOT}/sos_commands/logs/journalctl_--all_--this-boot_--no-pager")
+		# List of logs/journalctl files
+		journalctl_file=$(first_file_available "${RISU_ROOT}/sos_commands/logs/journalctl_--no-pager_--boot" "${RISU_ROOT}/sos_commands/logs/journalctl_--all_--this-boot_--no-pager")
+	fi
 
 else
 	journalctl_file="${RISU_TMP}/journalctl_--no-pager_--boot"
@@ -191,6 +199,10 @@ is_lineinfile() {
 }
 
 discover_rhrelease() {
+	if [[ -n ${RISU_FACT_RHRELEASE+x} ]]; then
+		echo "${RISU_FACT_RHRELEASE}"
+		return
+	fi
 	FILE="${RISU_ROOT}/etc/redhat-release"
 	if [[ ! -f ${FILE} ]]; then
 		echo 0
@@ -210,6 +222,10 @@ discover_rhrelease() {
 }
 
 discover_release() {
+	if [[ -n ${RISU_FACT_RELEASE+x} ]]; then
+		echo "${RISU_FACT_RELEASE}"
+		return
+	fi
 	FILE="${RISU_ROOT}/etc/os-release"
 	if [[ ! -f ${FILE} ]]; then
 		echo 0
@@ -220,6 +236,10 @@ discover_release() {
 }
 
 discover_osbrand() {
+	if [[ -n ${RISU_FACT_OSBRAND+x} ]]; then
+		echo "${RISU_FACT_OSBRAND}"
+		return
+	fi
 	FILE="${RISU_ROOT}/etc/os-release"
 	if [[ ! -f ${FILE} ]]; then
 		echo 0
@@ -231,6 +251,10 @@ discover_osbrand() {
 
 # We do check on ID_LIKE so we can discard between dpkg or rpm access
 discover_os() {
+	if [[ -n ${RISU_FACT_OS+x} ]]; then
+		echo "${RISU_FACT_OS}"
+		return
+	fi
 	FILE="${RISU_ROOT}/etc/os-release"
 	if [[ -f ${FILE} ]]; then
 		if is_lineinfile ^ID_LIKE ${FILE}; then
@@ -18,6 +18,61 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+# Seconds since epoch of dates already converted by this plugin
+declare -gA __RISU_EPOCHS
+
+date_to_epoch() {
+	# $1 date
+	# Sets DATE_EPOCH to seconds since epoch for date $1, converting each
+	# date only once. 'now' is the time risu started analyzing the sosreport
+
+	if [[ $1 == "now" && -n ${RISU_FACT_NOW+x} ]]; then
+		DATE_EPOCH=${RISU_FACT_NOW}
+		return 0
+	fi
+
+	# Keys can't be empty
+	local key="x$1"
+	if [[ -z ${__RISU_EPOCHS[${key}]+x} ]]; then
+		local epoch
+		epoch="$(date -d "$1" "+%s" 2>/dev/null)"
+		if [[ $? == "1" ]]; then
+			# failure when converting date, happened with one specific TZ, so let's approx by removing TZ
+			epoch=$(date -d "$(echo "$1" | awk '{print $1" "$2" "$3" "$4" "$6}')" "+%s")
+		fi
+		__RISU_EPOCHS[${key}]=${epoch}
+	fi
+	DATE_EPOCH=${__RISU_EPOCHS[${key}]}
+}
+
+dates_to_epoch() {
+	# $@ dates
+	# Converts all dates with a single date call, so that date_to_epoch
+	# doesn't need to run it for each of them when called in a loop
+
+	local dates=()
+	local epochs=()
+	local date
+	local i
+	for date in "$@"; do
+		if [[ -n ${date} && ${date} != "now" && ${date} != *$'\n'* && -z ${__RISU_EPOCHS["x${date}"]+x} ]]; then
+			dates+=("${date}")
+		fi
+	done
+	if [[ ${#dates[@]} -eq 0 ]]; then
+		return 0
+	fi
+
+	mapfile -t epochs < <(printf '%s\n' "${dates[@]}" | date -f - "+%s" 2>/dev/null)
+
+	# Dates that can't be converted give no output, leave them all to date_to_epoch
+	if [[ ${#epochs[@]} -eq ${#dates[@]} ]]; then
+		for i in "${!dates[@]}"; do
+			__RISU_EPOCHS["x${dates[${i}]}"]=${epochs[${i}]}
+		done
+	fi
+}
+
 are_dates_diff_over() {
 	# $1 days of difference
 	# $2 date 1
@@ -27,17 +82,11 @@ are_dates_diff_over() {
 	date1="$2"
 	date2="$3"
 
-	EPOCH1="$(date -d "$date1" "+%s" 2>/dev/null)"
-	if [[ $? == "1" ]]; then
-		# failure when converting date, happened with one specific TZ, so let's approx by removing TZ
-		EPOCH1=$(date -d "$(echo "$date1" | awk '{print $1" "$2" "$3" "$4" "$6}')" "+%s")
-	fi
+	date_to_epoch "${date1}"
+	EPOCH1=${DATE_EPOCH}
 
-	EPOCH2="$(date -d "$date2" "+%s" 2>/dev/null)"
-	if [[ $? == "1" ]]; then
-		# failure when converting date, happened with one specific TZ, so let's approx by removing TZ
-		EPOCH2=$(date -d "$(echo "$date2" | awk '{print $1" "$2" "$3" "$4" "$6}')" "+%s")
-	fi
+	date_to_epoch "${date2}"
+	EPOCH2=${DATE_EPOCH}
 
 	if [[ ${EPOCH1} -gt ${EPOCH2} ]]; then
 		DIFF="$((EPOCH1 - EPOCH2))"
@@ -58,19 +107,13 @@ is_date_over_today() {
 	# $2 date to check against today
 
 	date1="$2"
-	date2="$(LANG=C LC_ALL=C date)"
+	date2="now"
 
-	EPOCH1="$(date -d "$date1" "+%s" 2>/dev/null)"
-	if [[ $? == "1" ]]; then
-		# failure when converting date, happened with one specific TZ, so let's approx by removing TZ
-		EPOCH1=$(date -d "$(echo "$date1" | awk '{print $1" "$2" "$3" "$4" "$6}')" "+%s")
-	fi
+	date_to_epoch "${date1}"
+	EPOCH1=${DATE_EPOCH}
 
-	EPOCH2="$(date -d "$date2" "+%s" 2>/dev/null)"
-	if [[ $? == "1" ]]; then
-		# failure when converting date, happened with one specific TZ, so let's approx by removing TZ
-		EPOCH2=$(date -d "$(echo "$date2" | awk '{print $1" "$2" "$3" "$4" "$6}')" "+%s")
-	fi
+	date_to_epoch "${date2}"
+	EPOCH2=${DATE_EPOCH}
 
 	if [[ ${EPOCH1} -gt ${EPOCH2} ]]; then
 		return 1
@@ -18,7 +18,9 @@
 
 is_dpkg() {
 	PACKAGE=$1
-	if [ "x$RISU_LIVE" = "x1" ]; then
+	if pkg_index DPKG "$1"; then
+		[[ ${#PKG_INDEX[@]} -gt 0 ]] && printf "%s\n" "${PKG_INDEX[@]:1}"
+	elif [ "x$RISU_LIVE" = "x1" ]; then
 		dpkg -l *$1* 2>&1 | grep -v 'no packages found matching' | grep -E ^ii | awk -v PACKAGE=${PACKAGE} '$2==PACKAGE {print $3}' | grep -E "."
 	elif [ "x$RISU_LIVE" = "x0" ]; then
 		is_required_file "${RISU_ROOT}/installed-debs"
@@ -17,7 +17,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 is_rpm() {
-	if [ "x$RISU_LIVE" = "x1" ]; then
+	if pkg_index RPM "$1"; then
+		[[ ${#PKG_INDEX[@]} -gt 0 ]] && printf "%s\n" "${PKG_INDEX[@]:1}"
+	elif [[ -n ${RISU_FACT_RPMS+x} ]]; then
+		# Package list already extracted by risu
+		grep -E ^"$1"-[0-9] "${RISU_FACT_RPMS}"
+	elif [ "x$RISU_LIVE" = "x1" ]; then
 		rpm -qa *$1* | grep -E ^"$1"-[0-9]
 	elif [ "x$RISU_LIVE" = "x0" ]; then
 		is_required_file "${RISU_ROOT}/installed-rpms"
@@ -17,8 +17,36 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+pkg_index() {
+	# Reads entry for package $2 from index $1 (RPM or DPKG) built by risu
+	# into PKG_INDEX: latest version first, then all installed ones
+	# returns 1 if there's no index or package name $2 is not a plain name
+	local index="RISU_FACT_$1_INDEX"
+	if [[ -z ${!index} ]] || ! [[ $2 =~ ^[[:alnum:]_-]+$ ]]; then
+		return 1
+	fi
+	PKG_INDEX=()
+	if [[ -f "${!index}/$2" ]]; then
+		mapfile -t PKG_INDEX <"${!index}/$2"
+	fi
+}
+
+pkg_version() {
+	# Sets VERSION to the latest installed version of package $1
+	local backend
+	case ${RISU_FACT_OS-$(discover_os)} in
+	fedora) backend=RPM ;;
+	debian) backend=DPKG ;;
+	esac
+	if [[ -n ${backend} ]] && pkg_index ${backend} "$1"; then
+		VERSION=${PKG_INDEX[0]}
+	else
+		VERSION=$(is_pkg $1 | sort -V | tail -1)
+	fi
+}
+
 is_pkg() {
-	OSVERSION=$(discover_os)
+	OSVERSION=${RISU_FACT_OS-$(discover_os)}
 	if [ "${OSVERSION}" = "fedora" ]; then
 		is_rpm $*
 	elif [ "${OSVERSION}" = "debian" ]; then
@@ -35,13 +63,13 @@ is_required_pkg() {
 
 is_pkg_over() {
 	is_required_pkg $1
-	VERSION=$(is_pkg $1 | sort -V | tail -1)
-	LATEST=$(echo ${VERSION} $2 | tr " " "\n" | sort -V | tail -1)
-
-	if [ "$(echo ${VERSION} $2 | tr " " "\n" | sort -V | uniq | wc -l)" == "1" ]; then
-		# Version and $2 are the same (only one line, so we're on latest)
+	pkg_version $1
+	local versions=(${VERSION} $2)
+	if [[ ${#versions[@]} -lt 2 ]] || [[ ${VERSION} == "$2" ]]; then
+		# Version and $2 are the same (or only one is known), so we're on latest
 		return 0
 	fi
+	LATEST=$(printf "%s\n" ${VERSION} $2 | sort -V | tail -1)
 
 	if [ "$VERSION" != "$LATEST" ]; then
 		# "package $1 version $VERSION is lower than required ($2)."
@@ -52,7 +80,6 @@ is_pkg_over() {
 
 is_required_pkg_over() {
 	is_required_pkg $1
-	VERSION=$(is_pkg $1 2>&1 | sort -V | tail -1)
 	if ! is_pkg_over "${@}"; then
 		echo "package $1 version $VERSION is lower than required ($2)." >&2
 		exit ${RC_SKIPPED}
@@ -21,6 +21,10 @@
 # Helper script to define location of various files.
 
 discover_ocp_minor() {
+	if [[ -n ${RISU_FACT_OCP_MINOR+x} ]]; then
+		echo "${RISU_FACT_OCP_MINOR}"
+		return
+	fi
 	if is_rpm atomic-openshift >/dev/null 2>&1; then
 		RPMINSTALLED=$(is_rpm atomic-openshift)
 		VERSION=$(echo ${RPMINSTALLED} | cut -d "-" -f 3 | cut -d "." -f 1-3)
@@ -76,6 +76,10 @@ __osp_version_with_neutron() {
 }
 
 discover_osp_version() {
+	if [[ -n ${RISU_FACT_OSP_VERSION+x} ]]; then
+		echo "${RISU_FACT_OSP_VERSION}"
+		return
+	fi
 	GOTIT="NO"
 
 	NOVA=$(__osp_version_with_nova)
@@ -9,13 +9,19 @@ Plugin execution engine.
 
 This module handles parallel execution of plugins using multiprocessing
 with proper resource management and error handling.
+
+Results can also be streamed in completion order into a result sink,
+keeping a bounded number of tasks in flight so memory stays flat.
 """
 
 from __future__ import print_function
 
+import json
 import logging
 import multiprocessing
+import os
 import signal
+import threading
 
 # Python 2.7 compatible context manager
 try:
@@ -39,6 +45,234 @@ except ImportError:
 LOG = logging.getLogger("risu.executor")
 
 
+def _plugin_name(plugin):
+    """
+    Get printable name of a task.
+
+    Args:
+        plugin (dict or list): Plugin dictionary or batch of them
+
+    Returns:
+        str: plugin path(s)
+    """
+    if isinstance(plugin, list):
+        return ", ".join("%s" % _plugin_name(item) for item in plugin)
+    return plugin.get("plugin")
+
+
+def _plugin_ids(plugin):
+    """
+    Get id's of the plugins of a task.
+
+    Args:
+        plugin (dict or list): Plugin dictionary or batch of them
+
+    Returns:
+        list: id's of the plugins having one
+    """
+    plugins = plugin if isinstance(plugin, list) else [plugin]
+    return [item["id"] for item in plugins if isinstance(item, dict) and "id" in item]
+
+
+def _error_result(plugin, message):
+    """
+    Build result for a task that could not be executed.
+
+    Args:
+        plugin (dict or list): Plugin dictionary or batch of them
+        message (str): Error message
+
+    Returns:
+        dict: result dictionary, with the id's of the plugins in 'ids'
+    """
+    return {
+        "rc": 3,
+        "out": "",
+        "err": message,
+        "plugin": _plugin_name(plugin),
+        "ids": _plugin_ids(plugin),
+    }
+
+
+def _run_indexed(task):
+    """
+    Run function for a task in a worker keeping track of its position.
+
+    Exceptions are returned instead of raised so the plugin failing can
+    still be identified when results arrive in completion order.
+
+    Args:
+        task (tuple): (execute_func, position, plugin)
+
+    Returns:
+        tuple: (position, result, error message or None)
+    """
+    execute_func, position, plugin = task
+    try:
+        return position, execute_func(plugin), None
+    except Exception as e:
+        return position, None, str(e)
+
+
+class ResultSink(object):
+    """
+    Receives plugin results as they complete.
+
+    Subclasses implement add() and optionally close().
+    """
+
+    def add(self, plugin, result):
+        """
+        Store result of a plugin.
+
+        Args:
+            plugin (dict or list): Plugin dictionary or batch executed
+            result: Value returned by the execution function
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Finish storing results."""
+        pass
+
+    def abort(self):
+        """Discard results after a failed execution."""
+        pass
+
+
+class ListSink(ResultSink):
+    """
+    Keeps results in a list in completion order.
+
+    Attributes:
+        results (list): Results received
+    """
+
+    def __init__(self):
+        """Initialize empty sink."""
+        self.results = []
+
+    def add(self, plugin, result):
+        """Append result."""
+        self.results.append(result)
+
+
+class DictSink(ResultSink):
+    """
+    Stores result dictionaries by their 'id'.
+
+    Results can also be lists of result dictionaries (batches), entries
+    without an 'id' are ignored. Tasks that failed or timed out get a
+    result with rc 'failed' for each of their plugins.
+
+    Attributes:
+        results (dict): id: result dictionary
+        failed (int): rc stored for plugins of tasks not executed
+    """
+
+    def __init__(self, results=None, failed=3):
+        """
+        Initialize sink.
+
+        Args:
+            results (dict, optional): Dictionary to update in place
+            failed (int): rc for plugins of tasks not executed (default: 3)
+        """
+        self.results = results if results is not None else {}
+        self.failed = failed
+
+    def items(self, plugin, result):
+        """
+        Get results by id for a task.
+
+        Args:
+            plugin (dict or list): Plugin dictionary or batch executed
+            result: Value returned by the execution function
+
+        Yields:
+            tuple: (id, result dictionary)
+        """
+        if isinstance(result, dict) and "ids" in result and "id" not in result:
+            # Error of the whole task, report it for each of its plugins
+            plugins = plugin if isinstance(plugin, list) else [plugin]
+            byid = dict(
+                (item["id"], item)
+                for item in plugins
+                if isinstance(item, dict) and "id" in item
+            )
+            for pluginid in result["ids"]:
+                # No hash so the plugin is run again next time
+                item = dict(byid.get(pluginid, {"id": pluginid}))
+                item.pop("hash", None)
+                item["result"] = {"rc": self.failed, "out": "", "err": result["err"]}
+                yield pluginid, item
+            return
+
+        for item in result if isinstance(result, list) else [result]:
+            if item and "id" in item:
+                yield item["id"], item
+
+    def add(self, plugin, result):
+        """Store result(s) by id."""
+        for pluginid, item in self.items(plugin, result):
+            self.results[pluginid] = item
+
+
+class JSONStreamSink(DictSink):
+    """
+    Writes result dictionaries to a JSON file as they arrive.
+
+    The file has the same {"results": {id: result}} layout as risu.json
+    and is written to a temporary file renamed on close, so readers
+    never see a partial document. Results are not kept in memory.
+
+    Attributes:
+        filename (str): Destination file
+    """
+
+    def __init__(self, filename, failed=3):
+        """
+        Initialize sink.
+
+        Args:
+            filename (str): Destination file
+            failed (int): rc for plugins of tasks not executed (default: 3)
+        """
+        self.failed = failed
+        self.filename = filename
+        self._tmpfile = "%s.%s.tmp" % (filename, os.getpid())
+        self._fd = open(self._tmpfile, "w")
+        self._fd.write('{"results": {')
+        self._count = 0
+
+    def add(self, plugin, result):
+        """Write result(s) by id."""
+        for pluginid, item in self.items(plugin, result):
+            if self._count:
+                self._fd.write(", ")
+            self._fd.write(json.dumps(pluginid))
+            self._fd.write(": ")
+            self._fd.write(json.dumps(item))
+            self._count += 1
+
+    def close(self):
+        """Finish document and move it in place."""
+        if self._fd is None:
+            return
+        self._fd.write("}}")
+        self._fd.close()
+        self._fd = None
+        os.rename(self._tmpfile, self.filename)
+
+    def abort(self):
+        """Remove partial document keeping any previous file."""
+        if self._fd is None:
+            return
+        self._fd.close()
+        self._fd = None
+        os.remove(self._tmpfile)
+
+
 class PluginExecutor(object):
     """
     Parallel plugin executor using multiprocessing.
@@ -131,29 +365,21 @@ class PluginExecutor(object):
                                 progress_callback(plugins[i], result)
 
                         except multiprocessing.TimeoutError:
-                            LOG.error("Plugin timed out: %s", plugins[i].get("plugin"))
+                            LOG.error("Plugin timed out: %s", _plugin_name(plugins[i]))
                             results.append(
-                                {
-                                    "rc": 3,
-                                    "out": "",
-                                    "err": "Plugin execution timed out",
-                                    "plugin": plugins[i].get("plugin"),
-                                }
+                                _error_result(plugins[i], "Plugin execution timed out")
                             )
 
                         except Exception as e:
                             LOG.error(
                                 "Plugin execution failed: %s - %s",
-                                plugins[i].get("plugin"),
+                                _plugin_name(plugins[i]),
                                 str(e),
                             )
                             results.append(
-                                {
-                                    "rc": 3,
-                                    "out": "",
-                                    "err": "Plugin execution error: %s" % str(e),
-                                    "plugin": plugins[i].get("plugin"),
-                                }
+                                _error_result(
+                                    plugins[i], "Plugin execution error: %s" % str(e)
+                                )
                             )
 
                 except KeyboardInterrupt:
@@ -173,6 +399,157 @@ class PluginExecutor(object):
         LOG.info("Completed executing %d plugins", total)
         return results
 
+    def iter_results(self, plugins, execute_func, max_pending=None):
+        """
+        Execute plugins in parallel yielding results as they complete.
+
+        Unlike execute_plugins() a slow plugin doesn't hold back the
+        results of the ones behind it, and at most max_pending tasks are
+        submitted and not yet consumed, so memory doesn't grow with the
+        number of plugins or the size of their output.
+
+        If no plugin completes within timeout + 10 seconds, workers are
+        terminated and the remaining plugins are reported as errors.
+
+        Args:
+            plugins (list): List of plugin dictionaries to execute
+            execute_func (callable): Picklable function to execute for
+                                    each plugin
+            max_pending (int, optional): Tasks in flight (default: twice
+                                        the number of workers)
+
+        Yields:
+            tuple: (plugin, result) in completion order
+
+        Raises:
+            KeyboardInterrupt: If user interrupts execution
+        """
+        if not plugins:
+            LOG.debug("No plugins to execute")
+            return
+
+        total = len(plugins)
+        num_workers = min(self.num_processes, total)
+        if max_pending is None:
+            max_pending = num_workers * 2
+
+        LOG.info(
+            "Streaming %d plugins with %d workers, %d in flight",
+            total,
+            num_workers,
+            max_pending,
+        )
+
+        slots = threading.Semaphore(max_pending)
+        stop = threading.Event()
+        pending = set()
+        done = set()
+
+        def feed():
+            """Submit tasks as slots are freed by consumed results."""
+            for position, plugin in enumerate(plugins):
+                slots.acquire()
+                if stop.is_set():
+                    return
+                pending.add(position)
+                yield (execute_func, position, plugin)
+
+        pool = multiprocessing.Pool(num_workers)
+        completed = False
+        try:
+            iterator = pool.imap_unordered(_run_indexed, feed())
+            for _ in range(total):
+                try:
+                    position, result, error = iterator.next(timeout=self.timeout + 10)
+                except multiprocessing.TimeoutError:
+                    break
+
+                pending.discard(position)
+                done.add(position)
+                slots.release()
+
+                if error is not None:
+                    LOG.error(
+                        "Plugin execution failed: %s - %s",
+                        _plugin_name(plugins[position]),
+                        error,
+                    )
+                    result = _error_result(
+                        plugins[position], "Plugin execution error: %s" % error
+                    )
+                yield plugins[position], result
+            else:
+                completed = True
+
+        except KeyboardInterrupt:
+            LOG.warning("Interrupted by user, terminating workers...")
+            raise
+
+        finally:
+            # Unblock the feeder so the pool can be shut down
+            stop.set()
+            for _ in range(total):
+                slots.release()
+            if completed:
+                pool.close()
+            else:
+                pool.terminate()
+            pool.join()
+
+        if not completed:
+            # Only reached after a timeout, report what didn't complete
+            for position, plugin in enumerate(plugins):
+                if position in pending:
+                    LOG.error("Plugin timed out: %s", _plugin_name(plugin))
+                    yield plugin, _error_result(plugin, "Plugin execution timed out")
+                elif position not in done:
+                    yield plugin, _error_result(
+                        plugin, "Plugin not executed, aborted after a timeout"
+                    )
+            LOG.error("Execution aborted after timeout")
+
+        LOG.info("Completed executing %d plugins", total)
+
+    def execute_plugins_streaming(
+        self, plugins, execute_func, sink=None, progress_callback=None, max_pending=None
+    ):
+        """
+        Execute plugins in parallel storing results in a sink as they complete.
+
+        Args:
+            plugins (list): List of plugin dictionaries to execute
+            execute_func (callable): Picklable function to execute for
+                                    each plugin
+            sink (ResultSink, optional): Receives results (default: ListSink)
+            progress_callback (callable, optional): Called after each plugin
+                                                   with (plugin, result)
+            max_pending (int, optional): Tasks in flight, see iter_results()
+
+        Returns:
+            ResultSink: sink used, already closed (aborted on errors)
+
+        Example:
+            >>> sink = executor.execute_plugins_streaming(
+            ...     plugins, run_plugin, sink=DictSink())
+            >>> sink.results
+        """
+        if sink is None:
+            sink = ListSink()
+
+        try:
+            for plugin, result in self.iter_results(
+                plugins, execute_func, max_pending=max_pending
+            ):
+                sink.add(plugin, result)
+                if progress_callback:
+                    progress_callback(plugin, result)
+        except BaseException:
+            sink.abort()
+            raise
+
+        sink.close()
+        return sink
+
     def execute_plugins_serial(self, plugins, execute_func, progress_callback=None):
         """
         Execute plugins serially (no multiprocessing).
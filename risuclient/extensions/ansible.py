@@ -46,11 +46,14 @@ class AnsibleExtension(BaseExtension):
             metadata = risu.generic_get_metadata(plugin=plugin)
             return metadata
 
+        # Read once for both YAML and comment headers
         with open(plugin["plugin"], "r") as stream:
-            try:
-                doc = yaml.safe_load(stream)
-            except (yaml.YAMLError, AttributeError):
-                doc = ""
+            text = stream.read()
+
+        try:
+            doc = yaml.safe_load(text)
+        except (yaml.YAMLError, AttributeError):
+            doc = ""
 
         try:
             description = doc[0]["vars"]["metadata"]["description"]
@@ -62,7 +65,7 @@ class AnsibleExtension(BaseExtension):
         except (KeyError, TypeError, IndexError):
             long_name = ""
 
-        metadata = risu.generic_get_metadata(plugin=plugin)
+        metadata = risu.generic_get_metadata(plugin=plugin, text=text)
         metadata.update({"description": description})
         metadata.update({"long_name": long_name})
 
@@ -109,7 +112,9 @@ class AnsibleExtension(BaseExtension):
         os.environ["ANSIBLE_RETRY_FILES_ENABLED"] = "0"
 
         # Call exec to run playbook
-        returncode, out, err = risu.execonshell(filename=command)
+        returncode, out, err = risu.execonshell(
+            filename=command, timeout=risu.plugintimeout(plugin)
+        )
 
         # Do formatting of results and adjust return codes to risu standards
         if returncode == 2:
@@ -28,6 +28,7 @@ class BaseExtension(object):
         file_extension: File extension for plugins (e.g., ".yml" for ansible)
         executables_only: True if only executable files are plugins
         comment_char: Comment character for metadata extraction
+        exclude: Path substrings of plugins handled by other extensions
     """
 
     # Class attributes - override in subclasses
@@ -36,6 +37,7 @@ class BaseExtension(object):
     file_extension = None  # E.g., ".yml", ".go" - None means any file
     executables_only = True  # False for ansible, metadata
     comment_char = "#"  # Comment character for metadata
+    exclude = None  # E.g., ["core/sumsos/"] - None means no exclusion
 
     def __init__(self):
         """Initialize the extension"""
@@ -89,6 +91,7 @@ class BaseExtension(object):
             executables=self.executables_only,
             fileextension=self.file_extension,
             extension=self.extension_name,
+            exclude=self.exclude,
         )
 
     def get_metadata(self, plugin):
@@ -142,7 +145,58 @@ class SimpleShellExtension(BaseExtension):
         :param plugin: plugin dictionary
         :return: tuple of (returncode, out, err)
         """
-        return risu.execonshell(filename=plugin["plugin"])
+        return risu.execonshell(
+            filename=plugin["plugin"], timeout=risu.plugintimeout(plugin)
+        )
+
+
+class InProcessExtension(BaseExtension):
+    """
+    Extension for plugins that are plain Python run inside risu.
+
+    All plugins for the extension are run as a single batch task, and
+    results of cached() calls (file reads, hashes, etc.) are shared
+    between the plugins of the batch.
+    """
+
+    def __init__(self):
+        """Initialize the extension"""
+        super(InProcessExtension, self).__init__()
+        self._cache = None
+
+    def cached(self, key, function, *args):
+        """
+        Call function once per batch for a given key.
+
+        :param key: hashable key identifying the call
+        :param function: function to call
+        :param args: arguments for function
+        :return: function result, reused within the running batch
+        """
+        if self._cache is None:
+            return function(*args)
+        if key not in self._cache:
+            self._cache[key] = function(*args)
+        return self._cache[key]
+
+    def runbatch(self, plugins):
+        """
+        Execute several plugins in-process sharing cached() results.
+
+        :param plugins: list of plugin dictionaries
+        :return: list of (returncode, out, err) in the same order as plugins
+        """
+        self._cache = {}
+        results = []
+        try:
+            for plugin in plugins:
+                try:
+                    results.append(self.run(plugin))
+                except Exception as e:
+                    results.append((3, "", "Plugin execution exception: %s" % e))
+        finally:
+            self._cache = None
+        return results
 
 
 # Helper functions for creating extension module exports
@@ -151,7 +205,8 @@ def create_extension_exports(extension_class):
     Create the standard module-level exports for an extension.
 
     This helper creates the init(), listplugins(), get_metadata(),
-    run(), and help() functions that delegate to an extension instance.
+    run(), and help() functions that delegate to an extension instance,
+    and runbatch() for extensions that provide it.
 
     :param extension_class: Extension class to instantiate
     :return: dict of function exports
@@ -173,10 +228,13 @@ def create_extension_exports(extension_class):
         help = _instance.help
     """
     instance = extension_class()
-    return {
+    exports = {
         "init": instance.init,
         "listplugins": instance.listplugins,
         "get_metadata": instance.get_metadata,
         "run": instance.run,
         "help": instance.help,
     }
+    if hasattr(instance, "runbatch"):
+        exports["runbatch"] = instance.runbatch
+    return exports
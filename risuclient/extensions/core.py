@@ -27,6 +27,8 @@ class CoreExtension(SimpleShellExtension):
     """Extension for processing core Risu shell script plugins"""
 
     extension_name = "core"
+    # sumsos plugins are evaluated in a single pass by the sumsos extension
+    exclude = [os.path.join("core", "sumsos", "")]
 
     def help(self):
         """Returns help for plugin"""
@@ -8,15 +8,14 @@
 # Copyright (C) 2018-2021, 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
 from __future__ import print_function
 
-import hashlib
 import os
 
 try:
     import risuclient.shell as risu
-    from risuclient.extensions.base import BaseExtension
+    from risuclient.extensions.base import InProcessExtension
 except ImportError:
     import shell as risu
-    from extensions.base import BaseExtension
+    from extensions.base import InProcessExtension
 
 # Load i18n settings from risu (for backward compatibility)
 _ = risu._
@@ -26,7 +25,19 @@ extension = "faraday"
 pluginsdir = os.path.join(risu.risudir, "plugins", extension)
 
 
-class FaradayExtension(BaseExtension):
+def hashfile(filename):
+    """
+    Calculates SHA-512 of a file
+    :param filename: file to hash
+    :return: hex digest or None if file can't be read
+    """
+    if not os.access(filename, os.R_OK):
+        return None
+    # Read in chunks and reused while the file doesn't change
+    return risu.hashfile(filename)
+
+
+class FaradayExtension(InProcessExtension):
     """Extension for processing file affinity/antiaffinity plugins"""
 
     extension_name = "faraday"
@@ -81,6 +92,29 @@ class FaradayExtension(BaseExtension):
 
         yield newplugins
 
+    def regexpfile(self, filename, regexp):
+        """
+        Checks for string in file, once per batch
+        :param filename: filename to regexp for matches
+        :param regexp: String to check
+        :return: found match or False
+        """
+        return self.cached(
+            ("regexpfile", filename, regexp), risu.regexpfile, filename, regexp
+        )
+
+    def runbatch(self, plugins):
+        """
+        Execute several plugins in-process sharing file hashes
+        :param plugins: list of plugin dictionaries
+        :return: list of (returncode, out, err) in the same order as plugins
+        """
+        results = super(FaradayExtension, self).runbatch(plugins)
+
+        # Batches run in worker processes, keep hashes for later runs
+        risu.savehashes()
+        return results
+
     def run(self, plugin):
         """
         Calculate file hash for affinity checking
@@ -90,16 +124,14 @@ class FaradayExtension(BaseExtension):
         filename = plugin["path"]
 
         skipped = 0
-        if os.environ["RISU_LIVE"] == 0 and risu.regexpfile(
-            filename=filename, regexp="RISU_ROOT"
-        ):
+        if os.environ["RISU_LIVE"] == 0 and self.regexpfile(filename, "RISU_ROOT"):
             # We're running in snapshot and faraday file has RISU_ROOT
             skipped = 0
         else:
             if os.environ["RISU_LIVE"] == 1:
-                if risu.regexpfile(
-                    filename=plugin["plugin"], regexp="RISU_HYBRID"
-                ) or not risu.regexpfile(filename=filename, regexp="RISU_ROOT"):
+                if self.regexpfile(
+                    plugin["plugin"], "RISU_HYBRID"
+                ) or not self.regexpfile(filename, "RISU_ROOT"):
                     # We're running in Live mode and either plugin supports HYBRID or has no RISU_ROOT
                     skipped = 0
                 else:
@@ -116,10 +148,11 @@ class FaradayExtension(BaseExtension):
         if "${RISU_ROOT}" in filename:
             filename = filename.replace("${RISU_ROOT}", os.environ["RISU_ROOT"])
 
-        if os.access(filename, os.R_OK):
-            # We can read the file, so let's calculate hash
+        # Files shared by several plugins are only hashed once per batch
+        digest = self.cached(("hashfile", filename), hashfile, filename)
+        if digest is not None:
             out = ""
-            err = hashlib.sha512(open(filename, "rb").read()).hexdigest()
+            err = digest
             returncode = risu.RC_OKAY
         else:
             returncode = risu.RC_SKIPPED
@@ -141,4 +174,5 @@ init = _instance.init
 listplugins = _instance.listplugins
 get_metadata = _instance.get_metadata
 run = _instance.run
+runbatch = _instance.runbatch
 help = _instance.help
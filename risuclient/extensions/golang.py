@@ -6,12 +6,18 @@
 # Copyright (C) 2020, 2021, 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
 from __future__ import print_function
 
+import hashlib
 import os
+import subprocess
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 
 try:
     import risuclient.shell as risu
+    from risuclient import cache
     from risuclient.extensions.base import BaseExtension
 except ImportError:
+    import cache
     import shell as risu
     from extensions.base import BaseExtension
 
@@ -31,43 +37,127 @@ class GolangExtension(BaseExtension):
     executables_only = False
     comment_char = "//"
 
-    def run(self, plugin):
+    def __init__(self):
+        """Initialize the extension"""
+        super(GolangExtension, self).__init__()
+        self.buildcache = cache.BuildCache()
+        self._versions = {}
+
+    def version(self, gorun):
+        """
+        Gets Go toolchain version, binaries are rebuilt when it changes
+        :param gorun: go binary
+        :return: output of 'go version'
+        """
+        if gorun not in self._versions:
+            p = subprocess.Popen(
+                [gorun, "version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            self._versions[gorun] = p.communicate()[0].decode("utf-8").strip()
+        return self._versions[gorun]
+
+    def sourcehash(self, plugin):
         """
-        Compile and execute Go plugin
+        Gets hash of everything the build of plugin depends on
         :param plugin: plugin dictionary
-        :return: returncode, out, err
+        :return: sha512 of plugin source, the other Go files in its folder and
+                 the go.mod and go.sum of its module
         """
-        gorun = risu.which("go")
-        if not gorun:
-            return risu.RC_SKIPPED, "", self._("Golang support not found")
-
         filename = plugin["plugin"]
-
-        # Save current directory
-        mypath = os.getcwd()
-
-        path = os.path.dirname(filename)
-        file = os.path.basename(filename)
-
-        # Compiling
-        binary = os.path.splitext(filename)[0]
-
-        os.chdir(path)
+        folder = os.path.dirname(os.path.abspath(filename))
+        files = []
         try:
-            os.remove(binary)
+            files = [
+                os.path.join(folder, name)
+                for name in os.listdir(folder)
+                if name.endswith(".go") and name != os.path.basename(filename)
+            ]
         except OSError:
             pass
-        command = "%s build %s" % (gorun, file)
 
-        risu.execonshell(filename=command)
+        # go.mod applies to the folders below it
+        module = folder
+        while True:
+            found = [
+                os.path.join(module, name)
+                for name in ["go.mod", "go.sum"]
+                if os.path.isfile(os.path.join(module, name))
+            ]
+            parent = os.path.dirname(module)
+            if found or parent == module:
+                break
+            module = parent
+        files.extend(found)
+
+        digest = hashlib.sha512()
+        source = plugin.get("hash") or risu.generate_file_hash(filename=filename)
+        digest.update(("%s\n" % source).encode("UTF-8"))
+        for path in sorted(files):
+            if os.path.isfile(path):
+                digest.update(("%s %s\n" % (path, risu.hashfile(path))).encode("UTF-8"))
+        return digest.hexdigest()
+
+    def build(self, plugin, gorun):
+        """
+        Gets binary for plugin from the build cache, compiling it if needed
+        :param plugin: plugin dictionary
+        :param gorun: go binary
+        :return: binary path and build errors
+        """
+        filename = plugin["plugin"]
+        errors = []
+
+        def gobuild(output):
+            # Build from the plugin folder without changing ours
+            p = subprocess.Popen(
+                [gorun, "build", "-o", output, os.path.basename(filename)],
+                cwd=os.path.dirname(filename),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            err = p.communicate()[1]
+            errors.append(err.decode("utf-8", "replace").strip())
+            return p.returncode == 0
+
+        binary = self.buildcache.build(
+            source_hash=self.sourcehash(plugin),
+            toolchain=self.version(gorun),
+            name=os.path.splitext(os.path.basename(filename))[0],
+            builder=gobuild,
+        )
+        return binary, "\n".join(errors)
+
+    def prepare(self, plugins):
+        """
+        Builds missing binaries for plugins in parallel before running them
+        :param plugins: list of plugin dictionaries
+        """
+        gorun = risu.which("go")
+        if not gorun or not plugins:
+            return
+
+        pool = ThreadPool(min(len(plugins), cpu_count()))
+        try:
+            pool.map(lambda plugin: self.build(plugin, gorun), plugins)
+        finally:
+            pool.close()
+            pool.join()
 
-        # Go back to our folder
-        os.chdir(mypath)
+    def run(self, plugin):
+        """
+        Execute Go plugin, compiled once for each source and Go version
+        :param plugin: plugin dictionary
+        :return: returncode, out, err
+        """
+        gorun = risu.which("go")
+        if not gorun:
+            return risu.RC_SKIPPED, "", self._("Golang support not found")
 
-        # Running
-        returncode, out, err = risu.execonshell(filename=binary)
+        binary, err = self.build(plugin, gorun)
+        if binary is None:
+            return 3, "", self._("Failed to build plugin: %s") % err
 
-        return returncode, out, err
+        return risu.execonshell(filename=binary, timeout=risu.plugintimeout(plugin))
 
     def help(self):
         """Returns help for plugin"""
@@ -80,4 +170,5 @@ init = _instance.init
 listplugins = _instance.listplugins
 get_metadata = _instance.get_metadata
 run = _instance.run
+prepare = _instance.prepare
 help = _instance.help
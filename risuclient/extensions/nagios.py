@@ -41,7 +41,9 @@ class NagiosExtension(BaseExtension):
         :return: returncode, out, err
         """
         # Call exec to run plugin
-        returncode, out, err = risu.execonshell(filename=plugin["plugin"])
+        returncode, out, err = risu.execonshell(
+            filename=plugin["plugin"], timeout=risu.plugintimeout(plugin)
+        )
 
         # Map Nagios return codes to Risu standards
         if returncode == 2:  # CRITICAL
@@ -12,8 +12,10 @@ import os
 
 try:
     import risuclient.shell as risu
+    from risuclient import logscan
     from risuclient.extensions.base import BaseExtension
 except ImportError:
+    import logscan
     import shell as risu
     from extensions.base import BaseExtension
 
@@ -86,17 +88,77 @@ class NodeProblemDetectorExtension(BaseExtension):
 
         yield plugins
 
-    def run(self, plugin):
+    def logfile(self, plugin):
         """
-        Check log file for pattern match
+        Get log file checked by rule
         :param plugin: plugin dictionary
-        :return: returncode, out, err
+        :return: path to log file
         """
         filename = plugin["path"]
 
         if "${RISU_ROOT}" in filename:
             filename = filename.replace("${RISU_ROOT}", os.environ["RISU_ROOT"])
 
+        return filename
+
+    def runbatch(self, plugins):
+        """
+        Check rules reading each log file only once
+        :param plugins: list of plugin dictionaries
+        :return: list of (returncode, out, err) in the same order as plugins
+        """
+        results = [None] * len(plugins)
+
+        # Group rules by the log file they check
+        rules = {}
+        for position, plugin in enumerate(plugins):
+            filename = self.logfile(plugin)
+            if os.access(filename, os.R_OK) and os.path.isfile(filename):
+                rules.setdefault(filename, {})[position] = plugin["pattern"]
+            else:
+                results[position] = (
+                    risu.RC_SKIPPED,
+                    "",
+                    "File %s is not accessible in read mode" % filename,
+                )
+
+        for filename, patterns in rules.items():
+            try:
+                found = logscan.matchfile(filename, patterns)
+            except Exception:
+                # Invalid pattern or contents, check rules one by one to
+                # report the problem in the rules failing only
+                for position in patterns:
+                    try:
+                        results[position] = self.run(plugins[position])
+                    except Exception as e:
+                        results[position] = (
+                            3,
+                            "",
+                            "Plugin execution exception: %s" % e,
+                        )
+                continue
+
+            for position in patterns:
+                if position in found:
+                    results[position] = (
+                        risu.RC_FAILED,
+                        "",
+                        plugins[position]["reason"],
+                    )
+                else:
+                    results[position] = (risu.RC_OKAY, "", "")
+
+        return results
+
+    def run(self, plugin):
+        """
+        Check log file for pattern match
+        :param plugin: plugin dictionary
+        :return: returncode, out, err
+        """
+        filename = self.logfile(plugin)
+
         pattern = plugin["pattern"]
         reason = plugin["reason"]
 
@@ -129,4 +191,5 @@ init = _instance.init
 listplugins = _instance.listplugins
 get_metadata = _instance.get_metadata
 run = _instance.run
+runbatch = _instance.runbatch
 help = _instance.help
@@ -46,18 +46,21 @@ class RhvLogCollectorAnalyzerExtension(BaseExtension):
             metadata = risu.generic_get_metadata(plugin=plugin)
             return metadata
 
+        # Read once for both YAML and comment headers
         with open(plugin["plugin"], "r") as stream:
-            try:
-                doc = yaml.safe_load(stream)
-            except (yaml.YAMLError, AttributeError):
-                doc = ""
+            text = stream.read()
+
+        try:
+            doc = yaml.safe_load(text)
+        except (yaml.YAMLError, AttributeError):
+            doc = ""
 
         try:
             description = doc[0]["vars"]["metadata"]["description"]
         except (KeyError, TypeError, IndexError):
             description = ""
 
-        metadata = risu.generic_get_metadata(plugin=plugin)
+        metadata = risu.generic_get_metadata(plugin=plugin, text=text)
         metadata.update({"description": description})
 
         return metadata
@@ -96,7 +99,9 @@ class RhvLogCollectorAnalyzerExtension(BaseExtension):
         command = "%s --json" % rhvlc
 
         # Call exec to run analyzer
-        returncode, out, err = risu.execonshell(filename=command)
+        returncode, out, err = risu.execonshell(
+            filename=command, timeout=risu.plugintimeout(plugin)
+        )
 
         # Do formatting of results and adjust return codes to risu standards
         if returncode == 2:
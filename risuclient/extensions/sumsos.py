@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Extension for processing sumsos log regexp plugins in one pass
+# Author: Pablo Iranzo Gomez (Pablo.Iranzo@gmail.com)
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+from __future__ import print_function
+
+import os
+import re
+import string
+
+try:
+    import risuclient.shell as risu
+    from risuclient import facts, logscan
+    from risuclient.extensions.base import BaseExtension
+except ImportError:
+    import facts
+    import logscan
+    import shell as risu
+    from extensions.base import BaseExtension
+
+# Load i18n settings from risu (for backward compatibility)
+_ = risu._
+
+# Legacy module-level variables (for backward compatibility)
+extension = "sumsos"
+pluginsdir = os.path.join(risu.risudir, "plugins", "core", extension)
+
+# Lines every sumsos plugin must contain to be evaluated without bash
+CANONICAL = [
+    'journal="$journalctl_file"',
+    'if is_lineinfile "${REGEXP}" ${journal} ${RISU_ROOT}/var/log/messages; then',
+]
+
+DECLARATION = re.compile(r"^([A-Z]+)=(.*)$")
+MESSAGE = re.compile(r'^\s*echo \$"(.*)" >&2$')
+
+
+def unquote(value):
+    """
+    Returns value of a bash assignment without expanding anything
+    :param value: text at the right of the '='
+    :return: value or None if it would need bash to be expanded
+    """
+    if len(value) > 1 and value[0] == value[-1] == "'":
+        return value[1:-1]
+
+    if len(value) > 1 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+    elif any(char in value for char in " \"'"):
+        return None
+
+    result = ""
+    escaped = False
+    for position, char in enumerate(value):
+        if escaped:
+            if char not in '$`"\\':
+                result += "\\"
+            result += char
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "`" or (char == "$" and position < len(value) - 1):
+            # Only a trailing '$' (regexp anchor) is kept literally by bash
+            return None
+        else:
+            result += char
+
+    if escaped:
+        result += "\\"
+    return result
+
+
+def get_declarations(filename):
+    """
+    Reads REGEXP/KCS/BZ declarations and message of a sumsos plugin
+    :param filename: plugin file
+    :return: dict with declarations and 'message' or None if not canonical
+    """
+    declarations = {}
+    found = []
+
+    try:
+        with open(filename, "r") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.strip() in CANONICAL:
+                    found.append(line.strip())
+                    continue
+
+                match = DECLARATION.match(line)
+                if match:
+                    value = unquote(match.group(2))
+                    if value is None:
+                        return None
+                    declarations[match.group(1)] = value
+                    continue
+
+                match = MESSAGE.match(line)
+                if match:
+                    if "message" in declarations:
+                        return None
+                    declarations["message"] = match.group(1)
+    except (IOError, OSError):
+        return None
+
+    if sorted(found) != sorted(CANONICAL):
+        return None
+
+    if not declarations.get("REGEXP") or "message" not in declarations:
+        return None
+
+    return declarations
+
+
+class SumsosExtension(BaseExtension):
+    """Extension for processing sumsos plugins scanning logs only once"""
+
+    extension_name = "sumsos"
+    plugins_subdir = os.path.join("core", "sumsos")
+
+    def listplugins(self, options=None):
+        """
+        List sumsos plugins keeping them categorized as core ones
+        :param options: argparse options provided
+        :return: plugin object generator
+        """
+        prio = 0
+        if options:
+            try:
+                prio = options.prio
+            except AttributeError:
+                pass
+
+        # Build folder list
+        folders = [self.plugins_dir]
+        if options and options.extraplugintree:
+            folders.append(os.path.join(options.extraplugintree, self.plugins_subdir))
+
+        # Using 'core' for the search keeps category and metadata as they were
+        yield risu.findplugins(
+            folders=folders,
+            prio=prio,
+            options=options,
+            executables=self.executables_only,
+            extension="core",
+            dictupdate={"backend": self.extension_name},
+        )
+
+    def journal(self):
+        """
+        Locates journal file the same way common.d/00-core.sh does
+        :return: journal file path or "" if there is none
+        """
+        return facts.journal(
+            root=os.environ.get("RISU_ROOT", ""),
+            live=os.environ.get("RISU_LIVE", "0") != "0",
+            tmp=os.environ.get("RISU_TMP", ""),
+            journalctl=risu.which("journalctl"),
+        )
+
+    def logfiles(self):
+        """
+        Files checked by is_lineinfile in sumsos plugins
+        :return: list of files, first one must exist for checks to happen
+        """
+        messages = "%s/var/log/messages" % os.environ.get("RISU_ROOT", "")
+        journal = self.journal()
+        if journal:
+            return [journal, messages]
+        return [messages]
+
+    def runshell(self, plugin):
+        """
+        Execute plugin as a regular shell script
+        :param plugin: plugin dictionary
+        :return: returncode, out, err
+        """
+        os.environ["PLUGIN_BASEDIR"] = os.path.abspath(
+            os.path.dirname(plugin["plugin"])
+        )
+        return risu.execonshell(
+            filename=plugin["plugin"], timeout=risu.plugintimeout(plugin)
+        )
+
+    def runbatch(self, plugins):
+        """
+        Execute several plugins reading the logs only once
+        :param plugins: list of plugin dictionaries
+        :return: list of (returncode, out, err) in the same order as plugins
+        """
+        declarations = {}
+        for position, plugin in enumerate(plugins):
+            declared = get_declarations(plugin["plugin"])
+            if declared:
+                declarations[position] = declared
+
+        scanner = logscan.LogScanner(
+            dict(
+                (position, declared["REGEXP"])
+                for position, declared in declarations.items()
+            )
+        )
+
+        files = self.logfiles()
+        if os.path.isfile(files[0]):
+            try:
+                found = scanner.scan(files, timeout=risu.tasktimeout(plugins))
+            except logscan.ScanTimeout:
+                # Report each plugin instead of losing the whole batch
+                err = self._("Plugin execution timed out")
+                return [(risu.RC_FAILED, "", err) for plugin in plugins]
+        else:
+            # is_lineinfile requires first file to exist
+            found = set()
+
+        results = []
+        for position, plugin in enumerate(plugins):
+            if position not in declarations or position in scanner.unsupported:
+                results.append(self.runshell(plugin))
+            elif position in found:
+                declared = declarations[position]
+                message = string.Template(self._(declared["message"]))
+                results.append((risu.RC_FAILED, "", message.safe_substitute(declared)))
+            else:
+                results.append((risu.RC_OKAY, "", ""))
+
+        return results
+
+    def run(self, plugin):
+        """
+        Execute a single sumsos plugin
+        :param plugin: plugin dictionary
+        :return: returncode, out, err
+        """
+        return self.runbatch([plugin])[0]
+
+    def help(self):
+        """Returns help for plugin"""
+        return self._(
+            "This extension processes sumsos plugins scanning all logs in a single pass"
+        )
+
+
+# Create module-level exports for backward compatibility
+_instance = SumsosExtension()
+init = _instance.init
+listplugins = _instance.listplugins
+get_metadata = _instance.get_metadata
+run = _instance.run
+runbatch = _instance.runbatch
+help = _instance.help
@@ -60,7 +60,9 @@ class TripleoCommonHealthcheckExtension(BaseExtension):
         command = "sh %s " % plugin["plugin"]
 
         # Call exec to run plugin
-        returncode, out, err = risu.execonshell(filename=command)
+        returncode, out, err = risu.execonshell(
+            filename=command, timeout=risu.plugintimeout(plugin)
+        )
 
         # Do formatting of results to adjust return codes to risu standards
         if returncode == 1:
@@ -0,0 +1,562 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Precomputed sosreport facts for Risu plugins
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+"""
+Precomputed sosreport facts.
+
+Most bash plugins call helpers from ``common.d`` like ``discover_os``
+or ``discover_osp_version`` that compute the same answer again in each
+plugin process, forking several awk/grep/cut commands each time.
+
+This module computes those answers once per sosreport, reproducing the
+output of the bash helpers, so they can be exported to the plugins as
+``RISU_FACT_*`` environment variables that the helpers check first.
+
+Facts that cannot be reproduced exactly (for example when the helper
+would print an error) are not exported and helpers compute them as
+they always did.
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+
+LOG = logging.getLogger("risu.facts")
+
+# Prefix of exported facts
+PREFIX = "RISU_FACT_"
+
+# Variable holding the root, live and tmp values facts were computed for
+KEY = "RISU_FACTS_KEY"
+
+# Release codenames as in discover_rhrelease
+RHRELEASES = {
+    "Plow": "9",
+    "Ootpa": "8",
+    "Maipo": "7",
+    "Santiago": "6",
+    "Tikanga": "5",
+    "Nahant": "4",
+    "Taroon": "3",
+}
+
+# Package version prefixes to OSP releases as in __osp_version_with_*
+OSP_VERSIONS = [
+    (
+        "openstack-nova-common",
+        [
+            ("2014.", 6),
+            ("2015.", 7),
+            ("12.", 8),
+            ("13.", 9),
+            ("14.", 10),
+            ("15.", 11),
+            ("16.", 12),
+            ("17.", 13),
+            ("18.", 14),
+            ("19.", 15),
+        ],
+    ),
+    (
+        "openstack-cinder",
+        [
+            ("2014.", 6),
+            ("2015.", 7),
+            ("7.", 8),
+            ("8.", 9),
+            ("9.", 10),
+            ("10.", 11),
+            ("11.", 12),
+            ("12.", 13),
+            ("13.", 14),
+            ("14.", 15),
+        ],
+    ),
+    (
+        "openstack-neutron",
+        [
+            ("2014.", 6),
+            ("2015.", 7),
+            ("7.", 8),
+            ("8.", 9),
+            ("9.", 10),
+            ("10.", 11),
+            ("11.", 12),
+            ("12.", 13),
+            ("13.", 14),
+            ("14.", 15),
+        ],
+    ),
+]
+
+
+def readlines(filename):
+    """
+    Reads lines of a file like grep/awk would
+    :param filename: file to read
+    :return: list of lines without line terminator or None if missing
+    """
+    try:
+        with open(filename, "rb") as f:
+            content = f.read().decode("utf-8", "replace")
+    except (IOError, OSError):
+        return None
+    lines = content.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def words(text):
+    """
+    Joins words of text like an unquoted 'echo ${VAR}'
+    :param text: text to split
+    :return: words joined by single spaces
+    """
+    return " ".join(text.split())
+
+
+def cut(text, delimiter, first, last=None):
+    """
+    Selects fields like 'cut -d delimiter -f first-last' on a line
+    :param text: line to process
+    :param delimiter: field delimiter
+    :param first: first field (1 based)
+    :param last: last field, None for all remaining ones
+    :return: selected fields
+    """
+    if delimiter not in text:
+        return text
+    return delimiter.join(text.split(delimiter)[first - 1 : last])
+
+
+def awkfield(lines, key):
+    """
+    Prints second field of lines whose first one is key like
+    awk -F "=" '$1==key {print $2}' | tr -d '"'
+    :param lines: lines to process
+    :param key: value for the first field
+    :return: output without trailing newlines
+    """
+    values = []
+    for line in lines:
+        fields = line.split("=")
+        if fields[0] == key:
+            values.append(fields[1] if len(fields) > 1 else "")
+    return "\n".join(values).replace('"', "").rstrip("\n")
+
+
+def discover_os(root):
+    """
+    Computes discover_os output
+    :param root: sosreport root ("" on live)
+    :return: OS family
+    """
+    lines = readlines("%s/etc/os-release" % root)
+    if lines is not None:
+        if any(re.match("id_like", line, re.IGNORECASE) for line in lines):
+            system = awkfield(lines, "ID_LIKE")
+        else:
+            system = awkfield(lines, "ID")
+    elif os.path.isfile("%s/etc/redhat-release" % root):
+        system = "fedora"
+    elif os.path.isfile("%s/etc/debian_version" % root):
+        system = "debian"
+    else:
+        system = ""
+
+    if "fedora" in system.lower():
+        system = "fedora"
+    elif "debian" in system.lower():
+        system = "debian"
+    return system
+
+
+def discover_release(root):
+    """
+    Computes discover_release output
+    :param root: sosreport root ("" on live)
+    :return: major VERSION_ID or "0" if there's no os-release
+    """
+    lines = readlines("%s/etc/os-release" % root)
+    if lines is None:
+        return "0"
+    versions = [
+        cut(cut(line, "=", 2).replace('"', ""), ".", 1, 1)
+        for line in lines
+        if line.startswith("VERSION_ID=")
+    ]
+    return words("\n".join(versions))
+
+
+def discover_osbrand(root):
+    """
+    Computes discover_osbrand output
+    :param root: sosreport root ("" on live)
+    :return: ID from os-release or "0" if there's no os-release
+    """
+    lines = readlines("%s/etc/os-release" % root)
+    if lines is None:
+        return "0"
+    brands = [
+        cut(line, "=", 2).replace('"', "") for line in lines if line.startswith("ID=")
+    ]
+    return words("\n".join(brands))
+
+
+def discover_rhrelease(root):
+    """
+    Computes discover_rhrelease output
+    :param root: sosreport root ("" on live)
+    :return: major release from codename or "0"
+    """
+    lines = readlines("%s/etc/redhat-release" % root)
+    if lines is None:
+        return "0"
+    codenames = []
+    for line in lines:
+        match = re.search(r"\(.*\)", line)
+        if match:
+            codenames.append(match.group(0).replace("(", "").replace(")", ""))
+    return RHRELEASES.get("\n".join(codenames).rstrip("\n"), "0")
+
+
+def first_file_available(*filenames):
+    """
+    Computes first_file_available output
+    :param filenames: candidate files
+    :return: first existing file or ""
+    """
+    for filename in filenames:
+        if os.path.isfile(filename):
+            return words(filename)
+    return ""
+
+
+def journal(root, live, tmp, journalctl=None):
+    """
+    Locates journal file the same way common.d/00-core.sh does,
+    generating it on live mode
+    :param root: sosreport root
+    :param live: live mode
+    :param tmp: temporary folder for the execution
+    :param journalctl: journalctl binary, None if not available
+    :return: journal file path or "" if there is none
+    """
+    if not live:
+        return first_file_available(
+            "%s/sos_commands/logs/journalctl_--no-pager_--boot" % root,
+            "%s/sos_commands/logs/journalctl_--all_--this-boot_--no-pager" % root,
+        )
+
+    filename = "%s/journalctl_--no-pager_--boot" % tmp
+    if not os.path.isfile(filename):
+        with open(filename, "wb") as f:
+            if journalctl:
+                subprocess.call(
+                    [journalctl, "--no-pager", "--boot"],
+                    stdout=f,
+                    stderr=subprocess.PIPE,
+                )
+    return filename
+
+
+def rpms(root, live, rpm=None):
+    """
+    Gets installed rpms as used by is_rpm
+    :param root: sosreport root
+    :param live: live mode
+    :param rpm: rpm binary, None if not available
+    :return: list of package names with version or None if not available
+    """
+    if live:
+        if not rpm:
+            return None
+        try:
+            p = subprocess.Popen(
+                [rpm, "-qa"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            out = p.communicate()[0]
+        except (IOError, OSError):
+            return None
+        if p.returncode != 0:
+            return None
+        return out.decode("utf-8", "replace").split()
+
+    lines = readlines("%s/installed-rpms" % root)
+    if lines is None:
+        return None
+    return [line.split()[0] if line.split() else "" for line in lines]
+
+
+def is_rpm(packages, name):
+    """
+    Computes is_rpm output
+    :param packages: list returned by rpms()
+    :param name: package name
+    :return: list of matching packages
+    """
+    regexp = re.compile("^%s-[0-9]" % re.escape(name))
+    return [package for package in packages if regexp.match(package)]
+
+
+def debs(root, live, dpkg=None):
+    """
+    Gets installed debs as used by is_dpkg
+    :param root: sosreport root
+    :param live: live mode
+    :param dpkg: dpkg binary, None if not available
+    :return: list of (name, version) or None if not available
+    """
+    if live:
+        if not dpkg:
+            return None
+        try:
+            p = subprocess.Popen(
+                [dpkg, "-l"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            out = p.communicate()[0]
+        except (IOError, OSError):
+            return None
+        lines = [
+            line
+            for line in out.decode("utf-8", "replace").split("\n")
+            if line.startswith("ii")
+        ]
+    else:
+        lines = readlines("%s/installed-debs" % root)
+        if lines is None:
+            return None
+
+    packages = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) > 2:
+            packages.append((fields[1], fields[2]))
+    return packages
+
+
+def rpmindex(packages):
+    """
+    Indexes rpms by every name is_rpm would match them with
+    :param packages: list returned by rpms()
+    :return: dict with list of packages for each name
+    """
+    index = {}
+    for package in packages:
+        # 'name-1compat-2.0-1' is matched by 'name' and 'name-1compat'
+        for match in re.finditer("(?=-[0-9])", package):
+            if match.start() > 0:
+                index.setdefault(package[: match.start()], []).append(package)
+    return index
+
+
+def debindex(packages):
+    """
+    Indexes debs by name as is_dpkg looks them up
+    :param packages: list returned by debs()
+    :return: dict with list of versions for each name
+    """
+    index = {}
+    for name, version in packages:
+        index.setdefault(name, []).append(version)
+    return index
+
+
+def latest(index, sort="sort"):
+    """
+    Finds latest value for each name as 'sort -V | tail -1' would
+    :param index: dict returned by rpmindex() or debindex()
+    :param sort: sort binary
+    :return: dict with latest value for each name or None if sort fails
+    """
+    values = sorted(set(value for found in index.values() for value in found))
+    try:
+        p = subprocess.Popen(
+            [sort, "-V"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        out = p.communicate(
+            "".join("%s\n" % value for value in values).encode("utf-8")
+        )[0]
+    except (IOError, OSError):
+        return None
+    if p.returncode != 0:
+        return None
+
+    # One sort for all values gives the same order as sorting each name
+    rank = dict(
+        (value, position)
+        for position, value in enumerate(out.decode("utf-8").split("\n"))
+    )
+    return dict(
+        (name, max(found, key=lambda value: rank[value]))
+        for name, found in index.items()
+    )
+
+
+def plain(name):
+    """
+    Checks name can be looked up in an index like the '^[[:alnum:]_-]+$' check
+    of pkg_index
+    :param name: package name
+    :return: True if name only has alphanumeric characters, '_' or '-'
+    """
+    return name != "" and all(char.isalnum() or char in "_-" for char in name)
+
+
+def writeindex(dirname, index, sort="sort"):
+    """
+    Writes package index as a folder with one file per package name holding
+    its latest version followed by all of them, one per line
+    :param dirname: folder to create
+    :param index: dict returned by rpmindex() or debindex()
+    :param sort: sort binary
+    :return: dirname or None if index could not be written
+    """
+    index = dict((name, found) for name, found in index.items() if plain(name))
+    versions = latest(index, sort=sort)
+    if versions is None:
+        return None
+
+    # Index from a previous sosreport analyzed with the same tmp folder
+    if os.path.isdir(dirname):
+        shutil.rmtree(dirname)
+    os.mkdir(dirname)
+    for name, found in index.items():
+        with open(os.path.join(dirname, name), "w") as f:
+            f.write("%s\n" % versions[name])
+            for value in found:
+                f.write("%s\n" % value)
+    return dirname
+
+
+def discover_osp_version(packages):
+    """
+    Computes discover_osp_version output for a RHEL family system
+    :param packages: list returned by rpms()
+    :return: OSP release or "0"
+    """
+    for name, versions in OSP_VERSIONS:
+        installed = "\n".join(is_rpm(packages, name))
+        for prefix, release in versions:
+            if installed.startswith("%s-%s" % (name, prefix)):
+                return "%s" % release
+    return "0"
+
+
+def discover_ocp_minor(packages):
+    """
+    Computes discover_ocp_minor output
+    :param packages: list returned by rpms()
+    :return: OCP version or "0"
+    """
+    for name, field in [("atomic-openshift", 3), ("atomic-openshift-node", 4)]:
+        installed = is_rpm(packages, name)
+        if installed:
+            installed = words("\n".join(installed))
+            return cut(cut(installed, "-", field, field), ".", 1, 3)
+    return "0"
+
+
+def getfacts(root, live, tmp, journalctl=None, rpm=None, dpkg=None):
+    """
+    Computes facts for a sosreport
+    :param root: sosreport root ("" on live)
+    :param live: live mode
+    :param tmp: temporary folder for the execution
+    :param journalctl: journalctl binary for live mode
+    :param rpm: rpm binary for live mode
+    :param dpkg: dpkg binary for live mode
+    :return: dict with facts using their variable name
+    """
+    facts = {
+        "OS": discover_os(root),
+        "RELEASE": discover_release(root),
+        "RHRELEASE": discover_rhrelease(root),
+        "OSBRAND": discover_osbrand(root),
+        "JOURNAL": journal(root, live, tmp, journalctl=journalctl),
+        # Seconds since epoch for 'now' in date helpers
+        "NOW": "%d" % time.time(),
+    }
+
+    if not live:
+        facts["SYSTEMCTL_ACTIVE"] = first_file_available(
+            "%s/sos_commands/systemd/systemctl_list-units" % root,
+            "%s/sos_commands/systemd/systemctl_list-units_--all" % root,
+        )
+        facts["SYSTEMCTL_ENABLED"] = first_file_available(
+            "%s/sos_commands/systemd/systemctl_status_--all" % root,
+            "%s/sos_commands/systemd/systemctl_list-unit-files" % root,
+        )
+        facts["SYSTEMCTL_RUNNING"] = facts["SYSTEMCTL_ACTIVE"]
+
+    packages = rpms(root, live, rpm=rpm)
+    if packages is not None:
+        # One package per line, in the same order as the source
+        filename = os.path.join(tmp, "rpms")
+        with open(filename, "w") as f:
+            for package in packages:
+                f.write("%s\n" % package)
+        facts["RPMS"] = filename
+
+        index = writeindex(os.path.join(tmp, "rpms.index"), rpmindex(packages))
+        if index is not None:
+            facts["RPM_INDEX"] = index
+
+        facts["OCP_MINOR"] = discover_ocp_minor(packages)
+        if facts["OS"] == "fedora":
+            facts["OSP_VERSION"] = discover_osp_version(packages)
+    elif live:
+        # is_rpm finds nothing without rpm
+        facts["OCP_MINOR"] = "0"
+
+    packages = debs(root, live, dpkg=dpkg)
+    if packages is not None:
+        index = writeindex(os.path.join(tmp, "debs.index"), debindex(packages))
+        if index is not None:
+            facts["DPKG_INDEX"] = index
+
+    if facts["OS"] not in ["fedora", "debian"]:
+        # is_pkg finds nothing, so nothing matches
+        facts["OSP_VERSION"] = "0"
+    elif facts["OS"] == "debian" and (
+        live or os.path.isfile("%s/installed-debs" % root)
+    ):
+        # is_dpkg only returns versions that never match package names
+        facts["OSP_VERSION"] = "0"
+
+    return dict((PREFIX + name, value) for name, value in facts.items())
+
+
+def export(environ, root, live, tmp, journalctl=None, rpm=None, dpkg=None):
+    """
+    Computes facts and stores them in environment replacing older ones
+    :param environ: environment dictionary to update (os.environ)
+    :param root: sosreport root ("" on live)
+    :param live: live mode
+    :param tmp: temporary folder for the execution
+    :param journalctl: journalctl binary for live mode
+    :param rpm: rpm binary for live mode
+    :param dpkg: dpkg binary for live mode
+    :return: dict with facts exported
+    """
+    for name in list(environ):
+        if name.startswith(PREFIX):
+            del environ[name]
+
+    facts = getfacts(root, live, tmp, journalctl=journalctl, rpm=rpm, dpkg=dpkg)
+    environ.update(facts)
+    environ[KEY] = "%s:%s:%s" % (root, 1 if live else 0, tmp)
+    LOG.debug("Exported facts: %s", facts)
+    return facts
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Discovery and analysis of sosreports for risu --find
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+"""
+Discovery and analysis of many sosreports for ``risu.py --find``.
+
+Results saved by risu are found walking the folder tree without hashing
+nor reading metadata of the files found, and without entering the
+folders of the sosreports themselves.  Each sosreport found is then
+analyzed again in a bounded set of worker processes, giving back each
+report as soon as it's ready.
+"""
+
+from __future__ import print_function
+
+import logging
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import traceback
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+LOG = logging.getLogger("risu.fleet")
+
+# Name of the results saved by risu in each sosreport
+RESULTS = "risu.json"
+
+# Names of the results in any of the formats they're saved with
+RESULTSFILES = set([RESULTS, RESULTS + ".gz"])
+
+# Folders of a sosreport (or of the root of a system) that never hold saved
+# results of other sosreports
+SOSREPORT_FOLDERS = set(
+    [
+        "boot",
+        "dev",
+        "etc",
+        "lib",
+        "lib64",
+        "proc",
+        "run",
+        "sos_commands",
+        "sos_logs",
+        "sos_reports",
+        "sos_strings",
+        "sys",
+        "usr",
+        "var",
+    ]
+)
+
+
+def issosreport(filenames):
+    """
+    Checks if a folder is a sosreport (or was analyzed as one)
+    :param filenames: files and folders in the folder
+    :return: True if folder has saved results or sosreport commands
+    """
+    return hasresults(filenames) or "sos_commands" in filenames
+
+
+def hasresults(filenames):
+    """
+    Checks if a folder has results saved by risu in any format
+    :param filenames: files in the folder
+    :return: True if folder has risu.json or risu.json.gz
+    """
+    return not RESULTSFILES.isdisjoint(filenames)
+
+
+def findresults(root):
+    """
+    Finds folders with results saved by risu
+    :param root: folder to start looking at
+    :return: sorted list of folders with a risu.json or risu.json.gz file
+    """
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=False):
+        if hasresults(filenames):
+            paths.append(dirpath)
+        if issosreport(filenames) or issosreport(dirnames):
+            dirnames[:] = [
+                dirname for dirname in dirnames if dirname not in SOSREPORT_FOLDERS
+            ]
+    return sorted(paths)
+
+
+def split(jobs, cpus):
+    """
+    Splits a CPU budget between sosreports and plugins of each sosreport
+    :param jobs: number of sosreports to analyze
+    :param cpus: total number of processes to use
+    :return: (sosreports analyzed at once, plugin processes for each one)
+    """
+    cpus = max(1, cpus)
+    workers = max(1, min(jobs, cpus))
+    return workers, max(1, cpus // workers)
+
+
+def _context(function):
+    """
+    Gets multiprocessing context able to run function in workers
+    :param function: function to call for each sosreport
+    :return: multiprocessing context or None if it can't run there
+    """
+    if not hasattr(mp, "get_context"):
+        return mp if sys.platform != "win32" else None
+
+    if "fork" in mp.get_all_start_methods():
+        return mp.get_context("fork")
+
+    try:
+        pickle.dumps(function)
+    except Exception:
+        return None
+    return mp.get_context()
+
+
+def _worker(tasks, results, function, kwargs):
+    """
+    Runs function for each path in tasks until a None is found
+    :param tasks: queue of paths to analyze
+    :param results: queue for (path, result, error) tuples
+    :param function: function to call with path keyword argument
+    :param kwargs: additional keyword arguments for function
+    """
+    for path in iter(tasks.get, None):
+        try:
+            results.put((path, function(path=path, **kwargs), None))
+        except Exception:
+            results.put((path, None, traceback.format_exc()))
+
+
+def analyze(paths, function, workers=1, **kwargs):
+    """
+    Runs function for each path in worker processes
+    :param paths: paths to analyze
+    :param function: function to call with path keyword argument (dorisu)
+    :param workers: maximum number of paths analyzed at once
+    :param kwargs: additional keyword arguments for function
+    :return: generator of (path, result, error) in completion order, error
+             being None or the traceback of the failure
+    """
+    paths = list(paths)
+    workers = max(1, min(workers, len(paths)))
+
+    context = _context(function) if workers > 1 else None
+    if context is None:
+        for path in paths:
+            try:
+                yield path, function(path=path, **kwargs), None
+            except Exception:
+                yield path, None, traceback.format_exc()
+        return
+
+    LOG.debug("Analyzing %s paths with %s workers", len(paths), workers)
+
+    tasks = context.Queue()
+    results = context.Queue()
+    for path in paths:
+        tasks.put(path)
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [
+        context.Process(target=_worker, args=(tasks, results, function, kwargs))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    pending = set(paths)
+    try:
+        while pending:
+            try:
+                path, output, error = results.get(timeout=1)
+            except queue.Empty:
+                if any(process.is_alive() for process in processes):
+                    continue
+                # Workers are gone, only what's already queued can arrive
+                try:
+                    path, output, error = results.get(timeout=1)
+                except queue.Empty:
+                    break
+            pending.discard(path)
+            yield path, output, error
+    finally:
+        for process in processes:
+            if pending and process.is_alive():
+                process.terminate()
+            process.join()
+
+    for path in sorted(pending):
+        yield path, None, "Worker exited before finishing the analysis"
@@ -41,7 +41,7 @@ def run(data, quiet=False, options=None):  # do not edit this line
     datatoadd = []
 
     # Loop over plugin id's in data
-    faradayids = risu.getids(include=["faraday/positive", "faraday/negative"])
+    faradayids = set(risu.getids(include=["faraday/positive", "faraday/negative"]))
 
     for pluginid in data:
         if data[pluginid]["id"] in faradayids:
@@ -64,12 +64,13 @@ def run(data, quiet=False, options=None):  # do not edit this line
             for pair in err.split(";"):
                 if pair != "":
                     # For each value split and fake plugin entry
-                    newid = "%s-%s" % (id, risu.calcid(string=pair.split(":")[0]))
+                    key = pair.partition(":")[0]
+                    newid = "%s-%s" % (id, risu.calcid(string=key))
                     update = {
                         "id": newid,
-                        "description": "%s: %s" % (desc, pair.split(":")[0]),
-                        "long_name": "%s: %s" % (ln, pair.split(":")[0]),
-                        "plugin": "%s-%s" % (plugpath, pair.split(":")[0]),
+                        "description": "%s: %s" % (desc, key),
+                        "long_name": "%s: %s" % (ln, key),
+                        "plugin": "%s-%s" % (plugpath, key),
                         "name": "Faraday: %s" % name,
                         "kb": kb,
                     }
@@ -34,7 +34,7 @@ def plugidsforprofile(profile, plugins):
     """
     Gets plugin id's related with profile includes/excludes
     :param profile: profile file to open
-    :param plugins: plugins in risu execution
+    :param plugins: plugins in risu execution or registry built for them
     :return: array of id's
     """
     # Open Profile definition for read and fill filters for plugins
@@ -46,7 +46,10 @@ def plugidsforprofile(profile, plugins):
                 include.append(line[1:].strip())
             if re.match(r"\A\-.*", line):
                 exclude.append(line[1:].strip())
-    ids = risu.getids(plugins=plugins, include=include, exclude=exclude)
+    if isinstance(plugins, list):
+        ids = risu.getids(plugins=plugins, include=include, exclude=exclude)
+    else:
+        ids = plugins.getids(include=include, exclude=exclude)
 
     return ids
 
@@ -65,6 +68,11 @@ def run(data, quiet=False, options=None):  # do not edit this line
         plugin = {"plugin": data[item]["plugin"], "id": data[item]["id"]}
         plugins.append(plugin)
 
+    # Index plugins once for all the profiles
+    registry = risu.getregistry(plugins=plugins)
+    if registry is None:
+        registry = plugins
+
     if options and options.extraplugintree:
         folders = [pluginsdir, os.path.join(options.extraplugintree, extension)]
     else:
@@ -90,7 +98,7 @@ def run(data, quiet=False, options=None):  # do not edit this line
     )
 
     for item in profiles:
-        uid = risu.getids(plugins=[item])[0]
+        uid = item["id"]
         profile = item["plugin"]
 
         plugin = dict(item)
@@ -114,22 +122,15 @@ def run(data, quiet=False, options=None):  # do not edit this line
             "subcategory": subcategory,
         }
 
+        headers = risu.getheaders(
+            filename=plugin["plugin"],
+            keys=["description", "long_name", "bugzilla", "priority"],
+        )
         metadata = {
-            "description": risu.regexpfile(
-                filename=plugin["plugin"], regexp=r"\A# description:"
-            )[14:].strip(),
-            "long_name": risu.regexpfile(
-                filename=plugin["plugin"], regexp=r"\A# long_name:"
-            )[12:].strip(),
-            "bugzilla": risu.regexpfile(
-                filename=plugin["plugin"], regexp=r"\A# bugzilla:"
-            )[11:].strip(),
-            "priority": int(
-                risu.regexpfile(filename=plugin["plugin"], regexp=r"\A# priority:")[
-                    11:
-                ].strip()
-                or 0
-            ),
+            "description": headers.get("description", ""),
+            "long_name": headers.get("long_name", ""),
+            "bugzilla": headers.get("bugzilla", ""),
+            "priority": int(headers.get("priority", "") or 0),
         }
         data[uid].update(metadata)
 
@@ -141,7 +142,7 @@ def run(data, quiet=False, options=None):  # do not edit this line
 
         # Start asembling data for the plugins relevant for profile
         data[uid]["result"]["err"] = ""
-        ids = plugidsforprofile(profile=profile, plugins=plugins)
+        ids = plugidsforprofile(profile=profile, plugins=registry)
 
         new_results = []
         overallitems = []
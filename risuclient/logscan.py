@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Single-pass multi-pattern log scanning for Risu
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+"""
+Single-pass multi-pattern log scanning.
+
+Lots of plugins only check if one extended regular expression (as used
+by ``grep -E``) appears in a set of log files.  Running them one by one
+reads every log once per plugin.
+
+This module combines all the patterns into a single ``grep -E -f``
+invocation so each log is read just once, and then attributes the
+(usually very few) matching lines back to the individual patterns.
+
+``matchfile`` does the same for python regular expressions matched at
+the start of lines, as used by node-problem-detector rules.
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+
+LOG = logging.getLogger("risu.logscan")
+
+# POSIX character classes supported by grep -E but not by python's re
+POSIX_CLASSES = {
+    "[:alnum:]": "a-zA-Z0-9",
+    "[:alpha:]": "a-zA-Z",
+    "[:blank:]": r" \t",
+    "[:digit:]": "0-9",
+    "[:lower:]": "a-z",
+    "[:punct:]": r"!-/:-@\[-`{-~",
+    "[:space:]": r" \t\n\r\f\v",
+    "[:upper:]": "A-Z",
+    "[:xdigit:]": "0-9A-Fa-f",
+}
+
+
+class ScanTimeout(Exception):
+    """Scan did not complete in the time given"""
+
+
+# Group references change meaning once expressions are combined and
+# inline flags would apply to all of them
+UNCOMBINABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|^\(\?[aiLmsux]+\)")
+
+
+def matchfile(filename, patterns):
+    """
+    Checks file once for several python regular expressions
+    :param filename: file to read
+    :param patterns: dict of key: regular expression matched at start of lines
+    :return: dict of key: first line matching the expression
+    :raises re.error: if any of the expressions is not valid
+
+    Same as calling regexpfile for each expression, but the file is read
+    just once and lines not matching a combined expression are skipped
+    without checking the expressions one by one.
+    """
+    compiled = dict(
+        (key, re.compile(regexp)) for key, regexp in patterns.items() if regexp
+    )
+
+    # Expressions with group references or flags are always checked on their own
+    combinable = [
+        key for key in compiled if not UNCOMBINABLE.search(compiled[key].pattern)
+    ]
+    always = [key for key in compiled if key not in combinable]
+    try:
+        combined = re.compile(
+            "|".join("(?:%s)" % compiled[key].pattern for key in combinable)
+        )
+    except re.error:
+        combined = None
+        always = list(compiled)
+
+    found = {}
+    pending = set(compiled)
+    try:
+        with open(filename, "r") as f:
+            for line in f:
+                if combined is not None and combinable and combined.match(line):
+                    keys = combinable + always
+                else:
+                    keys = always
+                for key in keys:
+                    if key in pending and compiled[key].match(line):
+                        found[key] = line
+                        pending.discard(key)
+                if not pending:
+                    break
+    except (IOError, OSError):
+        pass
+
+    return found
+
+
+def compile_ere(regexp, ignorecase=True):
+    """
+    Compiles a grep extended regular expression into a python one
+    :param regexp: extended regular expression
+    :param ignorecase: match case insensitive like grep -i
+    :return: compiled regular expression
+    :raises re.error: if the expression cannot be expressed in python
+    """
+    for posix, python in POSIX_CLASSES.items():
+        regexp = regexp.replace(posix, python)
+
+    # GNU word boundaries
+    regexp = regexp.replace(r"\<", r"\b").replace(r"\>", r"\b")
+
+    flags = re.IGNORECASE if ignorecase else 0
+    return re.compile(regexp, flags)
+
+
+class LogScanner(object):
+    """
+    Scans files once for several extended regular expressions.
+
+    Patterns that python cannot compile are reported in ``unsupported``
+    and never scanned, so callers can run them the traditional way.
+
+    Attributes:
+        patterns (dict): key: extended regular expression to look for
+        ignorecase (bool): Match case insensitive like grep -i
+        unsupported (set): keys whose expression could not be compiled
+    """
+
+    def __init__(self, patterns, ignorecase=True, grep="grep"):
+        """
+        Initialize scanner.
+
+        Args:
+            patterns (dict): key: extended regular expression
+            ignorecase (bool): Match case insensitive (default: True)
+            grep (str): grep binary used for the combined pass
+        """
+        self.patterns = {}
+        self.ignorecase = ignorecase
+        self.grep = grep
+        self.unsupported = set()
+        self._compiled = {}
+
+        for key, regexp in patterns.items():
+            if not regexp:
+                # Empty expressions match everything in grep
+                self.unsupported.add(key)
+                continue
+            try:
+                self._compiled[key] = compile_ere(regexp, ignorecase=ignorecase)
+            except re.error as e:
+                LOG.debug("Cannot compile %s for scanning: %s", regexp, str(e))
+                self.unsupported.add(key)
+                continue
+            self.patterns[key] = regexp
+
+    def scan(self, files, timeout=None):
+        """
+        Scans files for all the patterns in one pass.
+
+        Args:
+            files (list): Files to read, missing ones are ignored
+            timeout (int, optional): Seconds the scan can take
+
+        Returns:
+            set: keys of the patterns found in any of the files
+
+        Raises:
+            ScanTimeout: if scan takes longer than timeout
+        """
+        files = [
+            filename for filename in files if filename and os.path.isfile(filename)
+        ]
+
+        if not files or not self.patterns:
+            return set()
+
+        deadline = time.time() + timeout if timeout else None
+        try:
+            return self._scan_grep(files, timeout=timeout)
+        except (IOError, OSError) as e:
+            LOG.debug("Falling back to python scanning: %s", str(e))
+            return self._scan_python(files, deadline=deadline)
+
+    def _attribute(self, lines, found):
+        """
+        Checks lines against the patterns not found yet.
+
+        Args:
+            lines (iterable): lines to check
+            found (set): keys already found, updated in place
+
+        Returns:
+            bool: True once every pattern has been found
+        """
+        pending = [key for key in self._compiled if key not in found]
+        for line in lines:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8", "replace")
+            for key in list(pending):
+                if self._compiled[key].search(line):
+                    found.add(key)
+                    pending.remove(key)
+            if not pending:
+                return True
+        return False
+
+    def _scan_grep(self, files, timeout=None):
+        """
+        Prefilter lines with a single grep -E -f and attribute them.
+
+        Args:
+            files (list): Files to read
+            timeout (int, optional): Seconds before killing grep
+
+        Returns:
+            set: keys of the patterns found
+
+        Raises:
+            ScanTimeout: if grep was killed after timeout
+        """
+        found = set()
+        timedout = []
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".patterns") as fd:
+            fd.write("\n".join(self.patterns.values()))
+            fd.write("\n")
+            fd.flush()
+
+            command = [self.grep, "-a", "-h", "-E", "-f", fd.name]
+            if self.ignorecase:
+                command.append("-i")
+            command.extend(files)
+
+            # C locale keeps grep on its fast byte oriented matcher
+            env = dict(os.environ)
+            env["LC_ALL"] = "C"
+
+            p = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=env,
+            )
+
+            def expire():
+                timedout.append(True)
+                p.kill()
+
+            timer = threading.Timer(timeout, expire) if timeout else None
+            if timer:
+                timer.daemon = True
+                timer.start()
+            try:
+                self._attribute(p.stdout, found)
+            finally:
+                if timer:
+                    timer.cancel()
+                p.stdout.close()
+                if p.poll() is None:
+                    # Everything found already, no need to read the rest
+                    p.kill()
+                err = p.stderr.read()
+                p.stderr.close()
+                p.wait()
+
+        if timedout:
+            raise ScanTimeout("grep killed after %s seconds" % timeout)
+
+        # grep uses rc 2 for errors, like an expression it does not understand
+        if p.returncode == 2:
+            raise OSError(err.decode("utf-8", "replace").strip())
+
+        return found
+
+    def _scan_python(self, files, deadline=None):
+        """
+        Scan files line by line in python when grep is not available.
+
+        Args:
+            files (list): Files to read
+            deadline (float, optional): time.time() to give up scanning at
+
+        Returns:
+            set: keys of the patterns found
+
+        Raises:
+            ScanTimeout: if deadline passed before all files were read
+        """
+        found = set()
+        for filename in files:
+            if deadline is not None and time.time() > deadline:
+                raise ScanTimeout("scan not completed in time")
+            try:
+                with open(filename, "rb") as f:
+                    if self._attribute(f, found):
+                        break
+            except (IOError, OSError):
+                continue
+        return found
@@ -33,7 +33,7 @@ if ! is_lineinfile keystone-manage "${RISU_ROOT}/var/spool/cron/keystone"; then
 fi
 
 if [[ ${RISU_LIVE} == "1" ]]; then
-	NOW=$(date)
+	NOW=now
 else
 	is_required_file "${RISU_ROOT}/date"
 	NOW="$(cat ${RISU_ROOT}/date)"
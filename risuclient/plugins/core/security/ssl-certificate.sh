@@ -38,19 +38,25 @@ if [[ -z $cert_files ]]; then
 	exit ${RC_SKIPPED}
 fi
 
+# Expiration date of each certificate
+declare -A cert_enddates
+
 # Function to check certificate expiration
 check_cert_expiration() {
 	local cert_file="$1"
-	local current_date=$(date +%s)
+	date_to_epoch now
+	local current_date=${DATE_EPOCH}
 
 	# Get certificate expiration date
-	local exp_date=$(openssl x509 -in "$cert_file" -noout -enddate 2>/dev/null | cut -d'=' -f2)
+	local exp_date=${cert_enddates[$cert_file]}
 	if [[ -z $exp_date ]]; then
 		echo "Unable to read certificate expiration date: $cert_file" >&2
 		return 1
 	fi
 
-	local exp_epoch=$(date -d "$exp_date" +%s 2>/dev/null)
+	# Already converted with the dates of all the certificates
+	date_to_epoch "$exp_date" 2>/dev/null
+	local exp_epoch=${DATE_EPOCH}
 	if [[ -z $exp_epoch ]]; then
 		echo "Unable to parse certificate expiration date: $cert_file" >&2
 		return 1
@@ -117,6 +123,14 @@ check_cert_security() {
 	return $cert_flag
 }
 
+# Read expiration dates of all certificates to convert them at once
+for cert_file in $cert_files; do
+	if [[ -f $cert_file && $(stat -c%s "$cert_file" 2>/dev/null) -le 100000 ]]; then
+		cert_enddates[$cert_file]=$(openssl x509 -in "$cert_file" -noout -enddate 2>/dev/null | cut -d'=' -f2)
+	fi
+done
+dates_to_epoch "${cert_enddates[@]}"
+
 echo "Checking SSL certificates" >&2
 
 for cert_file in $cert_files; do
@@ -50,7 +50,7 @@ else
 	fi
 	if [[ ${OCPEOL[${DR}]} != "" ]]; then
 		if is_date_over_today "${OCPEOL[${DR}]}"; then
-			if are_dates_diff_over 180 "${OCPEOL[${DR}]}" "$(LC_ALL=C LANG=C date)"; then
+			if are_dates_diff_over 180 "${OCPEOL[${DR}]}" now; then
 				exit ${RC_OKAY}
 			else
 				echo $"Your OCP version is within the half-year period to become unsupported" >&2
@@ -52,7 +52,7 @@ else
 	else
 		if [[ ${RHOSEOL[${DR}]} != "" ]]; then
 			if is_date_over_today "${RHOSEOL[${DR}]}"; then
-				if are_dates_diff_over 360 "${RHOSEOL[${DR}]}" "$(LC_ALL=C LANG=C date)"; then
+				if are_dates_diff_over 360 "${RHOSEOL[${DR}]}" now; then
 					exit ${RC_OKAY}
 				else
 					echo $"Your system is within the year period to become unsupported" >&2
@@ -48,7 +48,7 @@ else
 			# Check first ELS
 			if is_date_over_today "${RHELELS[${DR}]}"; then
 				if is_date_over_today "${RHELEOL[${DR}]}"; then
-					if are_dates_diff_over 360 "${RHELEOL[${DR}]}" "$(LC_ALL=C LANG=C date)"; then
+					if are_dates_diff_over 360 "${RHELEOL[${DR}]}" now; then
 						exit ${RC_OKAY}
 					else
 						echo $"Your system is within the year period to become unsupported outside of ELS" >&2
@@ -18,14 +18,17 @@
 from __future__ import print_function
 
 import os
-import re
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Getting environment
 global root_path
 root_path = os.environ["RISU_ROOT"]
 
+# Log timeline is parsed once and shared by the plugins of the risu run
+sys.path.append(os.path.join(os.environ["RISU_BASE"], ".."))
+from risuclient import timeline
+
 # Defining some globals
 now = datetime.now()
 events = []
@@ -58,59 +61,6 @@ def exitrisu(code=False, msg=None):
     sys.exit(code)
 
 
-def gettime(line):
-    """
-    Extracts the timestamps off a regular syslog line
-    :param line: syslog line
-    """
-    mg = re.match(r"([a-zA-Z]{3})[\s]+([0-9]+)[\s]+([0-9]+):([0-9]+):([0-9]+)", line)
-    if mg is not None:
-        ts = (
-            mg.group(1)
-            + " "
-            + mg.group(2)
-            + " "
-            + mg.group(3)
-            + ":"
-            + mg.group(4)
-            + ":"
-            + mg.group(5)
-        )
-        thisyear = now.year
-        # With UTC, we can consider that now in 12h later
-        nnow = now + timedelta(hours=12)
-        while True:
-            # Prepending the year to the TS and parsing
-            tts = str(thisyear) + " " + ts
-            tsobj = datetime.strptime(tts, "%Y %b %d %H:%M:%S")
-            if tsobj < nnow:
-                # We're not in the future
-                return tsobj
-            # Let's try once more
-            thisyear -= 1
-
-    else:
-        mg = re.match(
-            r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})[\s|T]+([0-9]+):([0-9]+):([0-9]+)",
-            line,
-        )
-        if mg is not None:
-            return datetime.strptime(
-                mg.group(1)
-                + "-"
-                + mg.group(2)
-                + "-"
-                + mg.group(3)
-                + " "
-                + mg.group(4)
-                + ":"
-                + mg.group(5)
-                + ":"
-                + mg.group(6),
-                "%Y-%m-%d %H:%M:%S",
-            )
-
-
 def setcontext(context):
     """
     Sets the context to the latest event
@@ -224,18 +174,15 @@ def main():
 
     # Syslog parsing starts here
     try:
-        f = open(os.path.join(root_path, "var/log/messages"), "r")
-    except:
-        # Not needed but allows syntax checkers not to complain that f might not be defined
-        f = []
+        log = timeline.load(os.path.join(root_path, "var/log/messages"), now=now)
+    except (IOError, OSError):
+        # Not needed but allows syntax checkers not to complain that log might not be defined
+        log = None
         exitrisu(code=RC_SKIPPED, msg="Missing /var/log/messages")
 
-    for line in f:
-        # chomp
-        line = line.rstrip()
+    for ts, stopped, started, cmdline in log.events:
         # canary: journald is stopped
-        if re.match(".* Journal stopped$", line):
-            ts = gettime(line)
+        if stopped:
             events.append(Event("stop", ts))
             """
             if we are in the bootloader context,
@@ -245,16 +192,13 @@ def main():
                 setcontext("bootloader")
                 lastcontext = None
         # canary: journald is started
-        elif re.match(".* Journal started$", line) and lastcontext != "bootloader":
-            ts = gettime(line)
+        elif started and lastcontext != "bootloader":
             events.append(Event("start", ts))
         # canary: we are in the bootloader init
-        elif re.match(".* kernel: Command line: .*", line):
+        elif cmdline:
             lastcontext = "bootloader"
-            ts = gettime(line)
             events.append(Event("start", ts, "bootloader"))
 
-    f.close()
     if len(events) == 0:
         exitrisu(code=RC_SKIPPED, msg="No reboot found")
 
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Reading and writing of files with results of risu and magui
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+"""
+Reading and writing of files with results of risu and magui.
+
+Results are saved as ``{"metadata": {...}, "results": ...}`` either in
+the indented JSON format of ``risu.json`` or, for filenames ending in
+``.gz``, as compact JSON compressed with gzip.  Both layouts hold the
+same document, so files are read the same way whatever their format
+and can be converted from one to the other.
+
+Plain files get an index written next to them (``risu.json.idx``) with
+their metadata and, for results by plugin id (``risu.json``), the byte
+offsets of each result, so the metadata or the results of a few plugins
+can be read without parsing the whole file.
+"""
+
+from __future__ import print_function
+
+import gzip
+import io
+import json
+import os
+
+# Suffix of compressed results files
+COMPRESSED = ".gz"
+
+# First bytes of gzip files
+MAGIC = b"\x1f\x8b"
+
+# Speed matters more than size for files written on each run, level 6
+# only saves a few % more
+COMPRESSLEVEL = 1
+
+# Suffix of the index of plain results files
+INDEX = ".idx"
+
+# Bump when the content of the index changes
+VERSION = 1
+
+
+def iscompressed(filename):
+    """
+    Checks if results are to be written compressed to a file
+    :param filename: results file
+    :return: True if filename ends with .gz
+    """
+    return filename.endswith(COMPRESSED)
+
+
+def candidates(filename):
+    """
+    Gets the filenames results for filename may have been saved as
+    :param filename: results file in any of the formats
+    :return: list with filename and the same file in the other format
+    """
+    if iscompressed(filename):
+        return [filename, filename[: -len(COMPRESSED)]]
+    return [filename, filename + COMPRESSED]
+
+
+def locate(filename):
+    """
+    Finds the results saved for filename in any of the formats
+    :param filename: results file in any of the formats
+    :return: most recently modified of the existing files or None
+    """
+    found = None
+    newest = None
+    for candidate in candidates(filename):
+        try:
+            mtime = os.stat(candidate).st_mtime
+        except OSError:
+            continue
+        if newest is None or mtime > newest:
+            found = candidate
+            newest = mtime
+    return found
+
+
+def signature(filename):
+    """
+    Get signature used to detect changes on a results file
+    :param filename: results file
+    :return: [size, mtime_ns]
+    """
+    st = os.stat(filename)
+    return [st.st_size, getattr(st, "st_mtime_ns", st.st_mtime)]
+
+
+def selected(key, plugin, ids=None, include=None, exclude=None):
+    """
+    Checks if a result is for the plugins requested
+    :param key: id of the result, 'id-subid' for results split by hooks
+    :param plugin: plugin path of the result
+    :param ids: plugin id's requested (default: all)
+    :param include: keywords to include in plugin path, as in filterresults
+    :param exclude: keywords to exclude in plugin path, as in filterresults
+    :return: True if result is requested
+    """
+    if ids is not None and key.partition("-")[0] not in ids:
+        return False
+    plugin = plugin or ""
+    if include and not any(filters in plugin for filters in include):
+        return False
+    if exclude and any(filters in plugin for filters in exclude):
+        return False
+    return True
+
+
+class Index(object):
+    """
+    Offsets of the results of each plugin in a plain results file.
+
+    Attributes:
+        filename (str): results file
+        metadata (dict): metadata stored in the file
+        offsets (dict): id: [start, end, plugin path] of each result or
+                        None if results in the file are not by plugin id
+    """
+
+    def __init__(self, filename, metadata, offsets):
+        self.filename = filename
+        self.metadata = metadata
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets or {})
+
+    @property
+    def indexed(self):
+        """True if results can be read by plugin id"""
+        return self.offsets is not None
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read index of a results file if it's current for the file
+        :param filename: results file
+        :return: Index or None if there's no index or file changed since
+        """
+        try:
+            with open(filename + INDEX, "r") as f:
+                data = json.load(f)
+            if data["version"] != VERSION or data["signature"] != signature(filename):
+                return None
+            return cls(filename, data["metadata"], data["results"])
+        except (IOError, OSError, KeyError, TypeError, ValueError):
+            return None
+
+    def select(self, ids=None, include=None, exclude=None):
+        """
+        Get id's of the results for the plugins requested
+        :param ids: plugin id's, their 'id-subid' results are also selected
+        :param include: keywords to include in plugin path
+        :param exclude: keywords to exclude in plugin path
+        :return: list of id's of results
+        """
+        if ids is not None:
+            ids = set(ids)
+        return [
+            key
+            for key, offsets in self.offsets.items()
+            if selected(key, offsets[2], ids, include, exclude)
+        ]
+
+    def read(self, keys):
+        """
+        Read results from the file
+        :param keys: id's of the results to read
+        :return: dict of results by id, in file order
+        :raises ValueError: if results can't be read at their offsets
+        """
+        results = {}
+        with open(self.filename, "rb") as f:
+            for key in sorted(keys, key=lambda key: self.offsets[key][0]):
+                start, end = self.offsets[key][:2]
+                f.seek(start)
+                results[key] = json.loads(f.read(end - start).decode("UTF-8"))
+        return results
+
+
+def _indent(text, level):
+    """
+    Indents JSON text to be nested at level as json.dumps(indent=2) does
+    :param text: JSON text written with indent=2
+    :param level: nesting level
+    :return: indented text
+    """
+    return text.replace("\n", "\n" + "  " * level)
+
+
+def _encode(data):
+    """
+    Encodes data as json.dumps(data, indent=2), recording where each result is
+    :param data: data to encode
+    :return: (text, offsets) with offsets being id: [start, end, plugin path]
+             or None if data has no results by id
+    """
+    results = data.get("results") if isinstance(data, dict) else None
+    if (
+        not isinstance(results, dict)
+        or not results
+        or not all(isinstance(key, str) for key in data)
+        or not all(isinstance(key, str) for key in results)
+    ):
+        return json.dumps(data, indent=2), None
+
+    # ensure_ascii is on, so lengths of text are offsets in bytes
+    chunks = ["{"]
+    offset = 1
+    offsets = {}
+    separator = "\n  "
+    for key, value in data.items():
+        chunk = separator + json.dumps(key) + ": "
+        separator = ",\n  "
+        if key != "results":
+            chunk += _indent(json.dumps(value, indent=2), 1)
+            chunks.append(chunk)
+            offset += len(chunk)
+            continue
+
+        chunks.append(chunk + "{")
+        offset += len(chunk) + 1
+        inner = "\n    "
+        for pluginid, result in value.items():
+            chunk = inner + json.dumps(pluginid) + ": "
+            inner = ",\n    "
+            chunks.append(chunk)
+            offset += len(chunk)
+
+            chunk = _indent(json.dumps(result, indent=2), 2)
+            plugin = result.get("plugin") if isinstance(result, dict) else None
+            offsets[pluginid] = [offset, offset + len(chunk), plugin]
+            chunks.append(chunk)
+            offset += len(chunk)
+        chunks.append("\n  }")
+        offset += 4
+    chunks.append("\n}")
+
+    return "".join(chunks), offsets
+
+
+def _writeindex(filename, metadata, offsets):
+    """
+    Writes index of a plain results file next to it
+    :param filename: results file
+    :param metadata: metadata stored in the file
+    :param offsets: id: [start, end, plugin path] of each result or None
+    """
+    data = {
+        "version": VERSION,
+        "signature": signature(filename),
+        "metadata": metadata,
+        "results": offsets,
+    }
+    temp_file = "%s%s.%s.tmp" % (filename, INDEX, os.getpid())
+    try:
+        with open(temp_file, "w") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.rename(temp_file, filename + INDEX)
+    except (IOError, OSError):
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def load(filename, ids=None, include=None, exclude=None):
+    """
+    Reads results from a file in any of the formats
+    :param filename: file to read
+    :param ids: only read results of these plugin id's (default: all)
+    :param include: only read results of plugins matching keywords
+    :param exclude: do not read results of plugins matching keywords
+    :return: data stored in the file, with only the results requested
+    :raises IOError: if file can't be read
+    :raises ValueError: if file has no valid JSON
+    """
+    partial = ids is not None or include or exclude
+    if partial:
+        index = Index.load(filename)
+        if index is not None and index.indexed:
+            try:
+                results = index.read(index.select(ids, include, exclude))
+                return {"metadata": index.metadata, "results": results}
+            except (IOError, OSError, KeyError, ValueError):
+                pass
+
+    data = _load(filename)
+    if partial and isinstance(data.get("results"), dict):
+        if ids is not None:
+            ids = set(ids)
+        data["results"] = dict(
+            (key, value)
+            for key, value in data["results"].items()
+            if selected(
+                key,
+                value.get("plugin") if isinstance(value, dict) else None,
+                ids,
+                include,
+                exclude,
+            )
+        )
+    return data
+
+
+def metadata(filename):
+    """
+    Reads metadata of results from a file in any of the formats
+    :param filename: file to read
+    :return: metadata stored in the file, from its index when current
+    :raises IOError: if file can't be read
+    :raises ValueError: if file has no valid JSON
+    :raises KeyError: if file has no metadata
+    """
+    index = Index.load(filename)
+    if index is not None:
+        return index.metadata
+    return _load(filename)["metadata"]
+
+
+def _load(filename):
+    """
+    Reads all data from a file in any of the formats
+    :param filename: file to read
+    :return: data stored in the file
+    :raises IOError: if file can't be read
+    :raises ValueError: if file has no valid JSON
+    """
+    with open(filename, "rb") as f:
+        content = f.read()
+    if content[:2] == MAGIC:
+        try:
+            content = gzip.GzipFile(fileobj=io.BytesIO(content)).read()
+        except (IOError, OSError, EOFError) as e:
+            raise ValueError("Invalid compressed results in %s: %s" % (filename, e))
+    return json.loads(content.decode("UTF-8"))
+
+
+def dump(data, filename):
+    """
+    Writes results to a file, compressed if filename ends with .gz
+    :param data: data to write
+    :param filename: file to write
+    :raises IOError: if file can't be written
+    """
+    if not iscompressed(filename):
+        text, offsets = _encode(data)
+        with open(filename, "w") as fd:
+            fd.write(text)
+        if isinstance(data, dict) and "metadata" in data:
+            _writeindex(filename, data["metadata"], offsets)
+        return
+
+    content = json.dumps(data, separators=(",", ":")).encode("UTF-8")
+    with open(filename, "wb") as fd:
+        with gzip.GzipFile(
+            filename=os.path.basename(filename[: -len(COMPRESSED)]),
+            mode="wb",
+            fileobj=fd,
+            compresslevel=COMPRESSLEVEL,
+            mtime=0,
+        ) as gz:
+            gz.write(content)
+
+
+def convert(source, target):
+    """
+    Converts results from a file to another in the format of its name
+    :param source: file to read
+    :param target: file to write
+    :return: data converted
+    """
+    data = load(source)
+    dump(data, target)
+    return data
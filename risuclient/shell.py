@@ -38,6 +38,7 @@ import tempfile
 if sys.version_info >= (3, 4):
     # Handle  imp deprecation towards importlib
 
+    import importlib.machinery
     import importlib.util
 
     def dynamic_import(name, info):
@@ -100,22 +101,36 @@ except ImportError:
     requests = False
 
 import shutil
+import signal
 import subprocess
 import sys
 import time
 import traceback
 from itertools import groupby
 from multiprocessing import Pool, cpu_count
-from threading import Timer
+from threading import Lock, Thread, Timer
+
+# Resource accounting is not available on every platform
+try:
+    import resource
+except ImportError:
+    resource = None
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/" + "../"))
 
 LOG = logging.getLogger("risu")
 
+try:
+    from risuclient import resultsfile
+except ImportError:
+    import resultsfile
+
 # Import new modular components
 try:
     from risuclient import cache
     from risuclient import executor as risu_executor
+    from risuclient import facts
+    from risuclient import fleet
 
     HAVE_NEW_MODULES = True
 except ImportError:
@@ -133,6 +148,38 @@ if HAVE_NEW_MODULES:
         LOG.warning("Failed to initialize metadata cache: %s", str(e))
         _metadata_cache = None
 
+# Initialize plugin discovery index if available
+_plugin_index = None
+if HAVE_NEW_MODULES:
+    try:
+        _plugin_index = cache.PluginIndex()
+        LOG.debug("Plugin index initialized")
+    except Exception as e:
+        LOG.warning("Failed to initialize plugin index: %s", str(e))
+        _plugin_index = None
+
+# Initialize file hash cache if available
+_hash_cache = None
+if HAVE_NEW_MODULES:
+    try:
+        _hash_cache = cache.HashCache()
+        LOG.debug("Hash cache initialized")
+    except Exception as e:
+        LOG.warning("Failed to initialize hash cache: %s", str(e))
+        _hash_cache = None
+
+# Plugin registries built for getids lookups, keyed by extra plugin tree
+_plugin_registries = {}
+
+# Extension and hook modules imported: path: (mtime, module)
+_pymodules = {}
+
+# Seconds spent importing each extension or hook module: path: seconds
+_importtimes = {}
+
+# Extensions available, listed on first use
+_extensionlist = None
+
 # Where are we?
 global risudir
 global localedir
@@ -172,6 +219,9 @@ RC_FAILED = 20
 RC_SKIPPED = 30
 RC_INFO = 40
 
+# Seconds a plugin can run unless it defines its own '# timeout:' header
+PLUGIN_TIMEOUT = 30
+
 
 class bcolors:
     black = "\033[30m"
@@ -234,19 +284,38 @@ def getExtensions(folder=ExtensionFolder):
 
 def loadPymodules(Extension):
     """
-    Loads selected Extension
+    Loads selected Extension, importing it only once while it's not modified
     :param Extension: Extension to load
     :return: loader for Extension
     """
+    path = Extension["info"][1]
+    try:
+        mtime = os.path.getmtime(path)
+    except (IOError, OSError, TypeError):
+        mtime = None
+
+    cached = _pymodules.get(path)
+    if cached is not None and mtime is not None and cached[0] == mtime:
+        return cached[1]
 
-    return dynamic_import(Extension["name"], Extension["info"])
+    start = time.time()
+    module = dynamic_import(Extension["name"], Extension["info"])
+    _importtimes[path] = time.time() - start
+    _pymodules[path] = (mtime, module)
+    return module
 
 
-def initPymodules(extensions=getExtensions()):
+def initPymodules(extensions=None):
     """
     Initializes Extensions
+    :param extensions: Extensions to initialize (default: all in Extensions folder)
     :return: list of Extension modules initialized
     """
+    global _extensionlist
+    if extensions is None:
+        if _extensionlist is None:
+            _extensionlist = getExtensions()
+        extensions = _extensionlist
 
     exts = []
 
@@ -367,6 +436,11 @@ def findallplugins(options=None, filter=False):
         for plugin in extension:
             newplugins.append(plugin)
 
+    # Keep the full list so later getids lookups don't rediscover plugins
+    if HAVE_NEW_MODULES:
+        key = getattr(options, "extraplugintree", None) or None
+        _plugin_registries[key] = cache.PluginRegistry(newplugins)
+
     if filter:
         plugins = newplugins
         if options.include:
@@ -407,6 +481,45 @@ def generate_file_hash(filename, blocksize=2**20):
     return hash.hexdigest()
 
 
+def hashfile(filename):
+    """
+    Obtains a file hash reusing the one calculated before for the same file
+    :param filename: file to open and hash
+    :return: hash
+    """
+    # Live files (/proc, /sys) change without changing mtime or size
+    if _hash_cache is None or os.environ.get("RISU_LIVE") == "1":
+        return generate_file_hash(filename)
+    return _hash_cache.hash(filename, generate_file_hash)
+
+
+def savehashes():
+    """
+    Saves hashes calculated by hashfile so other runs reuse them
+    :return: True if saved
+    """
+    if _hash_cache is None:
+        return False
+    return _hash_cache.save()
+
+
+def savecaches():
+    """
+    Saves plugin index, plugin metadata and hashes once per run so other
+    runs reuse them
+    :return: True if all of them were saved
+    """
+    saved = True
+    for store in [_plugin_index, _metadata_cache]:
+        if store is not None:
+            try:
+                saved = store.save() and saved
+            except Exception as e:
+                LOG.debug("Failed to save cache: %s", str(e))
+                saved = False
+    return savehashes() and saved
+
+
 def findplugins(
     folders=None,
     include=None,
@@ -446,7 +559,12 @@ def findplugins(
     plugins = []
     # Walk the folders and subfolders for files based on our criteria
     for folder in folders:
-        for items in os.walk(folder, followlinks=followlinks):
+        if _plugin_index is not None:
+            # Reuse listings of folders not modified since last run
+            walker = _plugin_index.walk(folder, followlinks=followlinks)
+        else:
+            walker = os.walk(folder, followlinks=followlinks)
+        for items in walker:
             root = items[0]
             filenames = items[2]
             for filename in filenames:
@@ -486,40 +604,23 @@ def findplugins(
 
     plugins = sorted(set(plugins))
 
+    # Same file can be found by several extensions or plugin trees
+    if options and options.extraplugintree:
+        indexkey = (extension, options.extraplugintree)
+    else:
+        indexkey = (extension, None)
+
     # Build dictionary of plugins and it's metadata
     metaplugins = []
     for plugin in plugins:
-        subcategory = os.path.split(plugin)[0].replace(
-            os.path.join(risudir, "plugins", extension), ""
-        )
-        if options and options.extraplugintree:
-            subcategory = subcategory.replace(
-                os.path.join(options.extraplugintree, extension), ""
-            )
+        dictionary = None
+        if _plugin_index is not None:
+            dictionary = _plugin_index.get(plugin, key=indexkey)
 
-        try:
-            category = os.path.normpath(subcategory).split(os.sep)[1]
-        except (IndexError, TypeError):
-            category = "root"
-            subcategory = " "
-
-        # Remove leading "/" (os.sep for safety)
-        if subcategory[0] == os.sep:
-            subcategory = subcategory[1:]
-
-        if category == subcategory:
-            subcategory = ""
-
-        dictionary = {
-            "plugin": plugin,
-            "backend": extension,
-            "id": calcid(string=plugin),
-            "category": category,
-            "subcategory": subcategory,
-            "hash": generate_file_hash(filename=plugin),
-            "name": os.path.splitext(os.path.basename(plugin))[0],
-        }
-        dictionary.update(get_metadata(plugin=dictionary))
+        if dictionary is None:
+            dictionary = getplugindata(plugin, extension=extension, options=options)
+            if _plugin_index is not None:
+                _plugin_index.set(plugin, dictionary, key=indexkey)
 
         # Check if dictionary update is provided and apply it
         if dictupdate:
@@ -534,6 +635,49 @@ def findplugins(
     return metaplugins
 
 
+def getplugindata(plugin, extension="core", options=None):
+    """
+    Builds dictionary for a plugin with its hash, id, category and metadata
+    :param plugin: path to plugin
+    :param extension: Extension that will handle this plugin
+    :param options: argparse options provided
+    :return: dictionary for plugin
+    """
+    subcategory = os.path.split(plugin)[0].replace(
+        os.path.join(risudir, "plugins", extension), ""
+    )
+    if options and options.extraplugintree:
+        subcategory = subcategory.replace(
+            os.path.join(options.extraplugintree, extension), ""
+        )
+
+    try:
+        category = os.path.normpath(subcategory).split(os.sep)[1]
+    except (IndexError, TypeError):
+        category = "root"
+        subcategory = " "
+
+    # Remove leading "/" (os.sep for safety)
+    if subcategory[0] == os.sep:
+        subcategory = subcategory[1:]
+
+    if category == subcategory:
+        subcategory = ""
+
+    dictionary = {
+        "plugin": plugin,
+        "backend": extension,
+        "id": calcid(string=plugin),
+        "category": category,
+        "subcategory": subcategory,
+        "hash": generate_file_hash(filename=plugin),
+        "name": os.path.splitext(os.path.basename(plugin))[0],
+    }
+    dictionary.update(get_metadata(plugin=dictionary))
+
+    return dictionary
+
+
 def runplugin(plugin):
     """
     Runs provided plugin and outputs message
@@ -543,7 +687,8 @@ def runplugin(plugin):
     """
 
     LOG.debug(msg=_("Running plugin: %s") % plugin)
-    start_time = time.time()
+    start = resetusage()
+    start_time = start[0]
 
     try:
         os.environ["PLUGIN_BASEDIR"] = "%s" % os.path.abspath(
@@ -603,8 +748,8 @@ def runplugin(plugin):
 
     updates = {
         "result": {"rc": returncode, "out": "%s" % out, "err": "%s" % err},
-        "time": time.time() - start_time,
     }
+    updates.update(getusage(start))
     plugin.update(updates)
 
     try:
@@ -617,6 +762,125 @@ def runplugin(plugin):
     return plugin
 
 
+def runbatch(plugins):
+    """
+    Runs a batch of plugins from the same extension in a single call
+    :param plugins: plugins to execute, all of them sharing backend
+    :return: list of plugins updated with results
+    """
+
+    if not plugins:
+        return []
+
+    LOG.debug(msg=_("Running batch of %s plugins") % len(plugins))
+    start = resetusage()
+
+    # Workaround if calling externally
+    global extensions
+    if not extensions:
+        extensions = initPymodules()[0]
+
+    batch = None
+    for extension in extensions:
+        name = extension.__name__.split(".")[-1]
+        if plugins[0]["backend"] == name:
+            batch = getattr(extension, "runbatch", None)
+            break
+
+    if not batch:
+        return [runplugin(plugin) for plugin in plugins]
+
+    try:
+        executions = batch(plugins=plugins)
+    except Exception as e:
+        LOG.error("Batch execution error, running one by one: %s", str(e))
+        return [runplugin(plugin) for plugin in plugins]
+
+    # Time is shared between all plugins in the batch
+    usage = getusage(start, count=len(plugins))
+
+    for plugin, execution in zip(plugins, executions):
+        returncode, out, err = execution
+        updates = {
+            "result": {"rc": returncode, "out": "%s" % out, "err": "%s" % err},
+        }
+        updates.update(usage)
+        plugin.update(updates)
+
+        try:
+            sys.stdout.write(progress)
+            sys.stdout.flush()
+        except (IOError, OSError):
+            # Ignore write errors (e.g., broken pipe)
+            pass
+
+    return plugins
+
+
+def runtask(task):
+    """
+    Runs a task which is either a plugin or a batch of plugins
+    :param task: plugin or list of plugins
+    :return: plugin result or list of plugin results
+    """
+    if isinstance(task, list):
+        return runbatch(task)
+    return runplugin(task)
+
+
+def batchplugins(plugins):
+    """
+    Groups plugins whose extension can run several of them at once
+    :param plugins: plugins to execute
+    :return: list of tasks, each one a plugin or a list of plugins
+    """
+
+    # Workaround if calling externally
+    global extensions
+    if not extensions:
+        extensions = initPymodules()[0]
+
+    batchable = [
+        extension.__name__.split(".")[-1]
+        for extension in extensions
+        if hasattr(extension, "runbatch")
+    ]
+
+    batches = {}
+    tasks = []
+    for plugin in plugins:
+        if plugin["backend"] in batchable:
+            batches.setdefault(plugin["backend"], []).append(plugin)
+        else:
+            tasks.append(plugin)
+
+    # Batches go first as they're the longest tasks
+    return [batches[backend] for backend in sorted(batches)] + tasks
+
+
+def prepareplugins(plugins):
+    """
+    Lets extensions prepare their plugins before running them (e.g. building)
+    :param plugins: plugins to execute
+    :return:
+    """
+
+    # Workaround if calling externally
+    global extensions
+    if not extensions:
+        extensions = initPymodules()[0]
+
+    for extension in extensions:
+        name = extension.__name__.split(".")[-1]
+        prepare = getattr(extension, "prepare", None)
+        selected = [plugin for plugin in plugins if plugin["backend"] == name]
+        if prepare and selected:
+            try:
+                prepare(plugins=selected)
+            except Exception as e:
+                LOG.error("Failed to prepare %s plugins: %s", name, str(e))
+
+
 def doplugin(plugin, path, options=None):
     """
     Wrapper function for runplugin that sets up environment and handles path/options
@@ -653,6 +917,26 @@ def calcid(string, replace=risudir):
     return hashlib.sha512(string.replace(replace, "").encode("UTF-8")).hexdigest()
 
 
+def getregistry(plugins=None, options=None):
+    """
+    Gets plugin registry to look up plugin id's by path filters
+    :param plugins: plugins to register, all plugins available if not provided
+    :param options: argparse options provided
+    :return: PluginRegistry or None if not available
+    """
+    if not HAVE_NEW_MODULES:
+        return None
+
+    if plugins is not None:
+        return cache.PluginRegistry(plugins)
+
+    # Discovery of all plugins happens only once per extra plugin tree
+    key = getattr(options, "extraplugintree", None) or None
+    if key not in _plugin_registries:
+        _plugin_registries[key] = cache.PluginRegistry(findallplugins(options))
+    return _plugin_registries[key]
+
+
 def getids(plugins=None, include=None, exclude=None, options=None):
     """
     Gets ID's for specified include/excluded plugins
@@ -662,42 +946,186 @@ def getids(plugins=None, include=None, exclude=None, options=None):
     :return: array of sha512 hashes
     """
     if not plugins:
+        registry = getregistry(options=options)
+        if registry is not None:
+            return registry.getids(include=include, exclude=exclude)
         plugins = findallplugins(options)
 
-    allplugins = plugins
-    newplugins = []
-
+    ids = []
     for plugin in plugins:
-        newplugins.append(plugin["plugin"])
+        if include and not any(filters in plugin["plugin"] for filters in include):
+            continue
+        if exclude and any(filters in plugin["plugin"] for filters in exclude):
+            continue
+        ids.append(plugin["id"])
+    return ids
 
-    # Process plugins in include / exclude
-    plugins = newplugins
 
-    if include:
-        plugins = [
-            plugin for plugin in plugins for filters in include if filters in plugin
-        ]
+def plugindigest(plugins):
+    """
+    Gets digest identifying plugins and their contents
+    :param plugins: plugins whose results are saved
+    :return: sha512 hexdigest of plugin ID's and hashes
+    """
+    digest = hashlib.sha512()
+    for pluginid, pluginhash in sorted(
+        (plugin["id"], plugin.get("hash", "")) for plugin in plugins
+    ):
+        digest.update(("%s %s\n" % (pluginid, pluginhash)).encode("UTF-8"))
+    return digest.hexdigest()
 
-    if exclude:
-        plugins = [
-            plugin
-            for plugin in plugins
-            if not any(filters in plugin for filters in exclude)
-        ]
 
-    # Get full plugins details
+def smartplan(results, plugins, allids=None):
+    """
+    Compares stored results against plugins available to know what to run again
+    :param results: results stored by a previous run, by plugin id
+    :param plugins: plugins available
+    :param allids: id's of all plugins known (default: id's of plugins)
+    :return: dict with sorted lists of id's: 'added' (plugins without results),
+             'removed' (results no longer valid), 'changed' (plugins modified
+             since their results were stored) and 'unchanged' (results still
+             valid)
+    """
+    if allids is None:
+        allids = getids(plugins=plugins)
+    known = set(allids)
+    hashes = dict((plugin["id"], plugin.get("hash")) for plugin in plugins)
+
+    def stored(key):
+        try:
+            return results[key]["hash"]
+        except (KeyError, TypeError):
+            return False
+
+    # Hooks split results of some plugins in several 'id-subid' ones, valid
+    # while all of them come from the current version of the plugin
+    composed = {}
+    for key in results:
+        if "-" in key and key not in known:
+            composed.setdefault(key.partition("-")[0], []).append(key)
+    expanded = set(
+        base
+        for base, keys in composed.items()
+        if base in known
+        and base not in results
+        and all(stored(key) == hashes.get(base) for key in keys)
+    )
+
+    plan = {"added": [], "removed": [], "changed": [], "unchanged": []}
+    for key in results:
+        if key in known:
+            if "-" not in key and stored(key) != hashes.get(key):
+                plan["changed"].append(key)
+            else:
+                plan["unchanged"].append(key)
+        elif key.partition("-")[0] in expanded:
+            plan["unchanged"].append(key)
+        else:
+            plan["removed"].append(key)
+
+    for base in composed:
+        if base in known and base not in results and base not in expanded:
+            plan["changed"].append(base)
+
+    planned = set(results) | set(plan["changed"]) | expanded
+    plan["added"] = [
+        pluginid
+        for pluginid in known
+        if pluginid not in planned and "-" not in pluginid
+    ]
+
+    for name in plan:
+        plan[name].sort()
+
+    return plan
+
+
+def cputime():
+    """
+    Gets CPU time used by this process and its finished children
+    :return: seconds of user and system time
+    """
+    if resource is None:
+        return 0
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def resetusage():
+    """
+    Starts tracking resources used by a plugin
+    :return: (wall time, cpu time) at start
+    """
+    return time.time(), cputime()
+
+
+def getusage(start, count=1):
+    """
+    Gets resources used since start, shared between count plugins
+    :param start: value returned by resetusage
+    :param count: number of plugins sharing the usage
+    :return: dict with time and cputime
+    """
+    return {
+        "time": (time.time() - start[0]) / count,
+        "cputime": (cputime() - start[1]) / count,
+    }
+
+
+def plugintimeout(plugin):
+    """
+    Gets timeout for plugin from its metadata
+    :param plugin: plugin dictionary
+    :return: seconds plugin can run
+    """
+    try:
+        timeout = int(plugin.get("timeout") or 0)
+    except (TypeError, ValueError):
+        timeout = 0
+    return timeout if timeout > 0 else PLUGIN_TIMEOUT
 
-    ids = []
-    for plugin in allplugins:
-        if plugin["plugin"] in plugins:
-            ids.append(plugin["id"])
-    return ids
+
+def tasktimeout(task):
+    """
+    Gets timeout for a task which is either a plugin or a batch of plugins
+    :param task: plugin or list of plugins
+    :return: seconds task can run, for batches the longest of their plugins
+             as they check all of them in a single pass
+    """
+    if isinstance(task, list):
+        return max([PLUGIN_TIMEOUT] + [plugintimeout(plugin) for plugin in task])
+    return plugintimeout(task)
+
+
+def killgroup(pgid):
+    """
+    Kills all processes in process group
+    :param pgid: process group id
+    """
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except OSError:
+        # Nothing left in the group
+        pass
 
 
-def execonshell(filename, timeout=30):
+def readpipe(pipe, output):
     """
-    Executes command on shell
+    Reads pipe until closed
+    :param pipe: file object to read
+    :param output: dictionary to store contents keyed by pipe
+    """
+    output[pipe] = pipe.read()
+    pipe.close()
+
+
+def execonshell(filename, timeout=PLUGIN_TIMEOUT):
+    """
+    Executes command on shell in its own process group
     :param filename: command to run or script name
+    :param timeout: seconds before killing the command and all its children
     :return: returncode, out, err
     """
 
@@ -708,23 +1136,91 @@ def execonshell(filename, timeout=30):
 
         return returncode, out, err
 
+    # Own session so the whole process tree can be killed
+    if sys.version_info >= (3, 2):
+        session = {"start_new_session": True}
+    else:
+        session = {"preexec_fn": os.setsid}
+
+    timedout = []
+    timer = None
+
+    # Plugin reaped, its pid and group id can be reused and must not be killed
+    finished = []
+    lock = Lock()
+
     try:
         p = subprocess.Popen(
-            filename.split(" "), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            filename.split(" "),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **session,
         )
-        timer = Timer(timeout, p.kill)
+
+        def expire():
+            with lock:
+                if finished:
+                    return
+                timedout.append(True)
+                killgroup(p.pid)
+
+        timer = Timer(timeout, expire)
         timer.start()
-        out, err = p.communicate(str.encode("utf8"))
-        returncode = p.returncode
+
+        output = {}
+        readers = [
+            Thread(target=readpipe, args=(pipe, output))
+            for pipe in [p.stdout, p.stderr]
+        ]
+        for reader in readers:
+            reader.daemon = True
+            reader.start()
+
+        if hasattr(os, "waitid"):
+            # Wait without reaping so the group id can't be reused, and kill
+            # anything the plugin left behind still holding the pipes
+            os.waitid(os.P_PID, p.pid, os.WEXITED | os.WNOWAIT)
+            with lock:
+                finished.append(True)
+                timer.cancel()
+            killgroup(p.pid)
+
+            status = os.waitpid(p.pid, 0)[1]
+        else:
+            # Reap the plugin once it exits, without the timer firing after it
+            while True:
+                with lock:
+                    pid, status = os.waitpid(p.pid, os.WNOHANG)
+                    if pid:
+                        finished.append(True)
+                        timer.cancel()
+                        break
+                time.sleep(0.01)
+
+            # Group id is kept while anything the plugin left behind is
+            # running, kill it as it may still hold the pipes
+            killgroup(p.pid)
+        if os.WIFSIGNALED(status):
+            returncode = -os.WTERMSIG(status)
+        else:
+            returncode = os.WEXITSTATUS(status)
+        p.returncode = returncode
+
+        for reader in readers:
+            reader.join()
+        out = output.get(p.stdout, b"")
+        err = output.get(p.stderr, b"")
         del p
-        timer.cancel()
     except Exception:
         returncode = 3
         out = ""
         err = traceback.format_exc()
+    finally:
+        if timer:
+            timer.cancel()
 
     # Pid killed because of timer?
-    if returncode == -9:
+    if timedout:
         out = ""
         err = _("Skipped because of execution timeout")
         returncode = int(os.environ["RC_SKIPPED"])
@@ -741,6 +1237,44 @@ def execonshell(filename, timeout=30):
     return returncode, out, err
 
 
+def filterresults(results, include=None, exclude=None):
+    """
+    Filters results for plugins matching include/exclude filters
+    :param results: dict of results
+    :param include: keywords to include in plugins
+    :param exclude: keywords to exclude in plugins
+    :return: dict of results for plugins matching filters
+    """
+    if include or exclude:
+        if include:
+            oldresults = dict(results)
+            results = {}
+            for result in oldresults:
+                add = False
+                # Iterate for all known plugins on actual execution vs stored ones (or executed)
+                for filters in include:
+                    if filters in oldresults[result]["plugin"]:
+                        # We have a match with the plugin defined and the ones we expect, so append results
+                        add = True
+                if add:
+                    results[result] = dict(oldresults[result])
+
+        if exclude:
+            oldresults = dict(results)
+            results = {}
+            for result in oldresults:
+                add = True
+                # Iterate for all known plugins on actual execution vs stored ones (or executed)
+                for filters in exclude:
+                    if filters in oldresults[result]["plugin"]:
+                        add = False
+                if add:
+                    results[result] = dict(oldresults[result])
+            del oldresults
+
+    return results
+
+
 def dorisu(
     live=False,
     path=False,
@@ -762,6 +1296,7 @@ def dorisu(
     serveruri=False,
     anon=False,
     options=None,
+    numproc=None,
 ):
     """
     Runs risu scripts on specified root folder
@@ -783,6 +1318,7 @@ def dorisu(
     :param plugins:  plugins to execute against the system
     :param quiet: make no progress output
     :param anon: Anonymize output
+    :param numproc: Number of processes for plugins, overrides options
     :return: Dict of plugins and results
     """
 
@@ -812,23 +1348,21 @@ def dorisu(
     os.environ["CITELLUS_ROOT"] = "%s" % path
     os.environ["CITELLUS_LIVE"] = "%s" % RISU_LIVE
     os.environ["CITELLUS_BASE"] = "%s" % risudir
-    os.environ["CITELLUS_TMP"] = "%s" % tempfile.mkdtemp()
+    os.environ["CITELLUS_TMP"] = os.environ["RISU_TMP"]
 
     # Set pool for same processes as CPU cores
     # Use new executor if available, otherwise fall back to Pool
+    if numproc is None and options is not None:
+        numproc = options.numproc
     if HAVE_NEW_MODULES:
-        num_processes = options.numproc if options is not None else None
         executor = risu_executor.PluginExecutor(
-            num_processes=num_processes,
-            timeout=30,  # 30 second timeout per plugin
+            num_processes=numproc,
+            timeout=PLUGIN_TIMEOUT,
         )
         LOG.debug("Using PluginExecutor for plugin execution")
     else:
         # Legacy Pool usage
-        if options is not None:
-            p = Pool(options.numproc)
-        else:
-            p = Pool(cpu_count())
+        p = Pool(numproc or cpu_count())
         executor = None
 
     # We've save path, use it
@@ -838,6 +1372,8 @@ def dorisu(
     elif path:
         # We don't have it, force to be sosreport folder
         filename = os.path.join(path, "risu.json")
+        if getattr(options, "compress", False):
+            filename += resultsfile.COMPRESSED
         LOG.debug("Storing output on file %s" % filename)
     else:
         # For example for 'Live' environment where no path is defined
@@ -848,7 +1384,10 @@ def dorisu(
     elif filename and not quiet:
         LOG.info("Storing output on file %s" % filename)
 
-    missingplugins = []
+    allids = getids(plugins=plugins, options=options)
+
+    # Only results of some of the plugins saved were read
+    partial = False
 
     if live or forcerun:
         results = {}
@@ -856,69 +1395,60 @@ def dorisu(
         # If we can load, fill variable, else, just blank it
         if not quiet:
             LOG.info("Reading Existing risu analysis from disk for %s" % path)
+        # Saved results are read whatever the format they were saved with
         try:
-            with open(filename, "r") as f:
-                results = json.load(f)["results"]
-        except (IOError, OSError, KeyError, ValueError):
+            stored = resultsfile.locate(filename)
+            index = resultsfile.Index.load(stored) if stored else None
+            if index is not None and not index.indexed:
+                index = None
+            keys = index.select(ids=allids) if index is not None else []
+            if index is not None and len(keys) < len(index):
+                # Just the results for our plugins, without parsing the others
+                results = index.read(keys)
+                partial = True
+            else:
+                results = resultsfile.load(stored)["results"]
+        except (IOError, OSError, KeyError, TypeError, ValueError):
             results = {}
 
     # At this point we've 'results' with either empty dict (live, forcerun) or loaded if existing and valid
 
     # We do need to check that we've the results for all the plugins we know, if not, rerun.
+    plan = smartplan(results, plugins, allids=allids)
 
-    # Check all sosreports for data for all plugins
-    allids = getids(plugins=plugins, options=options)
-
-    # Now check in results for id's no longer existing for removal:
-    delete = [key for key in iter(results.keys()) if key not in allids]
-
-    LOG.debug("Removing old plugins from results: %s" % delete)
-    missingplugins = [
-        plugid for plugid in allids if plugid not in results and "-" not in plugid
-    ]
-
-    LOG.debug("Adding new plugin id's missing to be executed: %s" % missingplugins)
+    LOG.debug("Removing old plugins from results: %s" % plan["removed"])
+    LOG.debug("Adding new plugin id's missing to be executed: %s" % plan["added"])
 
     # Remove old plugins no longer existing from results
-    for key in delete:
+    for key in plan["removed"]:
         del results[key]
 
-    # Prefill hashes of known plugins for checking same id's with changed hash
-    hashes = [plug["hash"] for plug in plugins]
-
-    # Check for changed plugins on disk vs stored
-    for plugin in results:
-        # We check all plugins in results
-        try:
-            hash = results[plugin]["hash"]
-        except (KeyError, TypeError):
-            hash = False
-
-        if hash not in hashes and "-" not in results[plugin]["id"]:
-            # We now check all the available plugins for hashes
-            # Plugin hash is not matched in results, rerun plugin as it has changed
-            missingplugins.append(plugin)
-            LOG.debug(
-                "Smart: rerunning plugin with modified hash on disk: %s"
-                % results[plugin]["plugin"]
-            )
-
-    # If some plugin is missing, rerun smart
-    if len(missingplugins) != 0 or len(delete) != 0:
-        missingplugins = sorted(set(missingplugins))
-        LOG.debug("Running smartrun for plugins added %s" % missingplugins)
-        LOG.debug("Running smartrun for plugins deleted %s" % delete)
-
-    # We need to filter plugins only for the new id's what we were missing
-    LOG.debug("Smart: We need to run some plugins that were missing")
+    LOG.debug(
+        "Smart: %s added, %s removed, %s changed, %s unchanged"
+        % tuple(
+            len(plan[name]) for name in ["added", "removed", "changed", "unchanged"]
+        )
+    )
 
     # We clear list of plugins to run to just grab the missing data on them, and leave others
+    missingplugins = set(plan["added"]) | set(plan["changed"])
     pluginstorun = [
         plugin
         for plugin in plugins
         if plugin["id"] in missingplugins and "-" not in plugin["id"]
     ]
 
+    changed = set(plan["changed"])
+    for plugin in pluginstorun:
+        if plugin["id"] in changed:
+            LOG.debug(
+                "Smart: rerunning plugin with modified hash on disk: %s"
+                % plugin["plugin"]
+            )
+
+    # Compiled plugins are built at once instead of inside each worker
+    prepareplugins(pluginstorun)
+
     if not quiet:
         sys.stdout.write("%s" % pgstart)
         sys.stdout.flush()
@@ -926,48 +1456,86 @@ def dorisu(
         global progress
         progress = ""
 
-    # Do the actual execution of plugins
-    if executor:
-        # Use new PluginExecutor with better error handling
-        try:
+    try:
+        # Compute once what common.d helpers would discover in every plugin, only
+        # if there are plugins to run as it reads the package lists and journal
+        if HAVE_NEW_MODULES and pluginstorun:
+            try:
+                facts.export(
+                    os.environ,
+                    root=os.environ["RISU_ROOT"],
+                    live=RISU_LIVE,
+                    tmp=os.environ["RISU_TMP"],
+                    journalctl=which("journalctl"),
+                    rpm=which("rpm"),
+                    dpkg=which("dpkg"),
+                )
+            except (IOError, OSError) as e:
+                LOG.debug("Failed to compute sosreport facts: %s", str(e))
+
+        # Do the actual execution of plugins
+        if not pluginstorun:
+            LOG.debug("Smart: results of all plugins are up to date")
+            if not executor:
+                p.close()
+                p.join()
+        elif executor:
+            # Use new PluginExecutor with better error handling
+            try:
 
-            def progress_callback(plugin, result):
-                """Callback to show progress"""
-                if not quiet:
-                    sys.stdout.write(progress)
-                    sys.stdout.flush()
+                def progress_callback(plugin, result):
+                    """Callback to show progress"""
+                    if not quiet:
+                        sys.stdout.write(progress)
+                        sys.stdout.flush()
 
-            execution = executor.execute_plugins(
-                pluginstorun,
-                runplugin,
-                progress_callback=progress_callback if not quiet else None,
-            )
-        except KeyboardInterrupt:
-            LOG.warning("Plugin execution interrupted by user")
-            # Save cache before exiting
-            if _metadata_cache:
-                try:
-                    _metadata_cache.save()
-                except Exception:
-                    pass
-            raise
-        except Exception as e:
-            LOG.error("Plugin execution failed: %s", str(e))
-            execution = []
-    else:
-        # Legacy Pool usage
-        execution = p.map(runplugin, pluginstorun)
-        p.close()
-        p.join()
+                tasks = batchplugins(pluginstorun)
 
-    del pluginstorun
+                # Plugins enforce their own timeout, just wait for the longest one
+                executor.timeout = max(
+                    [PLUGIN_TIMEOUT] + [tasktimeout(task) for task in tasks]
+                )
+
+                # Results are stored as plugins complete, slow ones don't hold others
+                executor.execute_plugins_streaming(
+                    tasks,
+                    runtask,
+                    sink=risu_executor.DictSink(results, failed=failed),
+                    progress_callback=progress_callback if not quiet else None,
+                )
+            except KeyboardInterrupt:
+                LOG.warning("Plugin execution interrupted by user")
+                # Save cache before exiting
+                if _metadata_cache is not None:
+                    try:
+                        _metadata_cache.save()
+                    except Exception:
+                        pass
+                raise
+            except Exception as e:
+                LOG.error("Plugin execution failed: %s", str(e))
+        else:
+            # Legacy Pool usage
+            execution = p.map(runtask, batchplugins(pluginstorun))
+            p.close()
+            p.join()
+
+            # Update back 'results' with the execution of the missing plugins
+            for task in execution:
+                for plugin in task if isinstance(task, list) else [task]:
+                    if plugin and "id" in plugin:
+                        results[plugin["id"]] = dict(plugin)
+
+            del execution
+    finally:
+        # Temporary files of the plugins (package indexes, timeline...) are
+        # only for this run
+        shutil.rmtree(os.environ["RISU_TMP"], ignore_errors=True)
 
-    # Update back 'results' with the execution of the missing plugins
-    for plugin in execution:
-        if plugin and "id" in plugin:
-            results[plugin["id"]] = dict(plugin)
+    # Results read partially are already saved if none had to run again
+    uptodate = partial and not pluginstorun and not plan["removed"]
 
-    del execution
+    del pluginstorun
 
     # Processing hooks on the results
     for hook in initPymodules(extensions=getPymodules())[0]:
@@ -1005,6 +1573,12 @@ def dorisu(
     else:
         title = False
 
+    # Writing results read partially would drop the results of the plugins
+    # not read
+    if filename and uptodate and not (web or anon or serveruri):
+        LOG.debug("Smart: saved results are up to date in %s" % stored)
+        filename = None
+
     # Write results if possible
     if filename:
         try:
@@ -1020,50 +1594,34 @@ def dorisu(
                 web=web,
                 serveruri=serveruri,
                 anon=anon,
+                digest=plugindigest(plugins) if plugins else None,
             )
         except (IOError, OSError) as e:
             # Couldn't write
             LOG.error("Couldn't write to file %s: %s" % (filename, str(e)))
 
     # We've filters defined, so filter data
-    if include or exclude:
-        if include:
-            oldresults = dict(results)
-            results = {}
-            for result in oldresults:
-                add = False
-                # Iterate for all known plugins on actual execution vs stored ones (or executed)
-                for filters in include:
-                    if filters in oldresults[result]["plugin"]:
-                        # We have a match with the plugin defined and the ones we expect, so append results
-                        add = True
-                if add:
-                    results[result] = dict(oldresults[result])
-
-        if exclude:
-            oldresults = dict(results)
-            results = {}
-            for result in oldresults:
-                add = True
-                # Iterate for all known plugins on actual execution vs stored ones (or executed)
-                for filters in exclude:
-                    if filters in oldresults[result]["plugin"]:
-                        add = False
-                if add:
-                    results[result] = dict(oldresults[result])
-            del oldresults
+    results = filterresults(results, include=include, exclude=exclude)
 
-    # Save metadata cache before returning
-    if _metadata_cache:
-        try:
-            _metadata_cache.save()
-            LOG.debug("Metadata cache saved")
-        except Exception as e:
-            LOG.debug("Failed to save metadata cache: %s", str(e))
+    # Save plugins found and hashes of files checked so other runs reuse them
+    savecaches()
 
     return results
 
 
+def printimporttimes():
+    """
+    Prints time spent importing each extension and hook module, slowest first
+    """
+    total = 0
+    for path, seconds in sorted(
+        _importtimes.items(), key=lambda item: item[1], reverse=True
+    ):
+        total += seconds
+        print("%10.2f ms  %s" % (seconds * 1000, os.path.relpath(path, risudir)))
+    print("%10.2f ms  %s" % (total * 1000, _("total")))
+
+
 def formattext(returncode):
     """
     Returns print formating for return code
@@ -1141,6 +1699,11 @@ def parse_args(default=False, parse=False):
         action="store_true",
         help=_("Print a list of discovered hooks and exit"),
     )
+    p.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help=_("Print time spent importing each extension and hook and exit"),
+    )
     p.add_argument(
         "--dump-overrides",
         action="store_true",
@@ -1150,7 +1713,14 @@ def parse_args(default=False, parse=False):
         "--output",
         "-o",
         metavar="FILENAME",
-        help=_("Write results to JSON file FILENAME"),
+        help=_(
+            "Write results to JSON file FILENAME, compressed if FILENAME ends with .gz"
+        ),
+    )
+    p.add_argument(
+        "--compress",
+        action="store_true",
+        help=_("Write results compressed to risu.json.gz instead of risu.json"),
     )
     p.add_argument(
         "--web",
@@ -1385,6 +1955,7 @@ def array_to_config(config, path=False):
                     "list-categories",
                     "description",
                     "list-hooks",
+                    "profile-startup",
                     "web",
                     "run",
                     "find",
@@ -1453,14 +2024,17 @@ def read_config(options=False):
     return config
 
 
-def diff_config(options, defaults=parse_args(default=True), path=False):
+def diff_config(options, defaults=None, path=False):
     """
     Diffs between default configuration and provided one
     :param path: Keep or purge path from returned options
     :param options: options provided
-    :param defaults: default configuration options
+    :param defaults: default configuration options (default: parse_args defaults)
     :return: dict with different values to defaults
     """
+    if defaults is None:
+        defaults = parse_args(default=True)
+
     config = {}
     for key in vars(options):
         keydef = vars(defaults)[key]
@@ -1492,50 +2066,49 @@ def dump_config(options, path=False):
     return json.dumps(differences)
 
 
-def generic_get_metadata(plugin, comment="#"):
+def generic_get_metadata(plugin, comment="#", text=None):
     """
     Gets metadata for plugin (with optional caching)
     :param plugin: plugin object
     :param comment: Character to use as comment in text files
+    :param text: plugin contents if already read by caller
     :return: metadata dict for that plugin
     """
     plugin_path = plugin.get("plugin", "")
 
     # Try cache first if available
-    if _metadata_cache and plugin_path:
+    cached_meta = None
+    if _metadata_cache is not None and plugin_path:
         cached_meta = _metadata_cache.get(plugin_path)
-        if cached_meta:
+        if cached_meta and "timeout" in cached_meta:
             LOG.debug("Using cached metadata for %s", plugin_path)
-            return cached_meta
-
-    # Extract metadata (original code)
-    offset = len(comment) - 1
-
-    path = regexpfile(filename=plugin["plugin"], regexp=r"\A%s path:" % comment)[
-        7 + offset :
-    ].strip()
-    path = path.replace("${RISU_ROOT}", "")
-
-    description = regexpfile(
-        filename=plugin["plugin"], regexp=r"\A%s description:" % comment
-    )[14 + offset :].strip()
-    long_name = regexpfile(
-        filename=plugin["plugin"], regexp=r"\A%s long_name:" % comment
-    )[12 + offset :].strip()
-    bugzilla = regexpfile(
-        filename=plugin["plugin"], regexp=r"\A%s bugzilla:" % comment
-    )[11 + offset :].strip()
-
-    priority = int(
-        regexpfile(filename=plugin["plugin"], regexp=r"\A%s priority:" % comment)[
-            11 + offset :
-        ].strip()
-        or 0
-    )
+            return dict(cached_meta)
+
+    # Read all headers at once instead of opening file for each one
+    keys = ["path", "description", "long_name", "bugzilla", "priority", "kb"]
+    optional = ["timeout"]
+    if text is None:
+        headers = getheaders(
+            filename=plugin["plugin"], comment=comment, keys=keys, optional=optional
+        )
+    else:
+        headers = parseheaders(
+            lines=text.splitlines(), comment=comment, keys=keys, optional=optional
+        )
+
+    path = headers.get("path", "").replace("${RISU_ROOT}", "")
+    description = headers.get("description", "")
+    long_name = headers.get("long_name", "")
+    bugzilla = headers.get("bugzilla", "")
+    priority = int(headers.get("priority", "") or 0)
+    kb = headers.get("kb", "")
 
-    kb = regexpfile(filename=plugin["plugin"], regexp=r"\A%s kb:" % comment)[
-        5 + offset :
-    ].strip()
+    # 0 means the default timeout
+    try:
+        timeout = int(headers.get("timeout", "") or 0)
+    except ValueError:
+        LOG.debug("Ignoring invalid timeout for %s", plugin_path)
+        timeout = 0
 
     if long_name == "":
         long_name = description
@@ -1547,12 +2120,17 @@ def generic_get_metadata(plugin, comment="#"):
         "priority": priority,
         "path": path,
         "kb": kb,
+        "timeout": timeout,
     }
 
+    if cached_meta:
+        # Entries stored before 'timeout' was read just get it added
+        metadata = dict(cached_meta, timeout=timeout)
+
     # Cache the result if caching is available
-    if _metadata_cache and plugin_path:
+    if _metadata_cache is not None and plugin_path:
         try:
-            _metadata_cache.set(plugin_path, metadata)
+            _metadata_cache.set(plugin_path, dict(metadata))
         except Exception as e:
             LOG.debug("Failed to cache metadata for %s: %s", plugin_path, str(e))
 
@@ -1602,9 +2180,11 @@ def write_results(
     serveruri=False,
     anon=False,
     title=False,
+    digest=None,
 ):
     """
     Writes result
+    :param digest: digest of plugins whose results are written (see plugindigest)
     :param extranames: Additional filenames to write in the json section
     :param serveruri: Server URI for HTTP POST upload of results
     :param web: copy html viewer
@@ -1641,8 +2221,14 @@ def write_results(
     if path:
         data["metadata"]["path"] = path
 
+    if digest:
+        data["metadata"]["plugins"] = digest
+
     # Build target file based on json name but with html ending instead
-    mytargetfilename = os.path.splitext(os.path.basename(filename))[0] + ".html"
+    basename = os.path.basename(filename)
+    if resultsfile.iscompressed(basename):
+        basename = basename[: -len(resultsfile.COMPRESSED)]
+    mytargetfilename = os.path.splitext(basename)[0] + ".html"
 
     if os.access(os.path.join(os.path.dirname(filename), "risu.html"), os.W_OK):
         LOG.debug("We can copy html again as we've W_OK")
@@ -1662,8 +2248,7 @@ def write_results(
         data = anonymize(data=data.copy())
 
     try:
-        with open(filename, "w") as fd:
-            json.dump(data, fd, indent=2)
+        resultsfile.dump(data, filename)
     except (IOError, OSError) as e:
         LOG.debug("Failed to write to file %s: %s" % (filename, str(e)))
 
@@ -1700,6 +2285,60 @@ def regexpfile(filename=False, regexp=False):
     return ""
 
 
+def parseheaders(lines, comment="#", keys=None, optional=None):
+    """
+    Gets '<comment> key: value' headers from lines in a single pass
+    :param lines: iterable of lines to check
+    :param comment: Character to use as comment in text files
+    :param keys: stop as soon as all these keys are found
+    :param optional: keys also looked for until the end of the comment block
+                     where all keys are found
+    :return: dict with first value found for each key
+    """
+    headers = {}
+    prefix = "%s " % comment
+    pending = set(keys) if keys else None
+    remaining = set(optional or [])
+
+    for line in lines:
+        if not line.startswith(prefix):
+            if pending is not None and not pending and not line.startswith(comment):
+                # Headers block is over, optional keys are not there
+                break
+            continue
+
+        key, sep, value = line[len(prefix) :].partition(":")
+        if not sep or not key or key.strip() != key or " " in key:
+            continue
+
+        if key not in headers:
+            headers[key] = value.strip()
+            remaining.discard(key)
+            if pending is not None:
+                pending.discard(key)
+                if not pending and not remaining:
+                    break
+
+    return headers
+
+
+def getheaders(filename, comment="#", keys=None, optional=None):
+    """
+    Gets '<comment> key: value' headers from file reading it only once
+    :param filename: filename to read headers from
+    :param comment: Character to use as comment in text files
+    :param keys: stop reading as soon as all these keys are found
+    :param optional: keys also read until the end of the comment block
+                     where all keys are found
+    :return: dict with first value found for each key
+    """
+    try:
+        with open(filename, "r") as f:
+            return parseheaders(lines=f, comment=comment, keys=keys, optional=optional)
+    except (IOError, OSError, UnicodeDecodeError):
+        return {}
+
+
 def get_metadata(plugin=False):
     """
     Gets metadata for provided plugin
@@ -1830,6 +2469,7 @@ def main():
             not options.list_plugins
             and not options.list_extensions
             and not options.list_hooks
+            and not options.profile_startup
             and not options.dump_overrides
         ):
             LOG.error(_("When not running in Live mode, snapshot path is required"))
@@ -1858,6 +2498,11 @@ def main():
 
     hooks = initPymodules(extensions=getPymodules(options))[0]
 
+    # Report import time of each module and exit
+    if options.profile_startup:
+        printimporttimes()
+        return
+
     # List Hooks and exit
     if options.list_hooks:
         for hook in hooks:
@@ -1943,6 +2588,7 @@ def main():
                 total += elem
 
             print("-------\ntotal", ":", total)
+        savecaches()
         return
 
     if options.dump_overrides:
@@ -1953,6 +2599,7 @@ def main():
         with open("overrides.json", "w") as fd:
             json.dump(overridefile, fd, indent=2)
 
+        savecaches()
         return
 
     # Reinstall language in case it has changed
@@ -1969,33 +2616,55 @@ def main():
         if not options.sosreport:
             LOG.error(_("Path needed for find operation mode"))
             sys.exit(1)
-        jsons = findplugins(
-            folders=[RISU_ROOT],
-            executables=False,
-            include=["risu.json"],
-            fileextension=".json",
-            options=options,
-            followlinks=False,
-        )
-        paths = []
-        for jsonfile in jsons:
-            paths.append(os.path.dirname(jsonfile["plugin"]))
+        kwargs = {
+            "plugins": allplugins,
+            "lang": options.lang,
+            "include": options.include,
+            "exclude": options.exclude,
+            "pgstart": options.progress_start,
+            "pgend": options.progress_end,
+            "quiet": options.quiet,
+            "options": options,
+        }
 
-        for path in paths:
-            results = dorisu(
-                path=path,
-                plugins=allplugins,
-                lang=options.lang,
-                include=options.include,
-                exclude=options.exclude,
-                pgstart=options.progress_start,
-                pgend=options.progress_end,
-                quiet=options.quiet,
+        if not HAVE_NEW_MODULES:
+            jsons = findplugins(
+                folders=[RISU_ROOT],
+                executables=False,
+                include=["risu.json"],
+                fileextension=".json",
                 options=options,
+                followlinks=False,
             )
+            for jsonfile in jsons:
+                path = os.path.dirname(jsonfile["plugin"])
+                results = dorisu(path=path, **kwargs)
+                print("Report for path: %s" % path)
+                printresults(results, options)
+            sys.exit(0)
+
+        paths = fleet.findresults(RISU_ROOT)
+
+        # Paths are analyzed at once sharing our CPU budget, each report is
+        # printed as soon as it's ready
+        workers, kwargs["numproc"] = fleet.split(
+            len(paths), options.numproc or cpu_count()
+        )
+        if workers > 1:
+            # Progress of several paths at once can't be told apart
+            kwargs["quiet"] = True
+
+        failed = False
+        for path, results, error in fleet.analyze(
+            paths, dorisu, workers=workers, **kwargs
+        ):
+            if error is not None:
+                LOG.error("Failed to analyze %s: %s" % (path, error))
+                failed = True
+                continue
             print("Report for path: %s" % path)
             printresults(results, options)
-        sys.exit(0)
+        sys.exit(1 if failed else 0)
 
     if not options.quiet:
         show_logo()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Parsed syslog timeline shared by plugins
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+"""
+Parsed syslog timeline shared by plugins.
+
+Several plugins read ``var/log/messages`` line by line, parsing the
+timestamps to find the same events (journal started or stopped, kernel
+booting).  The timeline parses the log once per risu run, stores it
+under ``RISU_TMP`` for the other plugins of the run and provides:
+
+- the journal and boot events with their timestamps, in log order
+- byte offsets of the log by timestamp, to read only the lines within
+  a time window
+"""
+
+from __future__ import print_function
+
+import array
+import bisect
+import datetime
+import hashlib
+import os
+import re
+
+# Use pickle (works in Python 2.7 and 3.x)
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Locking is not available on every platform
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SYSLOG = re.compile(r"([a-zA-Z]{3})[\s]+([0-9]+)[\s]+([0-9]+):([0-9]+):([0-9]+)")
+ISO = re.compile(
+    r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})[\s|T]+([0-9]+):([0-9]+):([0-9]+)"
+)
+
+# Same expressions for lines read as bytes
+SYSLOGBYTES = re.compile(SYSLOG.pattern.encode("ascii"))
+ISOBYTES = re.compile(ISO.pattern.encode("ascii"))
+
+# Bump when the content stored changes
+VERSION = 1
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def gettime(line, now=None):
+    """
+    Extracts the timestamp off a syslog line
+    :param line: syslog line
+    :param now: date to guess the year of syslog timestamps (default: now)
+    :return: datetime or None if line has no timestamp
+    """
+    if now is None:
+        now = datetime.datetime.now()
+
+    mg = SYSLOG.match(line)
+    if mg is not None:
+        ts = "%s %s %s:%s:%s" % mg.groups()
+        thisyear = now.year
+        # With UTC, we can consider that now in 12h later
+        nnow = now + datetime.timedelta(hours=12)
+        while True:
+            # Prepending the year to the TS and parsing
+            tsobj = datetime.datetime.strptime(
+                "%s %s" % (thisyear, ts), "%Y %b %d %H:%M:%S"
+            )
+            if tsobj < nnow:
+                # We're not in the future
+                return tsobj
+            # Let's try once more
+            thisyear -= 1
+
+    mg = ISO.match(line)
+    if mg is not None:
+        return datetime.datetime.strptime(
+            "%s-%s-%s %s:%s:%s" % mg.groups(), "%Y-%m-%d %H:%M:%S"
+        )
+
+    return None
+
+
+MONTHS = dict(
+    (month, number + 1)
+    for number, month in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun"]
+        + ["jul", "aug", "sep", "oct", "nov", "dec"]
+    )
+)
+
+
+def _fasttime(mg, now, nnow):
+    """
+    Builds datetime for a syslog timestamp without strptime
+    :param mg: match of SYSLOG
+    :param now: date to guess the year of syslog timestamps
+    :param nnow: now + 12h, latest date accepted for the year guessed
+    :return: datetime or None if fields are not in the usual format
+    """
+    month, day, hour, minute, second = mg.groups()
+    if (
+        month.lower() not in MONTHS
+        or len(day) > 2
+        or len(hour) > 2
+        or len(minute) > 2
+        or len(second) > 2
+    ):
+        return None
+    fields = (
+        MONTHS[month.lower()],
+        int(day),
+        int(hour),
+        int(minute),
+        int(second),
+    )
+    thisyear = now.year
+    while True:
+        # Raises ValueError for invalid dates, as strptime does
+        tsobj = datetime.datetime(thisyear, *fields)
+        if tsobj < nnow:
+            return tsobj
+        thisyear -= 1
+
+
+def timeparser(now=None):
+    """
+    Gets function extracting timestamps like gettime, parsing each one once
+    :param now: date to guess the year of syslog timestamps (default: now)
+    :return: function getting a line and returning datetime or None
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    nnow = now + datetime.timedelta(hours=12)
+    parsed = {}
+
+    def parse(line):
+        mg = SYSLOG.match(line)
+        if mg is None:
+            mg = ISO.match(line)
+            if mg is None:
+                return None
+        key = mg.group(0)
+        try:
+            return parsed[key]
+        except KeyError:
+            pass
+        value = None
+        if mg.re is SYSLOG:
+            value = _fasttime(mg, now, nnow)
+        if value is None:
+            value = gettime(key, now)
+        parsed[key] = value
+        return value
+
+    return parse
+
+
+def signature(path):
+    """
+    Get signature used to detect changes on a log
+    :param path: log file
+    :return: (size, mtime_ns, inode)
+    """
+    st = os.stat(path)
+    return st.st_size, getattr(st, "st_mtime_ns", st.st_mtime), st.st_ino
+
+
+class Timeline(object):
+    """
+    Timestamps and events of a syslog file.
+
+    Attributes:
+        path (str): log file
+        signature (tuple): signature of the log when parsed
+        offsets (array): byte offset of each line with a new timestamp
+        times (array): seconds since epoch of the timestamp at each offset
+        events (list): (datetime, stopped, started, cmdline) for lines
+                       where journal was stopped, started or kernel
+                       command line was logged, in log order
+    """
+
+    def __init__(self, path, signature, offsets, times, events):
+        self.path = path
+        self.signature = signature
+        self.offsets = offsets
+        self.times = times
+        self.events = events
+
+    @classmethod
+    def build(cls, path, now=None):
+        """
+        Parse a log file
+        :param path: log file
+        :param now: date to guess the year of syslog timestamps (default: now)
+        :return: Timeline
+        """
+        parse = timeparser(now)
+        # Doubles hold offsets exactly up to 2**53 in any python version
+        offsets = array.array("d")
+        times = array.array("d")
+        events = []
+        key = None
+        offset = 0
+
+        logsignature = signature(path)
+        with open(path, "rb") as f:
+            for raw in f:
+                line = raw.rstrip()
+                stopped = line.endswith(b" Journal stopped")
+                started = line.endswith(b" Journal started")
+                cmdline = b" kernel: Command line: " in line
+                if stopped or started or cmdline:
+                    ts = parse(line.decode("utf-8", "replace"))
+                    events.append((ts, stopped, started, cmdline))
+
+                # Consecutive lines usually share the timestamp, only lines
+                # starting with a different one are parsed
+                if (
+                    key is None
+                    or not raw.startswith(key)
+                    or raw[len(key) : len(key) + 1].isdigit()
+                ):
+                    mg = SYSLOGBYTES.match(raw) or ISOBYTES.match(raw)
+                    if mg is not None and mg.group(0) != key:
+                        key = mg.group(0)
+                        try:
+                            ts = parse(key.decode("ascii"))
+                        except ValueError:
+                            # Only dates of events are required to be valid
+                            ts = None
+                        if ts is not None:
+                            offsets.append(offset)
+                            times.append((ts - EPOCH).total_seconds())
+
+                offset += len(raw)
+
+        return cls(path, logsignature, offsets, times, events)
+
+    def window(self, start=None, end=None):
+        """
+        Get byte offsets of the lines logged within a time window
+
+        The log is expected to be in chronological order.
+
+        :param start: datetime of first line (default: start of log)
+        :param end: datetime after last line (default: end of log)
+        :return: (first offset, offset after last line or None for end of log)
+        """
+        first = 0
+        if start is not None:
+            position = bisect.bisect_left(self.times, (start - EPOCH).total_seconds())
+            if position < len(self.offsets):
+                first = int(self.offsets[position])
+            else:
+                first = self.signature[0]
+
+        last = None
+        if end is not None:
+            position = bisect.bisect_left(self.times, (end - EPOCH).total_seconds())
+            if position < len(self.offsets):
+                last = int(self.offsets[position])
+
+        return first, last
+
+    def lines(self, start=None, end=None):
+        """
+        Read the lines logged within a time window
+        :param start: datetime of first line (default: start of log)
+        :param end: datetime after last line (default: end of log)
+        :return: generator of lines
+        """
+        first, last = self.window(start, end)
+        with open(self.path, "rb") as f:
+            f.seek(first)
+            offset = first
+            for raw in f:
+                if last is not None and offset >= last:
+                    break
+                offset += len(raw)
+                yield raw.decode("utf-8", "replace")
+
+
+def _read(filename, path):
+    """
+    Read timeline stored if it's current for the log
+    :param filename: file with stored timeline
+    :param path: log file
+    :return: Timeline or None
+    """
+    try:
+        with open(filename, "rb") as f:
+            data = pickle.load(f)
+        if data["version"] != VERSION or data["signature"] != signature(path):
+            return None
+        return Timeline(
+            path, data["signature"], data["offsets"], data["times"], data["events"]
+        )
+    except (IOError, OSError, EOFError, KeyError, TypeError, pickle.PickleError):
+        return None
+
+
+def _write(filename, timeline):
+    """
+    Store timeline for other plugins
+    :param filename: file to write
+    :param timeline: Timeline to store
+    """
+    data = {
+        "version": VERSION,
+        "signature": timeline.signature,
+        "offsets": timeline.offsets,
+        "times": timeline.times,
+        "events": timeline.events,
+    }
+    temp_file = "%s.%s.tmp" % (filename, os.getpid())
+    try:
+        with open(temp_file, "wb") as f:
+            pickle.dump(data, f, protocol=2)
+        os.rename(temp_file, filename)
+    except (IOError, OSError, pickle.PickleError):
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def load(path, now=None, tmp=None):
+    """
+    Get timeline of a log, parsed once for all the plugins of a risu run
+    :param path: log file
+    :param now: date to guess the year of syslog timestamps (default: now)
+    :param tmp: folder to store timeline (default: RISU_TMP, not stored if unset)
+    :return: Timeline
+    :raises IOError: if log can't be read
+    """
+    if tmp is None:
+        tmp = os.environ.get("RISU_TMP")
+    if not tmp or not os.path.isdir(tmp):
+        return Timeline.build(path, now)
+
+    filename = os.path.join(
+        tmp,
+        "timeline-%s.pkl"
+        % hashlib.sha512(os.path.abspath(path).encode("UTF-8")).hexdigest()[:32],
+    )
+
+    # Plugins running at the same time wait for the first one to parse the log
+    with open(filename + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        timeline = _read(filename, path)
+        if timeline is None:
+            timeline = Timeline.build(path, now)
+            _write(filename, timeline)
+
+    return timeline
@@ -13,7 +13,7 @@ import unittest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import risuclient.shell as risu
-from maguiclient import autogroup
+from maguiclient import autogroup, magui, views
 
 
 class TestAutoGroupManager(unittest.TestCase):
@@ -217,5 +217,85 @@ class TestLegacyFunctions(unittest.TestCase):
         self.assertIsNotNone(todel)
 
 
+def faraday_result(name, errs, rc=risu.RC_OKAY):
+    """Grouped results of a faraday plugin with err for each host"""
+    return {
+        "plugin": "/plugins/faraday/%s/file.sh" % name,
+        "path": "${RISU_ROOT}/etc/%s" % name,
+        "backend": "faraday",
+        "id": name,
+        "name": "faraday: %s" % name,
+        "sosreport": dict(
+            (host, {"rc": rc, "out": "", "err": err}) for host, err in errs.items()
+        ),
+    }
+
+
+class TestGroupPlanner(unittest.TestCase):
+    """Test cases for running magui plugins over digests of results"""
+
+    def setUp(self):
+        """Set up grouped results, magui plugins and hooks"""
+        self.grouped = {
+            "positive": faraday_result(
+                "positive", {"host1": "a", "host2": "a", "host3": "b", "host4": "a"}
+            ),
+            "negative": faraday_result(
+                "negative", {"host1": "a", "host2": "b", "host3": "b", "host4": "c"}
+            ),
+            "skipped": faraday_result(
+                "skipped", {"host1": "a", "host2": "b"}, rc=risu.RC_SKIPPED
+            ),
+        }
+        maguidir = os.path.dirname(magui.__file__)
+        self.plugins = [
+            plugin
+            for plugin in risu.initPymodules(
+                extensions=risu.getPymodules(
+                    folders=[os.path.join(maguidir, "plugins", "core")]
+                )
+            )[0]
+            if plugin.__name__.endswith("faraday-magui")
+        ]
+        self.triggers = {"faraday-magui": ["positive", "negative", "skipped"]}
+        self.hooks = risu.initPymodules(
+            extensions=risu.getPymodules(folders=[os.path.join(maguidir, "hooks")])
+        )[0]
+        self.planner = autogroup.GroupPlanner(
+            self.grouped, self.plugins, self.triggers, hooks=self.hooks
+        )
+
+    def test_digests(self):
+        """Test equal results get the same codes"""
+        digests = autogroup.ResultDigests(self.grouped).digests["positive"]
+        self.assertEqual(digests["host1"], digests["host2"])
+        self.assertNotEqual(digests["host1"], digests["host3"])
+
+    def test_same_results_as_run(self):
+        """Test plugins over digests give same output as over group results"""
+        self.assertTrue(self.planner.plans(self.plugins[0]))
+        for group in [
+            ["host1", "host2"],
+            ["host1", "host3"],
+            ["host2", "host3", "host4"],
+            ["host3", "host4"],
+        ]:
+            data = views.GroupedView(self.grouped, group)
+            for hook in self.hooks:
+                data = hook.run(data=views.CowDict(data))
+            expected = self.plugins[0].run(
+                data=magui.filterresults(data, self.triggers["faraday-magui"])
+            )
+            self.assertEqual(self.planner.run(group)["faraday-magui"], expected)
+
+    def test_hooks_without_digests(self):
+        """Test plugins are not planned if hooks need group results"""
+        planner = autogroup.GroupPlanner(
+            self.grouped, self.plugins, self.triggers, hooks=[object()]
+        )
+        self.assertFalse(planner.plans(self.plugins[0]))
+        self.assertEqual(planner.run(["host1", "host2"]), {})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -170,6 +170,60 @@ class TestSimpleShellExtension(unittest.TestCase):
         self.assertTrue(hasattr(ext, "help"))
 
 
+class TestInProcessExtension(unittest.TestCase):
+    """Test cases for InProcessExtension class"""
+
+    def setUp(self):
+        """Create extension counting calls to shared function"""
+        self.calls = []
+
+        def read(name):
+            self.calls.append(name)
+            if name == "broken":
+                raise IOError("cannot read %s" % name)
+            return name.upper()
+
+        class TestExt(base.InProcessExtension):
+            extension_name = "test"
+
+            def run(self, plugin):
+                return (
+                    10,
+                    "",
+                    self.cached(("read", plugin["path"]), read, plugin["path"]),
+                )
+
+        self.ext = TestExt()
+
+    def test_runbatch_shares_cached_calls(self):
+        """Test cached() results are reused inside a batch only"""
+        plugins = [{"path": "a"}, {"path": "b"}, {"path": "a"}]
+        results = self.ext.runbatch(plugins)
+        self.assertEqual(results, [(10, "", "A"), (10, "", "B"), (10, "", "A")])
+        self.assertEqual(self.calls, ["a", "b"])
+
+        self.ext.runbatch(plugins)
+        self.assertEqual(self.calls, ["a", "b", "a", "b"])
+
+    def test_run_without_batch_does_not_cache(self):
+        """Test cached() just calls function outside batches"""
+        self.ext.run({"path": "a"})
+        self.ext.run({"path": "a"})
+        self.assertEqual(self.calls, ["a", "a"])
+
+    def test_runbatch_reports_failing_plugin(self):
+        """Test one plugin failing does not affect the rest of the batch"""
+        results = self.ext.runbatch([{"path": "broken"}, {"path": "a"}])
+        self.assertEqual(results[0][0], 3)
+        self.assertIn("cannot read broken", results[0][2])
+        self.assertEqual(results[1], (10, "", "A"))
+
+    def test_exports_runbatch(self):
+        """Test runbatch is exported for in-process extensions"""
+        exports = base.create_extension_exports(self.ext.__class__)
+        self.assertIn("runbatch", exports)
+
+
 class TestCreateExtensionExports(unittest.TestCase):
     """Test cases for create_extension_exports helper"""
 
@@ -6,15 +6,23 @@
 
 from __future__ import print_function
 
+import hashlib
 import os
+import shutil
 import sys
 import tempfile
+import time
 import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from risuclient import cache
 
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 
 class TestMetadataCache(unittest.TestCase):
     """Test cases for MetadataCache class"""
@@ -170,6 +178,30 @@ class TestMetadataCache(unittest.TestCase):
         new_cache = cache.MetadataCache(cache_file=self.temp_file.name)
         self.assertEqual(len(new_cache._cache), 0)
 
+    def test_cache_handles_truncated_file(self):
+        """Test cache handles a partially written cache file"""
+        self.cache.set(self.temp_file.name, {"priority": 800})
+        self.cache.save()
+        with open(self.temp_file.name, "rb") as f:
+            content = f.read()
+        for length in [0, len(content) - 1]:
+            with open(self.temp_file.name, "wb") as f:
+                f.write(content[:length])
+
+            new_cache = cache.MetadataCache(cache_file=self.temp_file.name)
+            self.assertEqual(len(new_cache._cache), 0)
+
+    def test_cache_save_leaves_no_shared_temp_file(self):
+        """Test cache is written through a temp file of this process"""
+        self.cache.set(self.temp_file.name, {"priority": 800})
+        self.assertTrue(self.cache.save())
+        folder = os.path.dirname(self.temp_file.name)
+        name = os.path.basename(self.temp_file.name)
+        self.assertFalse(os.path.exists(self.temp_file.name + ".tmp"))
+        self.assertEqual(
+            [x for x in os.listdir(folder) if x.startswith(name + ".")], []
+        )
+
     def test_cache_handles_permission_error(self):
         """Test cache handles permission errors gracefully"""
         # This test may not work on all platforms
@@ -194,5 +226,319 @@ class TestMetadataCache(unittest.TestCase):
                 os.chmod(self.temp_file.name, 0o644)
 
 
+class TestPluginIndex(unittest.TestCase):
+    """Test cases for PluginIndex class"""
+
+    def setUp(self):
+        """Set up index and plugin tree in temporary folder"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.index_file = os.path.join(self.tmpdir, "index.pkl")
+        self.tree = os.path.join(self.tmpdir, "plugins")
+        os.makedirs(os.path.join(self.tree, "system"))
+        self.plugin = os.path.join(self.tree, "system", "check.sh")
+        with open(self.plugin, "w") as f:
+            f.write("#!/bin/bash\n")
+        self.index = cache.PluginIndex(index_file=self.index_file)
+
+    def tearDown(self):
+        """Clean up temporary folder"""
+        shutil.rmtree(self.tmpdir)
+
+    def test_empty_index_is_usable(self):
+        """Test new index starts empty"""
+        self.assertEqual(len(self.index), 0)
+        self.assertIsNone(self.index.get(self.plugin))
+
+    def test_set_and_get(self):
+        """Test stored entries are returned as copies"""
+        self.index.set(self.plugin, {"hash": "abc"}, key="core")
+        entry = self.index.get(self.plugin, key="core")
+        self.assertEqual(entry, {"hash": "abc"})
+        entry["hash"] = "modified"
+        self.assertEqual(self.index.get(self.plugin, key="core"), {"hash": "abc"})
+        self.assertIsNone(self.index.get(self.plugin, key="other"))
+
+    def test_changed_file_invalidates_entry(self):
+        """Test entry is dropped when file size changes"""
+        self.index.set(self.plugin, {"hash": "abc"})
+        with open(self.plugin, "a") as f:
+            f.write("exit 0\n")
+        self.assertIsNone(self.index.get(self.plugin))
+
+    def test_persistence(self):
+        """Test index is saved and loaded back"""
+        self.index.set(self.plugin, {"hash": "abc"})
+        self.assertTrue(self.index.save())
+        loaded = cache.PluginIndex(index_file=self.index_file)
+        self.assertEqual(loaded.get(self.plugin), {"hash": "abc"})
+
+    def test_version_mismatch_discards_index(self):
+        """Test index from other version is ignored"""
+        self.index.set(self.plugin, {"hash": "abc"})
+        self.index.save()
+        with open(self.index_file, "rb") as f:
+            data = pickle.load(f)
+        data["version"] = -1
+        with open(self.index_file, "wb") as f:
+            pickle.dump(data, f)
+        self.assertEqual(len(cache.PluginIndex(index_file=self.index_file)), 0)
+
+    def test_walk_matches_os_walk(self):
+        """Test walk returns same files as os.walk"""
+        expected = sorted(
+            os.path.join(root, name)
+            for root, dirs, files in os.walk(self.tree)
+            for name in files
+        )
+        for _ in range(2):
+            found = sorted(
+                os.path.join(root, name)
+                for root, dirs, files in self.index.walk(self.tree)
+                for name in files
+            )
+            self.assertEqual(found, expected)
+
+    def test_walk_sees_new_files(self):
+        """Test folder listing is refreshed when folder changes"""
+        list(self.index.walk(self.tree))
+        newplugin = os.path.join(self.tree, "system", "new.sh")
+        with open(newplugin, "w") as f:
+            f.write("#!/bin/bash\n")
+        # Ensure folder mtime differs even on coarse timestamp filesystems
+        folder = os.path.dirname(newplugin)
+        stat = os.stat(folder)
+        os.utime(folder, (stat.st_atime, stat.st_mtime + 10))
+        found = [
+            os.path.join(root, name)
+            for root, dirs, files in self.index.walk(self.tree)
+            for name in files
+        ]
+        self.assertIn(newplugin, found)
+
+    def test_walk_missing_folder(self):
+        """Test walking a missing folder yields nothing"""
+        self.assertEqual(list(self.index.walk("/__does_not_exist__")), [])
+
+    def test_max_entries(self):
+        """Test oldest plugins and folder listings are dropped on save"""
+        self.index.MAX_ENTRIES = 1
+        other = os.path.join(self.tree, "other.sh")
+        with open(other, "w") as f:
+            f.write("#!/bin/bash\n")
+        self.index.set(self.plugin, {"hash": "abc"})
+        self.index.set(other, {"hash": "def"})
+        list(self.index.walk(self.tree))
+        self.assertTrue(self.index.save())
+
+        loaded = cache.PluginIndex(index_file=self.index_file)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.get(other), {"hash": "def"})
+        self.assertEqual(len(loaded._folders), 1)
+
+
+class TestPluginRegistry(unittest.TestCase):
+    """Test cases for PluginRegistry class"""
+
+    def setUp(self):
+        """Create registry from plugin dictionaries"""
+        self.plugins = [
+            {"plugin": "/plugins/core/system/kernel.sh", "id": "a"},
+            {"plugin": "/plugins/faraday/positive/hosts.sh", "id": "b"},
+            {"plugin": "/plugins/faraday/negative/machine-id.sh", "id": "c"},
+            {"plugin": "/plugins/core/openstack/nova.sh", "id": "d"},
+        ]
+        self.registry = cache.PluginRegistry(self.plugins)
+
+    def test_getids_include(self):
+        """Test any include filter selects a plugin"""
+        ids = self.registry.getids(include=["faraday/positive", "faraday/negative"])
+        self.assertEqual(ids, ["b", "c"])
+
+    def test_getids_exclude(self):
+        """Test exclude filters remove plugins"""
+        ids = self.registry.getids(include=["/core/"], exclude=["nova"])
+        self.assertEqual(ids, ["a"])
+
+    def test_getids_no_filters(self):
+        """Test all plugins are returned in order without filters"""
+        self.assertEqual(self.registry.getids(), ["a", "b", "c", "d"])
+
+    def test_short_and_missing_substrings(self):
+        """Test filters shorter than a trigram or not present"""
+        self.assertEqual(self.registry.substring(".s"), set([0, 1, 2, 3]))
+        self.assertEqual(self.registry.substring("potato"), set())
+
+    def test_prefix(self):
+        """Test prefix lookups"""
+        self.assertEqual(self.registry.prefix("/plugins/core/"), set([0, 3]))
+        self.assertEqual(self.registry.prefix("/nope"), set())
+
+    def test_matches_linear_scan(self):
+        """Test lookups match a plain substring scan"""
+        for text in ["core", "sh", "/plugins/", "id.sh", "x", "hosts"]:
+            expected = set(
+                position
+                for position, plugin in enumerate(self.plugins)
+                if text in plugin["plugin"]
+            )
+            self.assertEqual(self.registry.substring(text), expected)
+
+
+class TestBuildCache(unittest.TestCase):
+    """Test cases for BuildCache class"""
+
+    def setUp(self):
+        """Set up build cache in temporary folder"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = cache.BuildCache(cache_dir=self.temp_dir)
+        self.builds = []
+
+    def tearDown(self):
+        """Clean up temporary folder"""
+        shutil.rmtree(self.temp_dir)
+
+    def compile(self, output):
+        """Fake compiler writing a script"""
+        self.builds.append(output)
+        with open(output, "w") as f:
+            f.write("#!/bin/sh\necho built\n")
+        return True
+
+    def test_build_once(self):
+        """Test binary is built once and then reused"""
+        binary = self.cache.build("hash", "go1", "plugin", self.compile)
+        self.assertTrue(os.access(binary, os.X_OK))
+        self.assertEqual(os.path.basename(binary), "plugin")
+        self.assertEqual(
+            self.cache.build("hash", "go1", "plugin", self.compile), binary
+        )
+        self.assertEqual(self.cache.get("hash", "go1", "plugin"), binary)
+        self.assertEqual(len(self.builds), 1)
+
+    def test_key_includes_toolchain(self):
+        """Test changing source or toolchain builds a new binary"""
+        binary = self.cache.build("hash", "go1", "plugin", self.compile)
+        self.assertNotEqual(
+            self.cache.build("hash", "go2", "plugin", self.compile), binary
+        )
+        self.assertNotEqual(
+            self.cache.build("other", "go1", "plugin", self.compile), binary
+        )
+        self.assertEqual(len(self.builds), 3)
+
+    def test_failed_build(self):
+        """Test failed builds leave nothing behind"""
+        binary = self.cache.build("hash", "go1", "plugin", lambda output: False)
+        self.assertIsNone(binary)
+        self.assertIsNone(self.cache.get("hash", "go1", "plugin"))
+        folder = os.path.dirname(self.cache.path("hash", "go1", "plugin"))
+        self.assertEqual(os.listdir(folder), [])
+
+    def test_prune_least_recently_used(self):
+        """Test binaries not used lately are removed beyond MAX_ENTRIES"""
+        self.cache.MAX_ENTRIES = 2
+        first = self.cache.build("first", "go1", "plugin", self.compile)
+        second = self.cache.build("second", "go1", "plugin", self.compile)
+        for binary in [first, second]:
+            os.utime(os.path.dirname(binary), (1, 1))
+
+        # Using the binary keeps it
+        self.assertEqual(self.cache.get("first", "go1", "plugin"), first)
+        self.cache.build("third", "go1", "plugin", self.compile)
+        self.assertEqual(len(os.listdir(self.temp_dir)), 2)
+        self.assertEqual(self.cache.get("first", "go1", "plugin"), first)
+        self.assertIsNone(self.cache.get("second", "go1", "plugin"))
+
+
+class TestHashCache(unittest.TestCase):
+    """Test cases for HashCache class"""
+
+    def setUp(self):
+        """Set up cache and file to hash in temporary folder"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tmpdir, "hashes.pkl")
+        self.filename = os.path.join(self.tmpdir, "file")
+        with open(self.filename, "w") as f:
+            f.write("contents")
+        self.calls = []
+
+    def tearDown(self):
+        """Clean up temporary folder"""
+        shutil.rmtree(self.tmpdir)
+
+    def digest(self, path):
+        """Hash function counting calls"""
+        self.calls.append(path)
+        with open(path, "rb") as f:
+            return hashlib.sha512(f.read()).hexdigest()
+
+    def test_hash_once(self):
+        """Test same file is hashed once, also through other paths"""
+        link = os.path.join(self.tmpdir, "link")
+        os.symlink(self.filename, link)
+        hashcache = cache.HashCache(cache_file=self.cache_file)
+        first = hashcache.hash(self.filename, self.digest)
+        self.assertEqual(hashcache.hash(link, self.digest), first)
+        self.assertEqual(self.calls, [self.filename])
+
+    def test_changed_file_is_hashed_again(self):
+        """Test changes in size or mtime invalidate the hash"""
+        hashcache = cache.HashCache(cache_file=self.cache_file)
+        first = hashcache.hash(self.filename, self.digest)
+        with open(self.filename, "w") as f:
+            f.write("other contents")
+        self.assertNotEqual(hashcache.hash(self.filename, self.digest), first)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_restored_mtime_is_hashed_again(self):
+        """Test contents replaced keeping size and mtime invalidate the hash"""
+        hashcache = cache.HashCache(cache_file=self.cache_file)
+        first = hashcache.hash(self.filename, self.digest)
+        st = os.stat(self.filename)
+        # As tar does when extracting a file
+        time.sleep(0.01)
+        with open(self.filename, "w") as f:
+            f.write("CONTENTS")
+        os.utime(self.filename, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertNotEqual(hashcache.hash(self.filename, self.digest), first)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_not_regular_files_are_not_cached(self):
+        """Test folders or missing files are passed to hash function"""
+        hashcache = cache.HashCache(cache_file=self.cache_file)
+        hashcache.hash(self.tmpdir, lambda path: None)
+        self.assertEqual(len(hashcache), 0)
+
+    def test_persistence_merges_processes(self):
+        """Test entries saved by several instances are all kept"""
+        other = os.path.join(self.tmpdir, "other")
+        with open(other, "w") as f:
+            f.write("other")
+
+        first = cache.HashCache(cache_file=self.cache_file)
+        second = cache.HashCache(cache_file=self.cache_file)
+        first.hash(self.filename, self.digest)
+        second.hash(other, self.digest)
+        self.assertTrue(first.save())
+        self.assertTrue(second.save())
+
+        third = cache.HashCache(cache_file=self.cache_file)
+        third.hash(self.filename, self.digest)
+        third.hash(other, self.digest)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_max_entries(self):
+        """Test oldest entries are dropped on save"""
+        hashcache = cache.HashCache(cache_file=self.cache_file)
+        hashcache.MAX_ENTRIES = 1
+        for name in ["a", "b"]:
+            path = os.path.join(self.tmpdir, name)
+            with open(path, "w") as f:
+                f.write(name)
+            hashcache.hash(path, self.digest)
+        hashcache.save()
+        self.assertEqual(len(cache.HashCache(cache_file=self.cache_file)), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -6,8 +6,11 @@
 
 from __future__ import print_function
 
+import json
 import os
+import shutil
 import sys
+import tempfile
 import time
 import unittest
 
@@ -32,6 +35,14 @@ def error_plugin_function(plugin):
     raise ValueError("Intentional error for testing")
 
 
+def sleepy_plugin_function(plugin):
+    """Sample function sleeping the time requested by plugin"""
+    if plugin.get("fail"):
+        raise ValueError("Intentional error for testing")
+    time.sleep(plugin.get("sleep", 0))
+    return {"id": plugin["id"], "rc": 10, "out": "x" * 1000, "err": ""}
+
+
 class TestPluginExecutor(unittest.TestCase):
     """Test cases for PluginExecutor class"""
 
@@ -108,5 +119,107 @@ class TestPluginExecutor(unittest.TestCase):
         self.assertEqual(len(non_none), 1)
 
 
+class TestStreamingExecution(unittest.TestCase):
+    """Test cases for completion order execution and result sinks"""
+
+    def test_results_in_completion_order(self):
+        """Test a slow plugin doesn't hold back the others"""
+        plugins = [{"id": "slow", "sleep": 1}] + [
+            {"id": "fast%s" % i} for i in range(4)
+        ]
+        exec_obj = executor.PluginExecutor(num_processes=2)
+        order = [
+            result["id"]
+            for plugin, result in exec_obj.iter_results(plugins, sleepy_plugin_function)
+        ]
+        self.assertEqual(sorted(order), sorted(plugin["id"] for plugin in plugins))
+        self.assertEqual(order[-1], "slow")
+
+    def test_errors_are_reported_per_plugin(self):
+        """Test exceptions are turned into results for the failing plugin"""
+        plugins = [
+            {"id": "good", "plugin": "good.sh"},
+            {"fail": True, "plugin": "bad.sh"},
+        ]
+        exec_obj = executor.PluginExecutor(num_processes=2)
+        sink = exec_obj.execute_plugins_streaming(plugins, sleepy_plugin_function)
+        errors = [result for result in sink.results if result["rc"] == 3]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]["plugin"], "bad.sh")
+        self.assertIn("Intentional error", errors[0]["err"])
+
+    def test_bounded_in_flight(self):
+        """Test execution completes with a single task in flight"""
+        plugins = [{"id": "%s" % i} for i in range(20)]
+        exec_obj = executor.PluginExecutor(num_processes=4)
+        progress = []
+        sink = exec_obj.execute_plugins_streaming(
+            plugins,
+            sleepy_plugin_function,
+            sink=executor.DictSink(),
+            progress_callback=lambda plugin, result: progress.append(plugin),
+            max_pending=1,
+        )
+        self.assertEqual(len(sink.results), 20)
+        self.assertEqual(len(progress), 20)
+
+    def test_dict_sink_flattens_batches(self):
+        """Test batch results are stored by id"""
+        sink = executor.DictSink()
+        sink.add([{}, {}], [{"id": "a"}, {"id": "b"}, None])
+        sink.add({}, {"rc": 3})
+        self.assertEqual(sorted(sink.results), ["a", "b"])
+
+    def test_dict_sink_reports_task_errors(self):
+        """Test plugins of tasks failed or timed out are stored as failed"""
+        batch = [{"id": "a", "hash": "x", "plugin": "a.sh"}, {"id": "b"}]
+        sink = executor.DictSink(failed=20)
+        sink.add(batch, executor._error_result(batch, "Plugin execution timed out"))
+        self.assertEqual(sorted(sink.results), ["a", "b"])
+        self.assertEqual(
+            sink.results["a"],
+            {
+                "id": "a",
+                "plugin": "a.sh",
+                "result": {"rc": 20, "out": "", "err": "Plugin execution timed out"},
+            },
+        )
+
+        plugins = [{"id": "good"}, {"id": "bad", "fail": True}]
+        exec_obj = executor.PluginExecutor(num_processes=2)
+        sink = exec_obj.execute_plugins_streaming(
+            plugins, sleepy_plugin_function, sink=executor.DictSink(failed=20)
+        )
+        self.assertEqual(sink.results["bad"]["result"]["rc"], 20)
+        self.assertIn("Intentional error", sink.results["bad"]["result"]["err"])
+
+    def test_json_stream_sink(self):
+        """Test results are written as a valid risu.json layout"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "risu.json")
+            plugins = [{"id": "%s" % i} for i in range(5)]
+            exec_obj = executor.PluginExecutor(num_processes=2)
+            exec_obj.execute_plugins_streaming(
+                plugins,
+                sleepy_plugin_function,
+                sink=executor.JSONStreamSink(filename),
+            )
+            with open(filename) as f:
+                results = json.load(f)["results"]
+            self.assertEqual(sorted(results), sorted(p["id"] for p in plugins))
+            self.assertEqual(os.listdir(tmpdir), ["risu.json"])
+
+            # Aborted writes leave previous file untouched
+            sink = executor.JSONStreamSink(filename)
+            sink.add({}, {"id": "partial"})
+            sink.abort()
+            with open(filename) as f:
+                self.assertEqual(len(json.load(f)["results"]), 5)
+            self.assertEqual(os.listdir(tmpdir), ["risu.json"])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
 if __name__ == "__main__":
     unittest.main()
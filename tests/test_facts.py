@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Unit tests for risuclient/facts.py
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import risuclient.shell as risu
+from risuclient import facts
+
+# Helpers whose output must be the same with and without facts
+HELPERS = [
+    "discover_os",
+    "discover_release",
+    "discover_rhrelease",
+    "discover_osbrand",
+    "discover_osp_version",
+    "discover_ocp_version",
+    "is_rpm openstack-nova-common",
+    "is_rpm kernel",
+    "is_rpm compat",
+    "is_rpm compat-1abi",
+    "is_rpm openstack-.*",
+    "is_dpkg bash",
+    "is_pkg_over kernel 3.10.0-1",
+    "is_pkg_over kernel 3.10.0-2",
+    "is_pkg_over kernel 3.10.0-100.el7.x86_64",
+    "is_pkg_over bash 5.0",
+    "is_pkg_over bash 5.1",
+    "is_required_pkg_over kernel 4",
+    "is_required_pkg_over missing 1",
+    "is_required_pkg_over freeradius freeradius-3.0.5-0",
+    'echo "${journalctl_file}"',
+    'echo "${systemctl_list_units_enabled_file}"',
+    "is_date_over_today 2000-01-01",
+    "are_dates_diff_over 360 2000-01-01 now",
+    "are_dates_diff_over 30 2024-01-01 2024-01-15",
+    "dates_to_epoch 2024-01-01 2024-01-15; are_dates_diff_over 10 2024-01-01 2024-01-15",
+]
+
+SOSREPORTS = {
+    "rhel": {
+        "etc/os-release": 'ID="rhel"\nID_LIKE="fedora"\nVERSION_ID="7.9"\n',
+        "etc/redhat-release": "Red Hat Enterprise Linux Server release 7.9 (Maipo)\n",
+        "installed-rpms": "kernel-3.10.0-1.el7.x86_64   Mon\n"
+        "kernel-3.10.0-20.el7.x86_64   Mon\n"
+        "compat-1abi-2.0-1.el7.x86_64   Mon\n"
+        "openstack-nova-common-17.0.1-1.el7.noarch  Tue\n"
+        "atomic-openshift-3.11.154-1.git.0.7a097ad.el7.x86_64 Wed\n",
+        "sos_commands/systemd/systemctl_list-unit-files": "sshd.service enabled\n",
+        "sos_commands/logs/journalctl_--all_--this-boot_--no-pager": "boot\n",
+    },
+    "norpms": {
+        "etc/redhat-release": "CentOS Linux release 8.2 (Core)\n",
+    },
+    "debian": {
+        "etc/os-release": "ID=ubuntu\nID_LIKE=debian\nVERSION_ID=20.04\n",
+        "installed-debs": "ii  bash 5.0 amd64\nii  bash 5.0-6 amd64\n",
+    },
+}
+
+
+class TestFacts(unittest.TestCase):
+    """Test cases for precomputed facts"""
+
+    def setUp(self):
+        """Create temporary folder for execution"""
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up"""
+        shutil.rmtree(self.tmp)
+
+    def sosreport(self, files):
+        """Create sosreport with files"""
+        root = tempfile.mkdtemp(dir=self.tmp)
+        for filename, content in files.items():
+            filename = os.path.join(root, filename)
+            if not os.path.isdir(os.path.dirname(filename)):
+                os.makedirs(os.path.dirname(filename))
+            with open(filename, "w") as f:
+                f.write(content)
+        return root
+
+    def helpers(self, environ):
+        """Output of helpers from common.d"""
+        outputs = []
+        for helper in HELPERS:
+            p = subprocess.Popen(
+                [
+                    "bash",
+                    "-c",
+                    ". %s/common-functions.sh; %s; echo $?" % (risu.risudir, helper),
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=environ,
+            )
+            outputs.append(p.communicate())
+        return outputs
+
+    def environ(self, root):
+        """Environment for plugins without facts"""
+        environ = dict(
+            (name, value)
+            for name, value in os.environ.items()
+            if not name.startswith("RISU_FACT")
+        )
+        environ.update(
+            {
+                "RISU_ROOT": root,
+                "RISU_LIVE": "0",
+                "RISU_TMP": self.tmp,
+                "RISU_BASE": risu.risudir,
+                "RC_SKIPPED": "%s" % risu.RC_SKIPPED,
+                "RC_FAILED": "%s" % risu.RC_FAILED,
+            }
+        )
+        return environ
+
+    def test_helpers_match_facts(self):
+        """Test helpers give the same output using facts"""
+        for name, files in SOSREPORTS.items():
+            root = self.sosreport(files)
+            environ = self.environ(root)
+            expected = self.helpers(environ)
+
+            facts.export(environ, root=root, live=False, tmp=self.tmp)
+            self.assertEqual(self.helpers(environ), expected, name)
+
+    def test_facts_values(self):
+        """Test computed values"""
+        root = self.sosreport(SOSREPORTS["rhel"])
+        computed = facts.getfacts(root, live=False, tmp=self.tmp)
+        self.assertEqual(computed["RISU_FACT_OS"], "fedora")
+        self.assertEqual(computed["RISU_FACT_RHRELEASE"], "7")
+        self.assertEqual(computed["RISU_FACT_OSP_VERSION"], "13")
+        self.assertEqual(computed["RISU_FACT_OCP_MINOR"], "3.11.154")
+        self.assertEqual(
+            computed["RISU_FACT_RPM_INDEX"], os.path.join(self.tmp, "rpms.index")
+        )
+
+    def test_rpmindex(self):
+        """Test rpms are indexed by all names is_rpm matches"""
+        index = facts.rpmindex(["compat-1abi-2.0-1.x86_64", "kernel-3.10-1.x86_64"])
+        self.assertEqual(
+            sorted(index),
+            ["compat", "compat-1abi", "compat-1abi-2.0", "kernel", "kernel-3.10"],
+        )
+        self.assertEqual(index["compat"], ["compat-1abi-2.0-1.x86_64"])
+
+    def test_writeindex(self):
+        """Test index has latest version first and is replaced on rewrite"""
+        dirname = os.path.join(self.tmp, "index")
+        facts.writeindex(dirname, {"bash": ["5.1", "5.0"], "a.b": ["1"]})
+        facts.writeindex(dirname, {"bash": ["5.0", "5.1"]})
+        self.assertEqual(os.listdir(dirname), ["bash"])
+        with open(os.path.join(dirname, "bash")) as f:
+            self.assertEqual(f.read(), "5.1\n5.0\n5.1\n")
+
+    def test_latest(self):
+        """Test latest version is found as sort -V does"""
+        index = {"kernel": ["kernel-3.10.0-9.el7", "kernel-3.10.0-10.el7"]}
+        self.assertEqual(facts.latest(index), {"kernel": "kernel-3.10.0-10.el7"})
+
+    def test_unknown_facts_not_exported(self):
+        """Test facts that depend on missing package lists are left to helpers"""
+        root = self.sosreport(SOSREPORTS["norpms"])
+        computed = facts.getfacts(root, live=False, tmp=self.tmp)
+        self.assertNotIn("RISU_FACT_RPMS", computed)
+        self.assertNotIn("RISU_FACT_OSP_VERSION", computed)
+        self.assertNotIn("RISU_FACT_OCP_MINOR", computed)
+
+    def test_export_replaces_facts(self):
+        """Test facts from another sosreport are dropped"""
+        environ = {"RISU_FACT_STALE": "1"}
+        facts.export(environ, root=self.sosreport({}), live=False, tmp=self.tmp)
+        self.assertNotIn("RISU_FACT_STALE", environ)
+        self.assertIn(facts.KEY, environ)
+
+    def test_dates_converted_once(self):
+        """Test dates converted in batch or already converted don't run date"""
+        environ = self.environ(self.sosreport({}))
+        facts.export(environ, root=environ["RISU_ROOT"], live=False, tmp=self.tmp)
+        script = (
+            ". %s/common-functions.sh; dates_to_epoch 2024-01-01 'Jan 15 2024';"
+            " date_to_epoch 2024-02-01; PATH=;"
+            " date_to_epoch 2024-01-01; echo ${DATE_EPOCH};"
+            " date_to_epoch 2024-02-01; echo ${DATE_EPOCH};"
+            " are_dates_diff_over 13 now 'Jan 15 2024' && echo over" % risu.risudir
+        )
+        out = subprocess.check_output(["bash", "-c", script], env=environ)
+        expected = [
+            subprocess.check_output(["date", "-d", date, "+%s"]).decode().strip()
+            for date in ["2024-01-01", "2024-02-01"]
+        ]
+        self.assertEqual(out.decode().split(), expected + ["over"])
+
+    def test_stale_facts_ignored(self):
+        """Test helpers ignore facts computed for another root"""
+        root = self.sosreport(SOSREPORTS["rhel"])
+        environ = self.environ(root)
+        facts.export(environ, root=root, live=False, tmp=self.tmp)
+
+        environ["RISU_ROOT"] = self.sosreport(SOSREPORTS["debian"])
+        self.assertEqual(
+            self.helpers(environ), self.helpers(self.environ(environ["RISU_ROOT"]))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Unit tests for risuclient/fleet.py
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from risuclient import fleet
+
+
+def analyze(path, suffix=""):
+    """Function analyzing a path in workers"""
+    if path.endswith("broken"):
+        raise ValueError("broken sosreport")
+    return {"path": path + suffix, "pid": os.getpid()}
+
+
+class TestFleet(unittest.TestCase):
+    """Test cases for discovery and analysis of sosreports"""
+
+    def setUp(self):
+        """Create folder tree with sosreports"""
+        self.root = tempfile.mkdtemp()
+        for filename in [
+            "case1/sosreport-a/risu.json",
+            "case1/sosreport-a/sos_commands/risu/risu.json",
+            "case1/sosreport-a/var/tmp/risu.json",
+            "case2/nested/sosreport-b/risu.json",
+            "case2/nested/sosreport-b/etc/hosts",
+            "case3/sosreport-c/sos_commands/networking/ip_a",
+            "case3/sosreport-c/var/sosreport-d/risu.json",
+            "case4/var/sosreport-e/risu.json",
+            "case5/sosreport-f/risu.json.gz",
+            "case5/sosreport-f/var/sosreport-g/risu.json",
+        ]:
+            filename = os.path.join(self.root, filename)
+            if not os.path.isdir(os.path.dirname(filename)):
+                os.makedirs(os.path.dirname(filename))
+            with open(filename, "w") as f:
+                f.write("{}")
+
+    def tearDown(self):
+        """Remove folder tree"""
+        shutil.rmtree(self.root)
+
+    def test_findresults(self):
+        """Test results are found without entering sosreport folders"""
+        self.assertEqual(
+            fleet.findresults(self.root),
+            [
+                os.path.join(self.root, "case1/sosreport-a"),
+                os.path.join(self.root, "case2/nested/sosreport-b"),
+                os.path.join(self.root, "case4/var/sosreport-e"),
+                os.path.join(self.root, "case5/sosreport-f"),
+            ],
+        )
+
+    def test_split(self):
+        """Test CPU budget is shared between paths and their plugins"""
+        self.assertEqual(fleet.split(2, 8), (2, 4))
+        self.assertEqual(fleet.split(10, 4), (4, 1))
+        self.assertEqual(fleet.split(0, 4), (1, 4))
+
+    def test_analyze(self):
+        """Test all paths are analyzed in workers and errors reported"""
+        paths = ["a", "b", "c", "broken"]
+        found = {}
+        errors = {}
+        for path, result, error in fleet.analyze(paths, analyze, workers=2, suffix="!"):
+            if error is None:
+                found[path] = result
+            else:
+                errors[path] = error
+
+        self.assertEqual(sorted(found), ["a", "b", "c"])
+        self.assertEqual(found["a"]["path"], "a!")
+        self.assertNotIn(os.getpid(), [result["pid"] for result in found.values()])
+        self.assertEqual(list(errors), ["broken"])
+        self.assertIn("broken sosreport", errors["broken"])
+
+    def test_analyze_sequential(self):
+        """Test a single worker analyzes paths in this process"""
+        results = list(fleet.analyze(["a", "b"], analyze))
+        self.assertEqual([path for path, result, error in results], ["a", "b"])
+        self.assertEqual(results[0][1]["pid"], os.getpid())
+
+
+if __name__ == "__main__":
+    unittest.main()
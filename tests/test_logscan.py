@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Unit tests for risuclient/logscan.py and the extensions using it
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import risuclient.shell as risu
+from risuclient import executor, logscan
+
+sumsos = risu.loadPymodules(
+    {
+        "name": "sumsos",
+        "info": risu.find_module("sumsos", program_paths=[risu.ExtensionFolder]),
+    }
+)
+
+npd = risu.loadPymodules(
+    {
+        "name": "node-problem-detector",
+        "info": risu.find_module(
+            "node-problem-detector", program_paths=[risu.ExtensionFolder]
+        ),
+    }
+)
+
+
+class TestLogScanner(unittest.TestCase):
+    """Test cases for LogScanner class"""
+
+    def setUp(self):
+        """Create log files to scan"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.messages = os.path.join(self.tmpdir, "messages")
+        self.journal = os.path.join(self.tmpdir, "journal")
+        with open(self.messages, "w") as f:
+            f.write("Jan 1 host kernel: EXT4-fs error (device sda1): bad\n")
+            f.write("Jan 1 host sshd[1]: Accepted publickey\n")
+        with open(self.journal, "w") as f:
+            f.write("Jan 1 host MULTIPATHD: mpatha: devmap not registered\n")
+
+        self.patterns = {
+            "ext4": r"kernel: EXT4-fs error \(device .*\): bad",
+            "multipath": "multipathd: .*: devmap not registered",
+            "missing": "this is never logged",
+        }
+
+    def tearDown(self):
+        """Clean up log files"""
+        shutil.rmtree(self.tmpdir)
+
+    def test_scan_finds_patterns_across_files(self):
+        """Test all patterns are checked in all files in one pass"""
+        scanner = logscan.LogScanner(self.patterns)
+        found = scanner.scan([self.journal, self.messages])
+        self.assertEqual(found, set(["ext4", "multipath"]))
+
+    def test_scan_case_sensitive(self):
+        """Test ignorecase can be disabled"""
+        scanner = logscan.LogScanner(self.patterns, ignorecase=False)
+        found = scanner.scan([self.journal, self.messages])
+        self.assertEqual(found, set(["ext4"]))
+
+    def test_scan_ignores_missing_files(self):
+        """Test missing files are skipped"""
+        scanner = logscan.LogScanner(self.patterns)
+        found = scanner.scan([os.path.join(self.tmpdir, "nope"), self.messages])
+        self.assertEqual(found, set(["ext4"]))
+
+    def test_scan_without_grep(self):
+        """Test python fallback gives same results"""
+        scanner = logscan.LogScanner(self.patterns, grep="/nonexistent/grep")
+        found = scanner.scan([self.journal, self.messages])
+        self.assertEqual(found, set(["ext4", "multipath"]))
+
+    def test_scan_timeout(self):
+        """Test a stalled grep is killed once the timeout expires"""
+        grep = os.path.join(self.tmpdir, "grep")
+        with open(grep, "w") as f:
+            f.write("#!/bin/sh\nexec sleep 30\n")
+        os.chmod(grep, 0o755)
+        scanner = logscan.LogScanner(self.patterns, grep=grep)
+        start = time.time()
+        self.assertRaises(logscan.ScanTimeout, scanner.scan, [self.messages], 1)
+        self.assertLess(time.time() - start, 10)
+
+    def test_unsupported_patterns(self):
+        """Test empty or invalid expressions are not scanned"""
+        scanner = logscan.LogScanner({"empty": "", "invalid": "(unclosed"})
+        self.assertEqual(scanner.unsupported, set(["empty", "invalid"]))
+        self.assertEqual(scanner.scan([self.messages]), set())
+
+    def test_compile_ere_posix_classes(self):
+        """Test POSIX character classes are translated"""
+        regexp = logscan.compile_ere("error [[:digit:]]+[[:space:]]found")
+        self.assertTrue(regexp.search("ERROR 42 found"))
+
+    def test_matchfile(self):
+        """Test python expressions are matched at start of lines in one read"""
+        patterns = {
+            "ext4": r"Jan 1 host kernel: EXT4-fs error \(device (\w+)\)",
+            "sshd": r".*sshd\[\d+\]: Accepted",
+            "start": "host",
+            "reference": r"Jan (\d) host sshd\[\1\]",
+            "empty": "",
+        }
+        found = logscan.matchfile(self.messages, patterns)
+        self.assertEqual(sorted(found), ["ext4", "reference", "sshd"])
+        self.assertEqual(found["sshd"], "Jan 1 host sshd[1]: Accepted publickey\n")
+        for key in patterns:
+            self.assertEqual(
+                key in found,
+                bool(risu.regexpfile(filename=self.messages, regexp=patterns[key])),
+            )
+
+    def test_matchfile_inline_flags(self):
+        """Test expressions that can't be combined are checked one by one"""
+        found = logscan.matchfile(
+            self.messages, {"flags": "(?i)jan 1 HOST kernel", "other": "Jan"}
+        )
+        self.assertEqual(sorted(found), ["flags", "other"])
+        self.assertEqual(logscan.matchfile(self.journal + ".missing", {"a": "a"}), {})
+
+
+class TestNodeProblemDetectorExtension(unittest.TestCase):
+    """Test cases for node-problem-detector extension"""
+
+    def test_runbatch_matches_run(self):
+        """Test rules checked in one pass give the same results as one by one"""
+        plugins = list(npd.listplugins())[0]
+        kernel = [plugin for plugin in plugins if plugin["path"].endswith("kern.log")]
+        self.assertTrue(len(kernel) > 1)
+
+        tmpdir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(tmpdir, "var", "log"))
+        with open(os.path.join(tmpdir, "var", "log", "kern.log"), "w") as f:
+            f.write("Jan 1 host kernel: nothing to see\n")
+            f.write("task jbd2:1234 blocked for more than 120 seconds.\n")
+            f.write("divide error: 0000 [#1] SMP\n")
+
+        environ = dict(os.environ)
+        os.environ["RISU_ROOT"] = tmpdir
+        try:
+            results = npd.runbatch(plugins)
+            expected = [npd.run(plugin) for plugin in plugins]
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(results, expected)
+        self.assertIn(risu.RC_FAILED, [result[0] for result in results])
+        self.assertIn(risu.RC_SKIPPED, [result[0] for result in results])
+
+
+class TestSumsosExtension(unittest.TestCase):
+    """Test cases for sumsos extension"""
+
+    def test_unquote(self):
+        """Test bash assignments are unquoted without expansion"""
+        self.assertEqual(sumsos.unquote('"a \\(b\\) \\"c\\""'), 'a \\(b\\) "c"')
+        self.assertEqual(sumsos.unquote("1234"), "1234")
+        self.assertEqual(sumsos.unquote("'$literal'"), "$literal")
+        self.assertIsNone(sumsos.unquote('"$variable"'))
+
+    def test_all_sumsos_plugins_are_canonical(self):
+        """Test shipped sumsos plugins can be evaluated without bash"""
+        for plugin in glob.glob(os.path.join(sumsos.pluginsdir, "*", "*")):
+            declarations = sumsos.get_declarations(plugin)
+            self.assertIsNotNone(declarations, plugin)
+            self.assertIn("REGEXP", declarations)
+
+    def test_runbatch_matches_logs(self):
+        """Test batch results are reported per plugin"""
+        plugins = [
+            {"plugin": plugin}
+            for plugin in sorted(glob.glob(os.path.join(sumsos.pluginsdir, "*", "*")))[
+                :20
+            ]
+        ]
+        regexp = sumsos.get_declarations(plugins[3]["plugin"])["REGEXP"]
+
+        tmpdir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(tmpdir, "var", "log"))
+        with open(os.path.join(tmpdir, "var", "log", "messages"), "w") as f:
+            f.write(regexp.replace(".*", "x").replace("\\", "") + "\n")
+
+        environ = dict(os.environ)
+        os.environ["RISU_ROOT"] = tmpdir
+        os.environ["RISU_LIVE"] = "0"
+        try:
+            results = sumsos.runbatch(plugins)
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(len(results), len(plugins))
+        self.assertEqual(results[3][0], risu.RC_FAILED)
+        self.assertIn(regexp, results[3][2])
+        self.assertEqual(
+            [result[0] for position, result in enumerate(results) if position != 3],
+            [risu.RC_OKAY] * (len(plugins) - 1),
+        )
+
+    def test_runbatch_timeout(self):
+        """Test plugins of a batch timing out are reported as failed"""
+        plugins = [
+            plugin for plugin in risu.findallplugins() if plugin["backend"] == "sumsos"
+        ][:20]
+        self.assertTrue(plugins)
+
+        tmpdir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(tmpdir, "var", "log"))
+        with open(os.path.join(tmpdir, "var", "log", "messages"), "w") as f:
+            f.write("Jan 1 host kernel: nothing to see\n")
+        grep = os.path.join(tmpdir, "grep")
+        with open(grep, "w") as f:
+            f.write("#!/bin/sh\nexec sleep 30\n")
+        os.chmod(grep, 0o755)
+
+        environ = dict(os.environ)
+        os.environ["RISU_ROOT"] = tmpdir
+        os.environ["RISU_LIVE"] = "0"
+        os.environ["PATH"] = "%s:%s" % (tmpdir, os.environ["PATH"])
+        timeout = risu.PLUGIN_TIMEOUT
+        risu.PLUGIN_TIMEOUT = 1
+        try:
+            sink = executor.DictSink(failed=risu.RC_FAILED)
+            sink.add(plugins, risu.runtask([dict(plugin) for plugin in plugins]))
+        finally:
+            risu.PLUGIN_TIMEOUT = timeout
+            os.environ.clear()
+            os.environ.update(environ)
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(
+            sorted(sink.results), sorted(plugin["id"] for plugin in plugins)
+        )
+        for result in sink.results.values():
+            self.assertEqual(result["result"]["rc"], risu.RC_FAILED)
+            self.assertIn("timed out", result["result"]["err"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,26 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 # Copyright (C) 2017-2022 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+import argparse
 import os
+import shutil
 import sys
+import tempfile
+import time
 from unittest import TestCase
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/" + "../"))
 import risuclient.shell as risu
-from maguiclient import magui
+from maguiclient import client, magui
+from risuclient import resultsfile
 
 testplugins = os.path.join(risu.risudir, "plugins", "test")
 
+plugins = [
+    {"id": "plugin1", "hash": "hash1", "plugin": "/plugins/core/plugin1.sh"},
+    {"id": "plugin2", "hash": "hash2", "plugin": "/plugins/core/plugin2.sh"},
+]
+
 
 class MaguiTest(TestCase):
     def test_commonpath(self):
@@ -48,3 +58,92 @@ class MaguiTest(TestCase):
             pass
 
         assert True
+
+    def write_risu(self, sosreport, pluginlist):
+        results = {}
+        for plugin in plugins:
+            results[plugin["id"]] = dict(
+                plugin, result={"rc": risu.RC_OKAY, "out": "", "err": sosreport}
+            )
+        risu.write_results(
+            results,
+            os.path.join(sosreport, "risu.json"),
+            path=sosreport,
+            digest=risu.plugindigest(pluginlist),
+        )
+
+    def test_cached_risu(self):
+        sosreport = tempfile.mkdtemp(prefix="risu-tests-")
+        try:
+            magui_client = client.MaguiClient()
+            assert magui_client.cached_risu(sosreport, plugins) is None
+
+            self.write_risu(sosreport, plugins)
+            cached = magui_client.cached_risu(sosreport, plugins)
+            assert sorted(cached) == ["plugin1", "plugin2"]
+
+            # Plugin changed on disk
+            changed = [plugins[0], dict(plugins[1], hash="other")]
+            assert magui_client.cached_risu(sosreport, changed) is None
+
+            # New plugin added
+            added = plugins + [{"id": "plugin3", "hash": "hash3", "plugin": "3"}]
+            assert magui_client.cached_risu(sosreport, added) is None
+        finally:
+            shutil.rmtree(sosreport)
+
+    def test_domagui_incremental(self):
+        sosreport = tempfile.mkdtemp(prefix="risu-tests-")
+        try:
+            self.write_risu(sosreport, plugins)
+            res = magui.domagui(
+                sosreports=[sosreport],
+                risuplugins=plugins,
+                runhooks=False,
+                incremental=True,
+            )
+            assert res["plugin1"]["sosreport"][sosreport]["err"] == sosreport
+        finally:
+            shutil.rmtree(sosreport)
+
+    def test_uptodate(self):
+        sosreport = tempfile.mkdtemp(prefix="risu-tests-")
+        try:
+            self.write_risu(sosreport, plugins)
+            filename = os.path.join(sosreport, "magui.json")
+            risu.write_results({}, filename, path=[sosreport], source="magui")
+            assert magui.uptodate(filename, [sosreport])
+            assert not magui.uptodate(filename, [sosreport, "/tmp/other"])
+
+            # risu.json written after the magui results
+            later = time.time() + 10
+            os.utime(os.path.join(sosreport, "risu.json"), (later, later))
+            assert not magui.uptodate(filename, [sosreport])
+        finally:
+            shutil.rmtree(sosreport)
+
+    def test_uptodate_digest(self):
+        sosreport = tempfile.mkdtemp(prefix="risu-tests-")
+        try:
+            self.write_risu(sosreport, plugins)
+            filename = os.path.join(sosreport, "magui.json")
+            options = argparse.Namespace(include=[], exclude=[], anon=False)
+            digest = magui.maguidigest([magui.__file__], plugins, options)
+            risu.write_results(
+                [], filename, path=[sosreport], source="magui", digest=digest
+            )
+            assert magui.uptodate(filename, [sosreport], digest=digest)
+            assert not magui.uptodate(filename, [sosreport])
+
+            # Metadata is read from the index, or the results without it
+            assert os.path.exists(filename + resultsfile.INDEX)
+            os.remove(filename + resultsfile.INDEX)
+            assert magui.uptodate(filename, [sosreport], digest=digest)
+
+            # Other options or plugins produce other results
+            options.anon = True
+            assert digest != magui.maguidigest([magui.__file__], plugins, options)
+            assert digest != magui.maguidigest([magui.__file__], plugins[:1], options)
+            assert digest != magui.maguidigest([], plugins, options)
+        finally:
+            shutil.rmtree(sosreport)
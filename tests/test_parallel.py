@@ -9,6 +9,7 @@ from __future__ import print_function
 
 import os
 import sys
+import time
 import unittest
 
 # Add parent directory to path
@@ -71,6 +72,46 @@ class TestParallelRisuExecutor(unittest.TestCase):
         self.assertEqual(result[3], 6)
         self.assertEqual(result[4], 8)
 
+    def test_split_cpus(self):
+        """Test CPU budget is split between sosreports and plugins"""
+        self.assertEqual(parallel.split_cpus(40, 8), (8, 1))
+        self.assertEqual(parallel.split_cpus(2, 8), (2, 4))
+        self.assertEqual(parallel.split_cpus(3, 8), (3, 2))
+        self.assertEqual(parallel.split_cpus(1, 1), (1, 1))
+        self.assertEqual(parallel.split_cpus(0, 4), (1, 4))
+
+    def test_workers_isolate_environment(self):
+        """Test each sosreport runs in its own process and environment"""
+
+        def analyze(sosreport, numproc=None):
+            os.environ["RISU_ROOT"] = sosreport
+            time.sleep(0.2)
+            return os.environ["RISU_ROOT"], os.getpid(), numproc
+
+        environ = os.environ.get("RISU_ROOT")
+        executor = parallel.ParallelRisuExecutor(num_processes=4)
+        result = executor.execute_parallel(["a", "b"], analyze, numproc=None)
+
+        self.assertEqual(os.environ.get("RISU_ROOT"), environ)
+        self.assertEqual(result["a"][0], "a")
+        self.assertEqual(result["b"][0], "b")
+        self.assertNotEqual(result["a"][1], os.getpid())
+        self.assertNotEqual(result["a"][1], result["b"][1])
+        # Two sosreports at once get half of the processes each
+        self.assertEqual(result["a"][2], 2)
+
+    def test_worker_errors_are_raised(self):
+        """Test failures analyzing a sosreport are reported"""
+
+        def analyze(sosreport):
+            if sosreport == "broken":
+                raise ValueError("cannot analyze")
+            return sosreport
+
+        with self.assertRaises(RuntimeError) as error:
+            self.executor.execute_parallel(["fine", "broken"], analyze)
+        self.assertIn("cannot analyze", str(error.exception))
+
 
 @unittest.skipIf(parallel is None, "parallel module not available")
 class TestEnableParallelExecution(unittest.TestCase):
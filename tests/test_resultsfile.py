@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Unit tests for risuclient/resultsfile.py
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from risuclient import resultsfile
+
+DATA = {
+    "metadata": {"source": "risu", "path": "/tmp/sosreport"},
+    "results": {
+        "id1": {"id": "id1", "result": {"rc": 10, "out": "", "err": "áé"}},
+        "id2": {"id": "id2", "result": {"rc": 20, "out": "", "err": "failed"}},
+    },
+}
+
+
+class TestResultsFile(unittest.TestCase):
+    """Test cases for results files in both formats"""
+
+    def setUp(self):
+        """Create temporary folder"""
+        self.folder = tempfile.mkdtemp()
+        self.json = os.path.join(self.folder, "risu.json")
+        self.gz = self.json + ".gz"
+
+    def tearDown(self):
+        """Remove temporary folder"""
+        shutil.rmtree(self.folder)
+
+    def test_dump_json(self):
+        """Test plain results keep the indented JSON format"""
+        resultsfile.dump(DATA, self.json)
+        with open(self.json, "r") as f:
+            self.assertEqual(f.read(), json.dumps(DATA, indent=2))
+        self.assertEqual(resultsfile.load(self.json), DATA)
+
+    def test_dump_compressed(self):
+        """Test results are compressed for .gz files"""
+        resultsfile.dump(DATA, self.gz)
+        with gzip.open(self.gz, "rb") as f:
+            self.assertEqual(json.loads(f.read().decode("UTF-8")), DATA)
+        self.assertEqual(resultsfile.load(self.gz), DATA)
+
+    def test_load_detects_format(self):
+        """Test format is detected by content, not by name"""
+        resultsfile.dump(DATA, self.gz)
+        os.rename(self.gz, self.json)
+        self.assertEqual(resultsfile.load(self.json), DATA)
+
+    def test_load_invalid(self):
+        """Test broken files raise ValueError as invalid JSON does"""
+        with open(self.gz, "wb") as f:
+            f.write(b"\x1f\x8bnot compressed")
+        self.assertRaises(ValueError, resultsfile.load, self.gz)
+        with open(self.json, "w") as f:
+            f.write("{")
+        self.assertRaises(ValueError, resultsfile.load, self.json)
+
+    def test_locate(self):
+        """Test newest file is found in any of the formats"""
+        self.assertIsNone(resultsfile.locate(self.json))
+
+        resultsfile.dump(DATA, self.gz)
+        self.assertEqual(resultsfile.locate(self.json), self.gz)
+        self.assertEqual(resultsfile.locate(self.gz), self.gz)
+
+        resultsfile.dump(DATA, self.json)
+        stamp = time.time() + 10
+        os.utime(self.json, (stamp, stamp))
+        self.assertEqual(resultsfile.locate(self.gz), self.json)
+
+    def test_convert(self):
+        """Test files are converted both ways"""
+        resultsfile.dump(DATA, self.json)
+        resultsfile.convert(self.json, self.gz)
+        self.assertLess(os.path.getsize(self.gz), os.path.getsize(self.json))
+
+        back = os.path.join(self.folder, "back.json")
+        self.assertEqual(resultsfile.convert(self.gz, back), DATA)
+        with open(self.json, "r") as f, open(back, "r") as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_index(self):
+        """Test plain results are indexed and written as before"""
+        data = dict(DATA, results=dict(DATA["results"]))
+        data["results"]["id1-sub"] = {"plugin": "/plugins/other", "result": {}}
+        data["results"]["id1"] = dict(data["results"]["id1"], plugin="/plugins/one")
+        resultsfile.dump(data, self.json)
+        with open(self.json, "r") as f:
+            self.assertEqual(f.read(), json.dumps(data, indent=2))
+
+        index = resultsfile.Index.load(self.json)
+        self.assertEqual(index.metadata, DATA["metadata"])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(sorted(index.select(ids=["id1"])), ["id1", "id1-sub"])
+        self.assertEqual(index.select(include=["one"]), ["id1"])
+        self.assertEqual(index.select(exclude=["plugins"]), ["id2"])
+        self.assertEqual(
+            index.read(["id1-sub", "id2"]),
+            {
+                "id2": data["results"]["id2"],
+                "id1-sub": data["results"]["id1-sub"],
+            },
+        )
+
+    def test_index_not_written(self):
+        """Test there's no index for compressed files"""
+        resultsfile.dump(DATA, self.gz)
+        self.assertFalse(os.path.exists(self.gz + resultsfile.INDEX))
+        self.assertIsNone(resultsfile.Index.load(self.gz))
+
+    def test_index_metadata(self):
+        """Test results lists only get their metadata indexed"""
+        data = {"metadata": {"source": "magui"}, "results": [1, 2]}
+        resultsfile.dump(data, self.json)
+        with open(self.json, "r") as f:
+            self.assertEqual(f.read(), json.dumps(data, indent=2))
+
+        index = resultsfile.Index.load(self.json)
+        self.assertFalse(index.indexed)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(resultsfile.metadata(self.json), data["metadata"])
+        self.assertEqual(resultsfile.load(self.json, ids=["id1"]), data)
+
+        # Without index, metadata is read from the file
+        os.remove(self.json + resultsfile.INDEX)
+        self.assertEqual(resultsfile.metadata(self.json), data["metadata"])
+
+    def test_index_outdated(self):
+        """Test index is not used once the file is modified"""
+        resultsfile.dump(DATA, self.json)
+        with open(self.json, "a") as f:
+            f.write("\n")
+        self.assertIsNone(resultsfile.Index.load(self.json))
+
+    def test_load_partial(self):
+        """Test only results requested are read, with or without index"""
+        resultsfile.dump(DATA, self.json)
+        resultsfile.dump(DATA, self.gz)
+        for filename in [self.json, self.gz]:
+            data = resultsfile.load(filename, ids=["id2", "missing"])
+            self.assertEqual(data["metadata"], DATA["metadata"])
+            self.assertEqual(list(data["results"]), ["id2"])
+            self.assertEqual(resultsfile.load(filename, ids=[])["results"], {})
+
+        # Wrong offsets read the whole file
+        with open(self.json + resultsfile.INDEX, "r") as f:
+            index = json.load(f)
+        index["results"]["id2"][0] += 1
+        with open(self.json + resultsfile.INDEX, "w") as f:
+            json.dump(index, f)
+        self.assertEqual(
+            resultsfile.load(self.json, ids=["id2"])["results"],
+            {"id2": DATA["results"]["id2"]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,11 +3,15 @@
 # Copyright (C) 2017 Lars Kellogg-Stedman <lars@redhat.com>
 # Copyright (C) 2017-2022 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
 import os
+import shutil
 import sys
+import tempfile
+import time
 from unittest import TestCase
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/" + "../"))
 import risuclient.shell as risu
+from risuclient import cache
 
 testplugins = os.path.join(risu.risudir, "plugins", "test")
 risudir = risu.risudir
@@ -41,6 +45,21 @@ class RisuTest(TestCase):
     def test_findplugins_negative(self):
         assert risu.findplugins("__does_not_exist__") == []
 
+    def test_findplugins_saved_once(self):
+        tmpdir = tempfile.mkdtemp(prefix="risu-tests-")
+        index_file = os.path.join(tmpdir, "index.pkl")
+        saved = risu._plugin_index
+        try:
+            risu._plugin_index = cache.PluginIndex(index_file=index_file)
+            assert len(risu.findplugins([testplugins])) != 0
+            # Index is only saved once per run, not on each search
+            assert not os.path.exists(index_file)
+            risu.savecaches()
+            assert os.path.exists(index_file)
+        finally:
+            risu._plugin_index = saved
+            shutil.rmtree(tmpdir)
+
     def test_which(self):
         assert risu.which("/bin/sh") == "/bin/sh"
 
@@ -73,3 +92,423 @@ class RisuTest(TestCase):
             pass
 
         assert True
+
+    def test_parseheaders(self):
+        lines = [
+            "#!/bin/bash",
+            "# long_name: Long name",
+            "# description: Some: description",
+            "# not a header",
+            "# description: Second description",
+            "// priority: 300",
+        ]
+        headers = risu.parseheaders(lines)
+        assert headers == {"long_name": "Long name", "description": "Some: description"}
+        assert risu.parseheaders(lines, comment="//") == {"priority": "300"}
+
+    def test_parseheaders_stops_on_keys(self):
+        lines = iter(["# priority: 300", "# kb: http://kb"])
+        assert risu.parseheaders(lines, keys=["priority"]) == {"priority": "300"}
+        # Remaining lines were not consumed
+        assert next(lines) == "# kb: http://kb"
+
+    def test_parseheaders_optional_keys(self):
+        lines = ["# priority: 300", "# timeout: 90", "echo"]
+        headers = risu.parseheaders(lines, keys=["priority"], optional=["timeout"])
+        assert headers == {"priority": "300", "timeout": "90"}
+
+        # Optional keys are not looked for past the headers block
+        lines = iter(
+            ["# priority: 300", "#", "# kb: http://kb", "echo", "# timeout: 90"]
+        )
+        headers = risu.parseheaders(lines, keys=["priority"], optional=["timeout"])
+        assert headers == {"priority": "300", "kb": "http://kb"}
+        assert next(lines) == "# timeout: 90"
+
+    def test_generic_get_metadata_matches_regexpfile(self):
+        plugin = os.path.join(
+            risudir,
+            "plugins",
+            "core",
+            "sumsos",
+            "kbases",
+            "sumsos-kbase-2162451-341.sh",
+        )
+        metadata = risu.generic_get_metadata(plugin={"plugin": plugin})
+        for key in ["description", "long_name", "bugzilla", "priority", "kb"]:
+            value = risu.regexpfile(filename=plugin, regexp=r"\A# %s:" % key)
+            assert "%s" % metadata[key] == value[len(key) + 3 :].strip()
+
+    def test_getids_filters(self):
+        plugins = risu.findplugins([testplugins])
+        ids = risu.getids(plugins=plugins, include=["exit_"], exclude=["exit_passed"])
+        expected = [
+            plugin["id"]
+            for plugin in plugins
+            if "exit_" in plugin["plugin"] and "exit_passed" not in plugin["plugin"]
+        ]
+        assert ids == expected
+
+    def test_getids_registry_matches_plugin_list(self):
+        include = ["faraday/positive", "faraday/negative"]
+        plugins = risu.findallplugins()
+        assert risu.getids(include=include) == risu.getids(
+            plugins=plugins, include=include
+        )
+        # Registry is reused for later lookups
+        assert risu.getregistry() is risu.getregistry()
+
+    def test_smartplan(self):
+        plugins = risu.findplugins([testplugins])
+        first, second, third, fourth = plugins[:4]
+        composed = "%s-%s" % (first["id"], risu.calcid("/etc/hosts"))
+        stale = "%s-%s" % (fourth["id"], risu.calcid("/etc/hosts"))
+        results = {
+            # Results split by hooks from current and older plugin versions
+            composed: {"id": composed, "hash": first["hash"]},
+            stale: {"id": stale, "hash": "old"},
+            second["id"]: {"id": second["id"], "hash": "old"},
+            third["id"]: {"id": third["id"], "hash": third["hash"]},
+            "gone": {"id": "gone", "hash": first["hash"]},
+        }
+        plan = risu.smartplan(results, plugins)
+
+        assert plan["removed"] == sorted([stale, "gone"])
+        assert plan["changed"] == sorted([second["id"], fourth["id"]])
+        assert plan["unchanged"] == sorted([composed, third["id"]])
+        assert plan["added"] == sorted(
+            plugin["id"] for plugin in plugins[4:] if plugin["id"] not in results
+        )
+
+    def test_dorisu_smart_rerun(self):
+        plugins = risu.findplugins([testplugins], include=["exit_passed"])
+        tmpdir = tempfile.mkdtemp()
+        try:
+            results = risu.dorisu(path=tmpdir, plugins=plugins, quiet=True)
+            assert plugins[0]["id"] in results
+
+            # Results up to date are not run again
+            with open(os.path.join(tmpdir, "risu.json")) as f:
+                stored = risu.json.load(f)["results"]
+            assert risu.smartplan(stored, plugins)["added"] == []
+            again = risu.dorisu(path=tmpdir, plugins=plugins, quiet=True)
+            pluginid = plugins[0]["id"]
+            assert again[pluginid]["time"] == results[pluginid]["time"]
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_dorisu_facts_only_to_run(self):
+        plugins = risu.findplugins([testplugins], include=["exit_passed"])
+        tmpdir = tempfile.mkdtemp()
+        exports = []
+        export = risu.facts.export
+        risu.facts.export = lambda *args, **kwargs: exports.append(kwargs)
+        try:
+            risu.dorisu(path=tmpdir, plugins=plugins, quiet=True)
+            assert len(exports) == 1
+            # Temporary folder of the plugins is removed once they run
+            assert not os.path.exists(exports[0]["tmp"])
+
+            # Nothing to run, facts are not computed
+            risu.dorisu(path=tmpdir, plugins=plugins, quiet=True)
+            assert len(exports) == 1
+            assert not os.path.exists(os.environ["RISU_TMP"])
+        finally:
+            risu.facts.export = export
+            shutil.rmtree(tmpdir)
+
+    def test_dorisu_compressed(self):
+        plugins = risu.findplugins([testplugins], include=["exit_passed"])
+        options = risu.parse_args(default=True)
+        options.compress = True
+        tmpdir = tempfile.mkdtemp()
+        try:
+            results = risu.dorisu(
+                path=tmpdir, plugins=plugins, quiet=True, options=options
+            )
+            assert not os.path.exists(os.path.join(tmpdir, "risu.json"))
+            stored = risu.resultsfile.load(os.path.join(tmpdir, "risu.json.gz"))
+            assert sorted(stored["results"]) == sorted(results)
+
+            # Compressed results are reused when reading risu.json
+            again = risu.dorisu(path=tmpdir, plugins=plugins, quiet=True)
+            pluginid = plugins[0]["id"]
+            assert again[pluginid]["time"] == results[pluginid]["time"]
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_dorisu_partial(self):
+        plugins = risu.findplugins([testplugins], include=["exit_"])
+        tmpdir = tempfile.mkdtemp()
+        filename = os.path.join(tmpdir, "risu.json")
+        try:
+            risu.dorisu(path=tmpdir, plugins=plugins, quiet=True)
+            with open(filename) as f:
+                saved = f.read()
+
+            # Results of other plugins are not read and file is not written again
+            results = risu.dorisu(path=tmpdir, plugins=plugins[:1], quiet=True)
+            assert plugins[0]["id"] in results
+            assert plugins[1]["id"] not in results
+            with open(filename) as f:
+                assert f.read() == saved
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_plugintimeout(self):
+        assert risu.plugintimeout({"timeout": 120}) == 120
+        assert risu.plugintimeout({"timeout": 0}) == risu.PLUGIN_TIMEOUT
+        assert risu.plugintimeout({"timeout": "potato"}) == risu.PLUGIN_TIMEOUT
+        assert risu.plugintimeout({}) == risu.PLUGIN_TIMEOUT
+
+    def test_tasktimeout(self):
+        assert risu.tasktimeout({"timeout": 120}) == 120
+        batch = [{"timeout": 0}] * 300 + [{"timeout": 90}]
+        assert risu.tasktimeout(batch) == 90
+        assert risu.tasktimeout([{"timeout": 5}] * 300) == risu.PLUGIN_TIMEOUT
+        assert risu.tasktimeout([]) == risu.PLUGIN_TIMEOUT
+
+    def test_generic_get_metadata_timeout(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            plugin = os.path.join(tmpdir, "plugin.sh")
+            with open(plugin, "w") as f:
+                f.write("#!/bin/bash\n# description: test\n# timeout: 90\n")
+            metadata = risu.generic_get_metadata(plugin={"plugin": plugin})
+            assert metadata["timeout"] == 90
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_generic_get_metadata_cached_without_timeout(self):
+        tmpdir = tempfile.mkdtemp()
+        saved = risu._metadata_cache
+        try:
+            plugin = os.path.join(tmpdir, "plugin.sh")
+            with open(plugin, "w") as f:
+                f.write("#!/bin/bash\n# description: test\n# timeout: 90\n")
+            risu._metadata_cache = cache.MetadataCache(
+                cache_file=os.path.join(tmpdir, "metadata.pkl")
+            )
+            risu._metadata_cache.set(plugin, {"description": "cached"})
+            metadata = risu.generic_get_metadata(plugin={"plugin": plugin})
+            # Entries cached before 'timeout' was read get the plugin one
+            assert metadata == {"description": "cached", "timeout": 90}
+            assert risu._metadata_cache.get(plugin) == metadata
+        finally:
+            risu._metadata_cache = saved
+            shutil.rmtree(tmpdir)
+
+    def test_execonshell_timeout_kills_process_group(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            marker = os.path.join(tmpdir, "marker")
+            plugin = os.path.join(tmpdir, "plugin.sh")
+            with open(plugin, "w") as f:
+                f.write("#!/bin/bash\n(sleep 3; touch %s) &\nsleep 30 | cat\n" % marker)
+            os.chmod(plugin, 0o755)
+            os.environ["RC_SKIPPED"] = "%s" % risu.RC_SKIPPED
+
+            start = time.time()
+            returncode, out, err = risu.execonshell(filename=plugin, timeout=1)
+            assert time.time() - start < 3
+            assert returncode == risu.RC_SKIPPED
+
+            # Background child was killed with the plugin
+            time.sleep(3)
+            assert not os.path.exists(marker)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_execonshell_kills_leftovers(self):
+        tmpdir = tempfile.mkdtemp()
+        saved = os.waitid
+        try:
+            marker = os.path.join(tmpdir, "marker")
+            plugin = os.path.join(tmpdir, "plugin.sh")
+            with open(plugin, "w") as f:
+                f.write("#!/bin/bash\n(sleep 3; touch %s) &\nexit 0\n" % marker)
+            os.chmod(plugin, 0o755)
+
+            for waitid in [True, False]:
+                if not waitid:
+                    del os.waitid
+                start = time.time()
+                returncode, out, err = risu.execonshell(filename=plugin, timeout=10)
+                # Background child holding the pipes didn't delay the plugin
+                assert time.time() - start < 3
+                assert returncode == 0
+            time.sleep(3)
+            assert not os.path.exists(marker)
+        finally:
+            os.waitid = saved
+            shutil.rmtree(tmpdir)
+
+    def test_execonshell_timer_after_exit(self):
+        timers = []
+        kills = []
+
+        class FakeTimer(object):
+            def __init__(self, interval, function):
+                self.function = function
+                timers.append(self)
+
+            def start(self):
+                pass
+
+            def cancel(self):
+                pass
+
+        os.environ["RC_SKIPPED"] = "%s" % risu.RC_SKIPPED
+        timer, killgroup = risu.Timer, risu.killgroup
+        risu.Timer = FakeTimer
+        risu.killgroup = kills.append
+        try:
+            for waitid in [True, False]:
+                saved = os.waitid
+                if not waitid:
+                    del os.waitid
+                try:
+                    returncode, out, err = risu.execonshell(
+                        filename="/bin/echo hello", timeout=1
+                    )
+                finally:
+                    os.waitid = saved
+                assert (returncode, out) == (0, "hello")
+
+                # Anything left in the plugin group is killed once it exits
+                assert len(kills) == 1
+
+                # Timer firing once the plugin was reaped doesn't kill anything
+                del kills[:]
+                timers[-1].function()
+                assert kills == []
+        finally:
+            risu.Timer, risu.killgroup = timer, killgroup
+
+    def test_runplugin_records_usage(self):
+        plugin = risu.findplugins([testplugins], include=["exit_passed"])[0]
+        os.environ["RC_OKAY"] = "%s" % risu.RC_OKAY
+        result = risu.runplugin(plugin)
+        assert result["result"]["rc"] == risu.RC_OKAY
+        assert result["time"] >= 0
+        assert result["cputime"] >= 0
+
+    def test_faraday_runbatch_matches_run(self):
+        plugins = risu.findallplugins()
+        faraday = [plugin for plugin in plugins if plugin["backend"] == "faraday"]
+        assert faraday
+
+        # All faraday plugins go in the same task
+        tasks = risu.batchplugins(faraday)
+        assert len(tasks) == 1 and len(tasks[0]) == len(faraday)
+
+        tmpdir = tempfile.mkdtemp()
+        environ = dict(os.environ)
+        os.environ["RISU_ROOT"] = tmpdir
+        os.environ["RISU_LIVE"] = "0"
+        try:
+            os.makedirs(os.path.join(tmpdir, "etc"))
+            with open(os.path.join(tmpdir, "etc", "machine-id"), "w") as f:
+                f.write("1234\n")
+
+            extension = [
+                extension
+                for extension in risu.initPymodules()[0]
+                if extension.__name__.split(".")[-1] == "faraday"
+            ][0]
+            expected = [extension.run(dict(plugin)) for plugin in faraday]
+            results = risu.runbatch([dict(plugin) for plugin in faraday])
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            shutil.rmtree(tmpdir)
+
+        assert [
+            (
+                result["result"]["rc"],
+                result["result"]["out"],
+                result["result"]["err"],
+            )
+            for result in results
+        ] == [(rc, "%s" % out, "%s" % err) for rc, out, err in expected]
+        assert risu.RC_OKAY in [result["result"]["rc"] for result in results]
+
+    def test_golang_sourcehash(self):
+        extension = [
+            extension
+            for extension in risu.initPymodules()[0]
+            if extension.__name__.split(".")[-1] == "golang"
+        ][0]
+        tmpdir = tempfile.mkdtemp()
+        try:
+            folder = os.path.join(tmpdir, "plugins", "check")
+            os.makedirs(folder)
+            plugin = {"plugin": os.path.join(folder, "check.go")}
+            hashes = []
+            for name, content in [
+                ("check.go", "package main\n"),
+                ("util.go", "package main\n"),
+                ("go.mod", "module check\n"),
+                ("util.go", "package main\n// changed\n"),
+                ("go.sum", "sum\n"),
+            ]:
+                # go.mod and go.sum of the module are found in parent folders
+                path = os.path.join(folder if name.endswith(".go") else tmpdir, name)
+                with open(path, "w") as f:
+                    f.write(content)
+                # Ensure files are hashed again even on coarse timestamps
+                os.utime(path, (len(hashes), len(hashes)))
+                hashes.append(extension._instance.sourcehash(plugin))
+            assert len(set(hashes)) == len(hashes)
+            assert extension._instance.sourcehash(plugin) == hashes[-1]
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_golang_build_cache(self):
+        if not risu.which("go"):
+            return
+
+        from risuclient import cache
+
+        extension = [
+            extension
+            for extension in risu.initPymodules()[0]
+            if extension.__name__.split(".")[-1] == "golang"
+        ][0]
+        plugin = [
+            plugin for plugin in risu.findallplugins() if plugin["backend"] == "golang"
+        ][0]
+        source = os.path.splitext(plugin["plugin"])[0]
+        mtime = os.stat(source).st_mtime if os.path.exists(source) else None
+
+        tmpdir = tempfile.mkdtemp()
+        buildcache = extension._instance.buildcache
+        extension._instance.buildcache = cache.BuildCache(cache_dir=tmpdir)
+        cwd = os.getcwd()
+        try:
+            extension.prepare(plugins=[plugin])
+            binary, err = extension._instance.build(plugin, risu.which("go"))
+            assert binary.startswith(tmpdir)
+            assert os.access(binary, os.X_OK)
+        finally:
+            extension._instance.buildcache = buildcache
+            shutil.rmtree(tmpdir)
+
+        # Nothing is built in the plugins folder nor our folder changed
+        assert os.getcwd() == cwd
+        assert (os.stat(source).st_mtime if os.path.exists(source) else None) == mtime
+
+    def test_initpymodules_imports_once(self):
+        first = risu.initPymodules()
+        second = risu.initPymodules()
+        assert [id(x) for x in first[0]] == [id(x) for x in second[0]]
+        assert sorted(first[1]) == sorted(second[1])
+        extension = risu.getExtensions()[0]
+        assert extension["info"][1] in risu._importtimes
+        assert risu.loadPymodules(extension) is risu.loadPymodules(extension)
+
+    def test_diff_config_defaults(self):
+        options = risu.parse_args(default=True)
+        assert risu.diff_config(options) == {}
+        options.verbose = True
+        assert risu.diff_config(options) == {"verbose": True}
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Unit tests for maguiclient/store.py
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import copy
+import json
+import os
+import pickle
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import risuclient.shell as risu
+from maguiclient import client, magui, store, views
+
+SOSREPORTS = ["host1", "host2", "host3"]
+
+
+def plugin_result(host, rc, err):
+    """Result of faraday plugin as returned by risu for a sosreport"""
+    return {
+        "plugin": "/plugins/faraday/positive/file.sh",
+        "path": "${RISU_ROOT}/etc/file",
+        "backend": "faraday",
+        "id": "faraday",
+        "description": "description from %s" % host,
+        "time": 0.1,
+        "cputime": 0.05,
+        "result": {"rc": rc, "out": "", "err": "%s" % err},
+    }
+
+
+class TestStore(unittest.TestCase):
+    """Test cases for columnar grouped results"""
+
+    def setUp(self):
+        """Set up results as returned by risu for each sosreport"""
+        self.result = {
+            "host1": {"faraday": plugin_result("host1", risu.RC_OKAY, 1)},
+            "host2": {"faraday": plugin_result("host2", risu.RC_OKAY, 2)},
+            "host3": {
+                "faraday": plugin_result("host3", risu.RC_OKAY, 1),
+                "other": {"id": "other", "result": {"rc": 3, "out": "", "err": ""}},
+            },
+        }
+        self.grouped = store.group(SOSREPORTS, self.result)
+
+    def test_group(self):
+        """Test grouped results are the same as in nested dictionaries"""
+        faraday = self.grouped["faraday"]
+        self.assertEqual(list(faraday["sosreport"]), SOSREPORTS)
+        self.assertEqual(
+            faraday["sosreport"]["host2"],
+            {"rc": risu.RC_OKAY, "out": "", "err": "2"},
+        )
+        self.assertEqual(list(self.grouped["other"]["sosreport"]), ["host3"])
+        self.assertNotIn("host1", self.grouped["other"]["sosreport"])
+        self.assertNotIn("time", faraday)
+        self.assertNotIn("cputime", faraday)
+        self.assertNotIn("result", faraday)
+
+    def test_metadata_from_last_sosreport(self):
+        """Test metadata is taken once, from last sosreport with the plugin"""
+        self.assertEqual(
+            self.grouped["faraday"]["description"], "description from host3"
+        )
+
+    def test_interned(self):
+        """Test equal outputs are stored once"""
+        results = self.grouped["faraday"]["sosreport"]
+        self.assertIs(results["host1"]["err"], results["host3"]["err"])
+
+    def test_other_results_kept(self):
+        """Test results not fitting in columns are kept as they are"""
+        results = self.grouped["faraday"]["sosreport"]
+        extra = {"rc": risu.RC_FAILED, "out": "", "err": "", "extra": True}
+        results["host1"] = extra
+        results["host2"] = {"rc": "1", "out": "", "err": ""}
+        self.assertIs(results["host1"], extra)
+        self.assertEqual(results["host2"]["rc"], "1")
+
+    def test_write_and_delete(self):
+        """Test results can be replaced, removed and added"""
+        results = self.grouped["faraday"]["sosreport"]
+        results["host1"] = {"rc": risu.RC_FAILED, "out": "", "err": "1"}
+        del results["host2"]
+        results["host4"] = {"rc": risu.RC_SKIPPED, "out": "", "err": ""}
+
+        self.assertEqual(results["host1"]["rc"], risu.RC_FAILED)
+        self.assertEqual(list(results), ["host1", "host3", "host4"])
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(self.grouped["other"]["sosreport"]), 1)
+        self.assertRaises(KeyError, results.__delitem__, "host2")
+
+    def test_write_through(self):
+        """Test results read are modified in place as nested dictionaries"""
+        results = self.grouped["faraday"]["sosreport"]
+        results["host1"].update({"rc": risu.RC_FAILED, "err": "updated"})
+        results["host2"]["rc"] = risu.RC_SKIPPED
+        results["host3"]["extra"] = True
+        self.assertEqual(
+            results["host1"], {"rc": risu.RC_FAILED, "out": "", "err": "updated"}
+        )
+        self.assertEqual(results["host2"]["rc"], risu.RC_SKIPPED)
+        self.assertTrue(results["host3"]["extra"])
+
+        # Copies are detached plain dictionaries
+        for copied in [dict(results["host2"]), copy.deepcopy(results["host2"])]:
+            copied["rc"] = risu.RC_OKAY
+            self.assertIs(type(copied), dict)
+        self.assertEqual(results["host2"]["rc"], risu.RC_SKIPPED)
+        self.assertIs(type(pickle.loads(pickle.dumps(results["host2"]))), dict)
+
+    def test_json(self):
+        """Test grouped results can be written as json"""
+        data = views.plain(self.grouped)
+        self.assertEqual(
+            json.loads(json.dumps(data))["faraday"]["sosreport"]["host3"]["err"], "1"
+        )
+
+    def test_hooks_and_plugins(self):
+        """Test hooks and magui plugins work on columnar results"""
+        hooks = os.path.join(os.path.dirname(magui.__file__), "hooks", "data")
+        grouped = client.MaguiClient().run_hooks(self.grouped, hooks)
+        self.assertEqual(grouped["faraday"]["sosreport"]["host1"]["rc"], risu.RC_FAILED)
+        self.assertEqual(
+            self.grouped["faraday"]["sosreport"]["host1"]["rc"], risu.RC_OKAY
+        )
+
+        plugin = risu.initPymodules(
+            extensions=risu.getPymodules(
+                folders=[os.path.join(os.path.dirname(magui.__file__), "plugins")]
+            )
+        )[0]
+        faraday = [each for each in plugin if each.__name__.endswith("faraday-magui")]
+        data = client.MaguiClient().filter_results(grouped, ["faraday"])
+        returncode, out, err = faraday[0].run(data=data)
+        self.assertEqual(returncode, risu.RC_FAILED)
+        self.assertIn("/etc/file", err)
+
+
+if __name__ == "__main__":
+    unittest.main()
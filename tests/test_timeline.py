@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Unit tests for risuclient/timeline.py
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from risuclient import timeline
+
+NOW = datetime.datetime(2024, 3, 1, 5, 0, 0)
+
+LOG = """Feb 29 10:00:00 host kernel: Command line: BOOT_IMAGE=/vmlinuz
+Feb 29 10:00:00 host systemd-journald[1]: Journal started
+Feb 29 10:00:05 host app[2]: message
+Feb 29 10:00:05 host app[2]: other message
+Feb 29 11:00:00 host app[2]: message
+continued line without timestamp
+Feb 29 12:00:00 host systemd-journald[1]: Journal stopped
+Mar  1 01:00:00 host kernel: Command line: BOOT_IMAGE=/vmlinuz
+Mar  1 01:00:01 host app[3]: message
+"""
+
+
+class TestTimeline(unittest.TestCase):
+    """Test cases for the shared syslog timeline"""
+
+    def setUp(self):
+        """Write log to a temporary folder"""
+        self.folder = tempfile.mkdtemp()
+        self.tmp = os.path.join(self.folder, "tmp")
+        os.mkdir(self.tmp)
+        self.log = os.path.join(self.folder, "messages")
+        with open(self.log, "w") as f:
+            f.write(LOG)
+
+    def tearDown(self):
+        """Remove temporary folder"""
+        shutil.rmtree(self.folder)
+
+    def test_timeparser_matches_gettime(self):
+        """Test cached parsing gives the same timestamps as gettime"""
+        parse = timeline.timeparser(NOW)
+        lines = LOG.splitlines() + [
+            "Dec 31 23:59:59 host app: last year",
+            "Mar  1 16:59:59 host app: within 12h",
+            "Mar  1 17:00:00 host app: last year",
+            "JAN  1 1:2:3 host app: short fields",
+            "2024-02-03T04:05:06 host app: iso",
+            "nothing",
+        ]
+        for line in lines:
+            self.assertEqual(parse(line), timeline.gettime(line, NOW))
+        self.assertRaises(ValueError, parse, "Jan 32 00:00:00 host app")
+
+    def test_events(self):
+        """Test journal and boot events are found in log order"""
+        log = timeline.Timeline.build(self.log, NOW)
+        self.assertEqual(
+            log.events,
+            [
+                (datetime.datetime(2024, 2, 29, 10, 0, 0), False, False, True),
+                (datetime.datetime(2024, 2, 29, 10, 0, 0), False, True, False),
+                (datetime.datetime(2024, 2, 29, 12, 0, 0), True, False, False),
+                (datetime.datetime(2024, 3, 1, 1, 0, 0), False, False, True),
+            ],
+        )
+        # Offsets are only kept for lines with a new timestamp
+        self.assertEqual(len(log.offsets), 6)
+
+    def test_lines(self):
+        """Test only lines within the window are read"""
+        log = timeline.Timeline.build(self.log, NOW)
+        lines = list(
+            log.lines(
+                datetime.datetime(2024, 2, 29, 10, 0, 5),
+                datetime.datetime(2024, 2, 29, 12, 0, 0),
+            )
+        )
+        self.assertEqual(lines, LOG.splitlines(True)[2:6])
+        self.assertEqual(list(log.lines()), LOG.splitlines(True))
+        self.assertEqual(list(log.lines(datetime.datetime(2025, 1, 1))), [])
+
+    def test_load_stores_timeline(self):
+        """Test timeline parsed once is reused from tmp folder"""
+        log = timeline.load(self.log, NOW, tmp=self.tmp)
+        self.assertEqual(
+            len([x for x in os.listdir(self.tmp) if x.endswith(".pkl")]), 1
+        )
+
+        original = timeline.Timeline.__dict__["build"]
+        try:
+            timeline.Timeline.build = None
+            stored = timeline.load(self.log, NOW, tmp=self.tmp)
+        finally:
+            timeline.Timeline.build = original
+        self.assertEqual(stored.events, log.events)
+        self.assertEqual(list(stored.offsets), list(log.offsets))
+
+    def test_load_changed_log(self):
+        """Test log modified after being stored is parsed again"""
+        timeline.load(self.log, NOW, tmp=self.tmp)
+        with open(self.log, "a") as f:
+            f.write("Mar  1 02:00:00 host systemd-journald[1]: Journal stopped\n")
+        log = timeline.load(self.log, NOW, tmp=self.tmp)
+        self.assertEqual(len(log.events), 5)
+        self.assertTrue(log.events[-1][1])
+
+    def test_load_missing_log(self):
+        """Test missing log raises IOError as reading it would"""
+        self.assertRaises(
+            (IOError, OSError),
+            timeline.load,
+            os.path.join(self.folder, "missing"),
+            NOW,
+            self.tmp,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
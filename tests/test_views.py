@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Unit tests for maguiclient/views.py
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+from __future__ import print_function
+
+import copy
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import risuclient.shell as risu
+from maguiclient import client, magui, views
+
+
+def grouped_results():
+    """Grouped results for three sosreports"""
+    return {
+        "faraday": {
+            "plugin": "/plugins/faraday/positive/file.sh",
+            "path": "${RISU_ROOT}/etc/file",
+            "backend": "faraday",
+            "id": "faraday",
+            "sosreport": {
+                "host1": {"rc": risu.RC_OKAY, "out": "", "err": "1"},
+                "host2": {"rc": risu.RC_OKAY, "out": "", "err": "2"},
+                "host3": {"rc": risu.RC_OKAY, "out": "", "err": "1"},
+            },
+        },
+        "release": {
+            "plugin": "/plugins/metadata/release.sh",
+            "backend": "metadata",
+            "id": "release",
+            "sosreport": {
+                "host1": {"rc": risu.RC_OKAY, "out": "", "err": "7"},
+                "host2": {"rc": risu.RC_OKAY, "out": "", "err": "8"},
+            },
+        },
+    }
+
+
+class TestViews(unittest.TestCase):
+    """Test cases for copy-on-write views of grouped results"""
+
+    def setUp(self):
+        """Set up grouped results"""
+        self.grouped = grouped_results()
+        self.original = copy.deepcopy(self.grouped)
+
+    def test_grouped_view_filters_sosreports(self):
+        """Test view shows only the sosreports requested"""
+        view = views.GroupedView(self.grouped, ["host1", "host3"])
+        self.assertEqual(sorted(view["faraday"]["sosreport"]), ["host1", "host3"])
+        self.assertEqual(list(view["release"]["sosreport"]), ["host1"])
+        self.assertNotIn("host2", view["release"]["sosreport"])
+        self.assertEqual(view["faraday"]["path"], "${RISU_ROOT}/etc/file")
+        self.assertEqual(self.grouped, self.original)
+
+    def test_unchanged_view_is_not_copied(self):
+        """Test view without filter nor writes gives back its source"""
+        view = views.CowDict(self.grouped)
+        view["faraday"]["sosreport"]["host1"]["err"]
+        self.assertIs(view.todict(), self.grouped)
+
+    def test_writes_only_copy_written_data(self):
+        """Test writes are kept in the view and untouched data shared"""
+        view = views.CowDict(views.GroupedView(self.grouped, ["host1", "host2"]))
+        view["faraday"]["sosreport"]["host1"].update({"rc": risu.RC_FAILED})
+        del view["release"]["sosreport"]["host2"]
+
+        self.assertEqual(self.grouped, self.original)
+        self.assertEqual(view["faraday"]["sosreport"]["host1"]["rc"], risu.RC_FAILED)
+
+        result = view.todict()
+        self.assertEqual(result["faraday"]["sosreport"]["host1"]["rc"], risu.RC_FAILED)
+        self.assertIs(
+            result["faraday"]["sosreport"]["host2"],
+            self.grouped["faraday"]["sosreport"]["host2"],
+        )
+        self.assertEqual(list(result["release"]["sosreport"]), ["host1"])
+
+    def test_plain_is_serializable(self):
+        """Test plugin outputs containing views can be written as json"""
+        view = views.GroupedView(self.grouped, ["host2"])
+        err = [dict(view[item]) for item in view]
+        self.assertEqual(
+            json.loads(json.dumps(views.plain(err)))[1]["sosreport"],
+            {"host2": self.original["release"]["sosreport"]["host2"]},
+        )
+
+    def test_hook_does_not_modify_grouped(self):
+        """Test faraday hook marks results as failed only in its view"""
+        hooks = os.path.join(os.path.dirname(magui.__file__), "hooks", "data")
+        result = client.MaguiClient().run_hooks(self.grouped, hooks)
+        self.assertEqual(self.grouped, self.original)
+        self.assertEqual(result["faraday"]["sosreport"]["host2"]["rc"], risu.RC_FAILED)
+        self.assertEqual(result["release"]["sosreport"]["host2"]["rc"], risu.RC_OKAY)
+
+    def test_domagui_does_not_modify_grouped(self):
+        """Test analyzing a group uses grouped results without changing them"""
+        result = magui.domagui(
+            sosreports=["host1"], risuplugins=[], grouped=self.grouped, runhooks=False
+        )
+        self.assertEqual(list(result["faraday"]["sosreport"]), ["host1"])
+        self.assertEqual(self.grouped, self.original)
+
+
+class TestTriggerIndex(unittest.TestCase):
+    """Test cases for dispatching grouped results to magui plugins"""
+
+    def setUp(self):
+        """Set up grouped results with plain and composed plugin ids"""
+        self.faraday = risu.calcid("faraday")
+        self.npd = risu.calcid("node-problem-detector")
+        self.grouped = {}
+        for pluginid in [
+            risu.calcid("plugin"),
+            "%s-%s" % (self.faraday, risu.calcid("/etc/hosts")),
+            "%s-%s" % (self.faraday, risu.calcid("/etc/passwd")),
+            "%s%s" % (self.npd, risu.calcid("pattern")),
+        ]:
+            self.grouped[pluginid] = {"id": pluginid, "sosreport": {}}
+        self.index = views.TriggerIndex(self.grouped)
+
+    def scan(self, triggers):
+        """Data selected checking every trigger against every plugin id"""
+        ourdata = {}
+        for trigger in triggers:
+            for elem in self.grouped:
+                if trigger in self.grouped[elem]["id"]:
+                    ourdata[self.grouped[elem]["id"]] = dict(self.grouped[elem])
+        return ourdata
+
+    def test_select_matches_scan(self):
+        """Test index selects the same plugins as checking all of them"""
+        for triggers in [
+            [self.faraday],
+            [self.npd, risu.calcid("plugin")],
+            [risu.calcid("pattern")],
+            [risu.calcid("missing")],
+            ["0", "-"],
+            [],
+        ]:
+            self.assertEqual(
+                views.plain(self.index.select(triggers)), self.scan(triggers)
+            )
+
+    def test_select_all(self):
+        """Test '*' gets all data as it is"""
+        self.assertIs(self.index.select(["*"]), self.grouped)
+
+    def test_select_is_not_copied(self):
+        """Test selected data is shared with grouped but can't modify it"""
+        data = self.index.select([self.npd])
+        key = list(data)[0]
+        self.assertIs(views.plain(data)[key], self.grouped[key])
+
+        data[key]["id"] = "changed"
+        self.assertEqual(self.grouped[key]["id"], key)
+
+    def test_filter_results_reuses_index(self):
+        """Test index is built once for the same grouped results"""
+        magui_client = client.MaguiClient()
+        magui_client.filter_results(self.grouped, [self.faraday])
+        index = magui_client._index
+        data = magui_client.filter_results(self.grouped, [self.npd])
+        self.assertIs(magui_client._index, index)
+        self.assertEqual(len(data), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Description: Convert risu and magui results between JSON and compressed JSON
+# Copyright (C) 2026 Pablo Iranzo Gómez <Pablo.Iranzo@gmail.com>
+
+"""
+Results format converter.
+
+Converts risu.json or magui.json files to compressed files (.gz) and
+back, so saved reports take less space and are read faster, while
+keeping the files readable by risu, magui and risu.html.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from risuclient import resultsfile
+except ImportError as e:
+    print("Error importing risuclient modules: %s" % str(e), file=sys.stderr)
+    print("Make sure you're running from the Risu root directory", file=sys.stderr)
+    sys.exit(1)
+
+
+def target(source):
+    """
+    Gets the filename of source converted to the other format
+    :param source: results file
+    :return: filename without .gz if compressed, with .gz otherwise
+    """
+    return resultsfile.candidates(source)[1]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Convert risu/magui results between JSON and compressed JSON (.gz)"
+    )
+    parser.add_argument(
+        "files",
+        nargs="+",
+        help="Results file(s) to convert, each one to the other format",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Output file, format set by its name (only with one file to convert)",
+    )
+    parser.add_argument(
+        "--remove",
+        action="store_true",
+        help="Remove files converted once written in the other format",
+    )
+
+    args = parser.parse_args()
+
+    if args.output and len(args.files) > 1:
+        print("Error: --output requires only one file to convert", file=sys.stderr)
+        return 1
+
+    failed = 0
+    for source in args.files:
+        destination = args.output or target(source)
+        try:
+            resultsfile.convert(source, destination)
+        except (IOError, OSError, ValueError) as e:
+            print("Error converting %s: %s" % (source, str(e)), file=sys.stderr)
+            failed += 1
+            continue
+
+        print(
+            "%s (%d bytes) -> %s (%d bytes)"
+            % (
+                source,
+                os.path.getsize(source),
+                destination,
+                os.path.getsize(destination),
+            )
+        )
+        if args.remove and os.path.abspath(source) != os.path.abspath(destination):
+            os.remove(source)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())